@@ -1,31 +1,52 @@
 from django.contrib import admin
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.http import urlencode
 
 from movies.models import Movie
+from quickflicks.pagination import EstimatedCountPaginator
 from .models import GroupProfile
 
 
+def count_subquery(queryset, field):
+    """
+    COUNT of `queryset` rows whose `field` matches the outer row,
+    as a correlated subquery: only evaluated for the rows on the
+    current page, unlike a JOIN + GROUP BY over the whole table.
+    """
+    counted = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
 # -----------------------------
 # USER ADMIN CUSTOMISATIONS
 # -----------------------------
 
+# Both columns read data loaded by CustomUserAdmin.get_queryset()
+# (prefetched groups, annotated movie_count): no query per row
+
 def group_list(obj):
     return ", ".join([g.name for g in obj.groups.all()]) or "—"
 group_list.short_description = "Groups"
 
 
 def total_movies(obj):
-    count = Movie.objects.filter(user=obj).count()
     url = (
         reverse("admin:movies_movie_changelist")
         + "?"
         + urlencode({"user__id__exact": obj.id})
     )
-    return format_html('<a href="{}">{}</a>', url, count)
+    return format_html('<a href="{}">{}</a>', url, obj.movie_count)
 total_movies.short_description = "Movies"
 
 
@@ -57,6 +78,19 @@ class CustomUserAdmin(UserAdmin):
     )
     list_filter = ("is_staff", "is_superuser", "is_active", "groups")
 
+    # ---- LARGE TABLES (see quickflicks/pagination.py) ----
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # Only the changelist needs the extra columns
+        if request.resolver_match and request.resolver_match.url_name.endswith("changelist"):
+            queryset = queryset.annotate(
+                movie_count=count_subquery(Movie.objects.all(), "user"),
+            ).prefetch_related("groups")
+        return queryset
+
 
 # Unregister default and register custom
 admin.site.unregister(User)
@@ -77,15 +111,21 @@ class GroupProfileInline(admin.StackedInline):
 
 class CustomGroupAdmin(admin.ModelAdmin):
     list_display = ("name", "member_count", "total_permissions", "get_description")
+    list_select_related = ("profile",)
     inlines = [GroupProfileInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            members=count_subquery(User.groups.through.objects.all(), "group"),
+            permission_count=count_subquery(Group.permissions.through.objects.all(), "group"),
+        )
+
     def member_count(self, obj):
-        UserModel = admin.site._registry[User].model
-        return UserModel.objects.filter(groups=obj).count()
+        return obj.members
     member_count.short_description = "Members"
 
     def total_permissions(self, obj):
-        return obj.permissions.count()
+        return obj.permission_count
     total_permissions.short_description = "Permissions"
 
     def get_description(self, obj):
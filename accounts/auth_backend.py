@@ -1,29 +1,67 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import User
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
 
 class EmailOrUsernameBackend(ModelBackend):
     """
     Custom authentication backend that allows login using either username or email.
     Django still handles password checking and permissions.
+
+    The identifier is resolved in ONE query, matched case-insensitively
+    through the LOWER(username) / LOWER(email) indexes added by
+    accounts migration 0002.
     """
 
+    def identifier_queryset(self, identifier):
+        """
+        Users whose username or email matches `identifier`
+        (case-insensitive), best match first:
+        a username match wins over an email match, an exact-case
+        username over a different-case one, then the oldest account.
+        """
+        wanted = Lower(Value(identifier))
+        return (
+            User.objects
+            .alias(username_lower=Lower("username"), email_lower=Lower("email"))
+            .filter(Q(username_lower=wanted) | Q(email_lower=wanted))
+            .order_by(
+                Case(
+                    When(username=identifier, then=Value(0)),
+                    When(username_lower=wanted, then=Value(1)),
+                    default=Value(2),
+                    output_field=IntegerField(),
+                ),
+                "id",
+            )
+        )
+
+    def get_by_identifier(self, identifier):
+        """
+        Returns the best matching user for a username or email, or None.
+        """
+        if not identifier:
+            return None
+        return self.identifier_queryset(identifier).first()
+
     def authenticate(self, request, username=None, password=None, **kwargs):
         # Allow login with 'username' field containing either username OR email
-        user = None
-
-        if username:
-            # Try to match email first
-            try:
-                user = User.objects.get(email__iexact=username)
-            except User.DoesNotExist:
-                # Fallback: try username
-                try:
-                    user = User.objects.get(username__iexact=username)
-                except User.DoesNotExist:
-                    return None
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self.get_by_identifier(username)
+
+        if user is None:
+            # Hash anyway, so a missing account takes as long as a
+            # wrong password (no user enumeration by timing)
+            User().set_password(password)
+            return None
 
         # Validate password
-        if user and user.check_password(password):
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
 
         return None
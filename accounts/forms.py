@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
+
+from .auth_backend import EmailOrUsernameBackend
 
 """
 Custom form classes used throughout the authentication system.
@@ -92,34 +93,34 @@ class EmailOrUsernameLoginForm(forms.Form):
     def clean(self):
         """
         Custom validation logic:
-        - Look up user by username first
-        - If not found, try email
-        - Authenticate via Django’s auth backend
+        - Resolve the username OR email in a single query
+        - Check the password on that same user (no second lookup)
         - If invalid, raise a form-wide error
         """
         cleaned_data = super().clean()
         identifier = cleaned_data.get("identifier")
         password = cleaned_data.get("password")
 
-        # Find user by username OR email
-        try:
-            user = User.objects.get(username=identifier)
-        except User.DoesNotExist:
-            user = User.objects.filter(email=identifier).first()
+        if not identifier or not password:
+            return cleaned_data
+
+        backend = EmailOrUsernameBackend()
+        user = backend.get_by_identifier(identifier)
 
         if not user:
+            # Same hashing cost as a real login attempt
+            User().set_password(password)
             raise forms.ValidationError(
                 "No account found with that username or email."
             )
 
-        # Authenticate using the *real* username
-        authenticated_user = authenticate(username=user.username, password=password)
-
-        if authenticated_user is None:
+        if not (user.check_password(password) and backend.user_can_authenticate(user)):
             raise forms.ValidationError("Incorrect password. Please try again.")
 
-        # Store authenticated user for the view
-        self.user = authenticated_user
+        # Store authenticated user for the view; login() needs to
+        # know which backend authenticated it
+        user.backend = f"{EmailOrUsernameBackend.__module__}.{EmailOrUsernameBackend.__name__}"
+        self.user = user
         return cleaned_data
 
 
@@ -0,0 +1,116 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from accounts.auth_backend import EmailOrUsernameBackend
+from accounts.forms import EmailOrUsernameLoginForm
+from monitoring.bench import percentile
+
+
+SEED_PREFIX = "bench_login_"
+SEED_PASSWORD = "bench-password-123"
+BATCH_SIZE = 10000
+
+
+def legacy_lookup(identifier):
+    """
+    The queries a login used to run before the one-query backend:
+    the form's exact username/email lookups, then the backend's
+    email__iexact and username__iexact lookups.
+    """
+    user = User.objects.filter(username=identifier).first()
+    if user is None:
+        user = User.objects.filter(email=identifier).first()
+    if user is not None:
+        identifier = user.username
+    return (
+        User.objects.filter(email__iexact=identifier).first()
+        or User.objects.filter(username__iexact=identifier).first()
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures login latency: the identifier lookup on its own (old "
+        "multi-query path vs the one-query backend) and a full form "
+        "validation including password hashing. --seed creates bench "
+        "users first, e.g. --seed 1000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Make sure this many bench users exist.")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--full", type=int, default=5,
+                            help="Full logins (with password hashing) to time.")
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.seed(options["seed"])
+
+        names = list(
+            User.objects.filter(username__startswith=SEED_PREFIX)
+            .values_list("username", flat=True)[:50000]
+        )
+        if not names:
+            self.stderr.write("No bench users: run with --seed N first.")
+            return
+
+        total = User.objects.count()
+        rng = random.Random(0)
+        # Mix of username / email logins, in the case users type them
+        identifiers = [
+            rng.choice([name, name.upper(), f"{name}@Example.com"])
+            for name in rng.choices(names, k=options["requests"])
+        ]
+
+        backend = EmailOrUsernameBackend()
+        self.stdout.write(f"{total} users, {len(identifiers)} lookups each")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nlookup plan"))
+        self.stdout.write(backend.identifier_queryset(identifiers[0])[:1].explain())
+
+        self.report("legacy lookup (2-4 queries)", legacy_lookup, identifiers)
+        self.report("one-query lookup", backend.get_by_identifier, identifiers)
+
+        def full_login(identifier):
+            form = EmailOrUsernameLoginForm(
+                {"identifier": identifier, "password": SEED_PASSWORD}
+            )
+            assert form.is_valid(), form.errors
+
+        self.report("full login (incl. hashing)", full_login, identifiers[:options["full"]])
+
+    def report(self, name, func, identifiers):
+        samples = []
+        for identifier in identifiers:
+            started = time.perf_counter()
+            func(identifier)
+            samples.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+        self.stdout.write(f"Mean:  {statistics.mean(samples):.2f} ms")
+        for pct in (50, 95, 99):
+            self.stdout.write(f"p{pct}:   {percentile(samples, pct):.2f} ms")
+
+    def seed(self, count):
+        existing = User.objects.filter(username__startswith=SEED_PREFIX).count()
+        # One hash for every bench user: hashing 1M passwords would
+        # take hours and is not what is being measured
+        password = make_password(SEED_PASSWORD)
+
+        for start in range(existing, count, BATCH_SIZE):
+            User.objects.bulk_create(
+                User(
+                    username=f"{SEED_PREFIX}{i}",
+                    email=f"{SEED_PREFIX}{i}@example.com",
+                    password=password,
+                )
+                for i in range(start, min(start + BATCH_SIZE, count))
+            )
+            self.stdout.write(f"Seeded {min(start + BATCH_SIZE, count)} / {count}", ending="\r")
+        self.stdout.write("")
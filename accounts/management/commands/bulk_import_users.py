@@ -0,0 +1,153 @@
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.signals import site_users_group_id
+
+
+BATCH_SIZE = 1000
+
+
+def hash_password(password):
+    # Module level so it can be pickled to the worker processes;
+    # an empty password gives an unusable one (reset by email)
+    return make_password(password or None)
+
+
+def read_rows(csv_file):
+    """
+    Yields (line, username, email, password) from a CSV with a
+    "username,email,password" header, one row at a time.
+    """
+    reader = csv.DictReader(csv_file)
+    missing = {"username", "email", "password"} - set(reader.fieldnames or ())
+    if missing:
+        raise CommandError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    for row in reader:
+        yield (
+            reader.line_num,
+            (row["username"] or "").strip(),
+            (row["email"] or "").strip(),
+            row["password"] or "",
+        )
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates users from a CSV file (username,email,password), "
+        "hashing passwords in a process pool and inserting users and "
+        "their 'Site Users' memberships in bulk. Existing usernames are "
+        "skipped. Use '-' to read from stdin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Processes used to hash passwords.")
+
+    def handle(self, *args, **options):
+        path = options["csv_file"]
+        started = time.perf_counter()
+        totals = {"created": 0, "skipped": 0}
+
+        if path == "-":
+            self.import_file(sys.stdin, options, totals)
+        else:
+            try:
+                with open(path, newline="", encoding="utf-8-sig") as csv_file:
+                    self.import_file(csv_file, options, totals)
+            except FileNotFoundError:
+                raise CommandError(f"No such file: {path}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {totals['created']} users, skipped {totals['skipped']} "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def import_file(self, csv_file, options, totals):
+        # bulk_create() sends no post_save, so memberships are added here
+        group_id = site_users_group_id()
+
+        # django.setup() lets the workers hash with the project's
+        # PASSWORD_HASHERS when processes are spawned rather than forked
+        with ProcessPoolExecutor(max_workers=options["workers"],
+                                 initializer=django.setup) as pool:
+            for batch in batches(read_rows(csv_file), options["batch_size"]):
+                rows = self.new_rows(batch, totals)
+                if not rows:
+                    continue
+
+                hashes = pool.map(
+                    hash_password,
+                    [password for _, _, _, password in rows],
+                    chunksize=max(1, len(rows) // (options["workers"] * 4)),
+                )
+                users = [
+                    User(username=username, email=email, password=hashed)
+                    for (_, username, email, _), hashed in zip(rows, hashes)
+                ]
+
+                with transaction.atomic():
+                    User.objects.bulk_create(users)
+                    User.groups.through.objects.bulk_create(
+                        [
+                            User.groups.through(user_id=user.pk, group_id=group_id)
+                            for user in users
+                        ],
+                        ignore_conflicts=True,
+                    )
+
+                totals["created"] += len(users)
+                self.stdout.write(f"{totals['created']} users created…")
+
+    def new_rows(self, batch, totals):
+        """
+        Drops rows with an invalid username and usernames that already exist
+        (in the database or earlier in the file), reporting each.
+        """
+        existing = set(
+            User.objects
+            .filter(username__in=[username for _, username, _, _ in batch])
+            .values_list("username", flat=True)
+        )
+
+        username_field = User._meta.get_field("username")
+        rows = []
+        for row in batch:
+            line, username, _, _ = row
+            try:
+                username_field.run_validators(username)
+                invalid = not username
+            except ValidationError:
+                invalid = True
+
+            if invalid:
+                reason = f"invalid username {username!r}"
+            elif username in existing:
+                reason = f"username {username!r} already exists"
+            else:
+                existing.add(username)
+                rows.append(row)
+                continue
+
+            totals["skipped"] += 1
+            self.stderr.write(f"Line {line}: skipped, {reason}")
+        return rows
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+# -------------------------------------------------------------
+# Functional indexes for case-insensitive logins
+# (must match the Lower() lookups in accounts/auth_backend.py)
+# auth_user belongs to django.contrib.auth, so the indexes are
+# created with SQL rather than declared on the model.
+# -------------------------------------------------------------
+INDEXES = {
+    "auth_user_lower_username_idx": "LOWER(username)",
+    "auth_user_lower_email_idx": "LOWER(email)",
+}
+
+
+def create_indexes(apps, schema_editor):
+    # CONCURRENTLY on PostgreSQL so a large auth_user table stays
+    # writable while the index builds (needs a non-atomic migration)
+    concurrently = "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    for name, expression in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON auth_user ({expression});"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name};")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
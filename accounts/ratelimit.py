@@ -0,0 +1,175 @@
+"""
+Token-bucket rate limiting for the account views.
+
+Each limited view has one bucket per client IP and, optionally, one
+per submitted identifier (username / email), so a credential-stuffing
+burst is cut off whether it comes from one address or targets one
+account from many.
+
+- "identifier" buckets are charged on every POST (e.g. each password
+  reset request sends an email)
+- "failures" buckets are only checked before the view; the view
+  charges them for failed attempts (record_failure()), so that
+  anyone's wrong passwords cannot spend the real user's logins
+
+- Buckets live in the "default" cache, so they are shared between
+  workers when REDIS_URL is set (per process with LocMem)
+- Only POSTs are limited, and the check runs before the view, i.e.
+  before any form validation, DB lookup or password hashing
+- Rejected requests get HTTP 429 with a Retry-After header
+- Allowed / rejected counts are kept per process (get_stats())
+
+Rates are configured in settings.RATELIMIT_RATES as "<count>/<period>"
+where period is s, m, h or d: a bucket holds `count` tokens and refills
+at `count` per period.
+
+The read-modify-write on the cache is not atomic, so concurrent
+requests can occasionally be let through a few tokens early; the
+limiter bounds abuse, it is not an exact quota.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """
+    "5/m" → (5, 60): capacity and the seconds it takes to refill.
+    """
+    count, period = rate.split("/")
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    """
+    The client address. Behind RATELIMIT_TRUSTED_PROXIES proxies
+    (e.g. 1 for Heroku's router) it is taken from X-Forwarded-For,
+    counting from the right so a client cannot spoof it.
+    """
+    proxies = settings.RATELIMIT_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [
+            part.strip()
+            for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if part.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _bucket_key(scope, kind, value):
+    digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+    return f"ratelimit:{scope}:{kind}:{digest}"
+
+
+def take_token(key, rate, now=None, consume=True):
+    """
+    Takes one token from the bucket at `key` (only checks for one
+    when `consume` is False).
+    Returns 0 if allowed, else the seconds until a token is available.
+    """
+    capacity, period = parse_rate(rate)
+    now = time.time() if now is None else now
+
+    tokens, updated = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+
+    if tokens < 1:
+        return (1 - tokens) * period / capacity
+    if not consume:
+        return 0
+
+    # An idle bucket is full again after one period, so it can expire
+    cache.set(key, (tokens - 1, now), timeout=math.ceil(period))
+    return 0
+
+
+def _identifier(request, field):
+    return request.POST.get(field, "").strip().lower() if field else ""
+
+
+def check(request, scope, field=None):
+    """
+    Takes a token from every bucket that applies to this request, and
+    checks the "failures" bucket has one left.
+    Returns 0 if the request may proceed, else the Retry-After seconds.
+    """
+    rates = settings.RATELIMIT_RATES[scope]
+    identifier = _identifier(request, field)
+    # (rate, bucket kind, value, take a token)
+    buckets = [(rates.get("ip"), "ip", client_ip(request), True)]
+    if identifier:
+        buckets.append((rates.get("identifier"), field, identifier, True))
+        buckets.append((rates.get("failures"), "failures", identifier, False))
+
+    wait = 0
+    for rate, kind, value, consume in buckets:
+        if rate:
+            key = _bucket_key(scope, kind, value)
+            wait = max(wait, take_token(key, rate, consume=consume))
+
+    with _stats_lock:
+        _stats[f"{scope}_{'rejected' if wait else 'allowed'}"] += 1
+    return wait
+
+
+def record_failure(request, scope, field):
+    """
+    Charges the "failures" bucket of `scope` for the identifier in
+    the POST field `field`, after a failed attempt.
+    """
+    rate = settings.RATELIMIT_RATES[scope].get("failures")
+    identifier = _identifier(request, field)
+    if settings.RATELIMIT_ENABLED and rate and identifier:
+        take_token(_bucket_key(scope, "failures", identifier), rate)
+
+
+def ratelimit(scope, field=None):
+    """
+    View decorator: limits POSTs to the view with the buckets
+    configured for `scope`; `field` names the POST field holding the
+    identifier (username / email) to limit per account.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == "POST" and settings.RATELIMIT_ENABLED:
+                wait = check(request, scope, field)
+                if wait:
+                    response = render(
+                        request, "accounts/rate_limited.html",
+                        {"retry_after": math.ceil(wait)}, status=429,
+                    )
+                    response["Retry-After"] = str(math.ceil(wait))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_stats():
+    """
+    Returns this process's {"<scope>_allowed": n, "<scope>_rejected": n}.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
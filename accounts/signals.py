@@ -1,22 +1,112 @@
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import GroupProfile  # NEW
+from .models import GroupProfile
 
 User = get_user_model()
 
-# Auto-assign normal users to "Site Users"
+SITE_USERS_GROUP = "Site Users"
+
+
+# ----------------------------------------------------------
+# "Site Users" GROUP ID (cached per process)
+# ----------------------------------------------------------
+_site_users_group_id = None
+
+
+def site_users_group_id():
+    """
+    Returns the id of the "Site Users" group, creating the group (and
+    its profile) the first time. The id is kept for the life of the
+    process, so adding a new user to the group costs one INSERT.
+
+    The id is only remembered once the row is known to be committed,
+    so a rolled-back transaction cannot leave a dangling id behind.
+    Renaming or deleting the group through the ORM resets the cached
+    id in this process; other processes notice when their next insert
+    finds no group (see _add_membership).
+    """
+    if _site_users_group_id is not None:
+        return _site_users_group_id
+
+    group, _ = Group.objects.get_or_create(name=SITE_USERS_GROUP)
+    GroupProfile.objects.get_or_create(
+        group=group,
+        defaults={"description": "Normal website users"},
+    )
+    # Runs immediately outside a transaction, else after it commits
+    transaction.on_commit(lambda: _remember_site_users_group(group.id))
+    return group.id
+
+
+def _remember_site_users_group(group_id):
+    global _site_users_group_id
+    _site_users_group_id = group_id
+
+
+def clear_site_users_group_id():
+    _remember_site_users_group(None)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Group)
+def forget_site_users_group(sender, instance, **kwargs):
+    if instance.pk == _site_users_group_id or instance.name == SITE_USERS_GROUP:
+        clear_site_users_group_id()
+
+
+# ----------------------------------------------------------
+# AUTO-ASSIGN NEW USERS TO "Site Users" GROUP
+# ----------------------------------------------------------
+def _add_membership(user_id, group_id):
+    """
+    Adds the user to the group in one INSERT ... SELECT, which inserts
+    nothing if the group no longer exists. Returns False in that case.
+
+    Foreign keys are checked at commit, so a plain INSERT with a stale
+    group id would only fail once the whole signup is committed.
+    """
+    qn = connection.ops.quote_name
+    through = User.groups.through._meta
+    user_column = qn(through.get_field("user").column)
+    group_column = qn(through.get_field("group").column)
+    group_pk = qn(Group._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(through.db_table)} ({user_column}, {group_column}) "
+            f"SELECT %s, {group_pk} FROM {qn(Group._meta.db_table)} WHERE {group_pk} = %s",
+            [user_id, group_id],
+        )
+        return cursor.rowcount == 1
+
+
 @receiver(post_save, sender=User)
 def add_to_site_users_group(sender, instance, created, **kwargs):
-    if created and not instance.is_staff and not instance.is_superuser:
-        group, _ = Group.objects.get_or_create(name="Site Users")
-        instance.groups.add(group)
+    """
+    Automatically assigns every newly registered user
+    to the 'Site Users' group.
+    """
+    if not created:  # Only on first creation
+        return
+
+    # Insert the membership row directly: groups.add() would first
+    # SELECT the user's existing memberships, and a new user has none
+    if not _add_membership(instance.pk, site_users_group_id()):
+        # The cached group was deleted by another process
+        clear_site_users_group_id()
+        _add_membership(instance.pk, site_users_group_id())
 
 
 # Auto-create a GroupProfile whenever a new Group is created
 @receiver(post_save, sender=Group)
 def create_group_profile(sender, instance, created, **kwargs):
     if created:
-        GroupProfile.objects.create(group=instance)
+        GroupProfile.objects.create(
+            group=instance,
+            description=(
+                "Normal website users" if instance.name == SITE_USERS_GROUP else ""
+            ),
+        )
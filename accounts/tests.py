@@ -1,7 +1,22 @@
-from django.test import TestCase, Client
-from django.contrib.auth.models import User
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.contrib.auth import authenticate
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from accounts import ratelimit, signals
+from accounts.signals import SITE_USERS_GROUP, clear_site_users_group_id
+from accounts.auth_backend import EmailOrUsernameBackend
+from accounts.forms import EmailOrUsernameLoginForm
+from movies.models import CatalogMovie, Movie
+
 
 class AccountTests(TestCase):
     """
@@ -14,8 +29,10 @@ class AccountTests(TestCase):
         """
         Create a test client before each test.
         Each test runs in isolation with its own test database.
+        Rate-limit buckets live in the cache, so it is cleared too.
         """
         self.client = Client()
+        cache.clear()
 
     def test_signup_creates_user(self):
         """
@@ -48,3 +65,375 @@ class AccountTests(TestCase):
         # Login should redirect the user (HTTP 200, 302) to the next page
         self.assertIn(result.status_code, [200, 302])
 
+
+
+class LoginLookupTests(TestCase):
+    """
+    Tests for the one-query login path (accounts/auth_backend.py):
+    - Username or email is resolved case-insensitively in one query
+    - A username match wins over another account's email
+    - The login form reuses the resolved user (no second lookup)
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.backend = EmailOrUsernameBackend()
+        self.user = User.objects.create_user(
+            username="Ceri", email="ceri@example.com", password="abc12345"
+        )
+
+    def test_identifier_is_resolved_in_one_query(self):
+        for identifier in ("Ceri", "ceri", "CERI@Example.com"):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.backend.get_by_identifier(identifier), self.user)
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.backend.get_by_identifier("nobody"))
+
+    def test_username_match_wins_over_email(self):
+        other = User.objects.create_user(
+            username="ceri@example.org", email="x@example.com", password="abc12345"
+        )
+        User.objects.filter(pk=self.user.pk).update(email="ceri@example.org")
+
+        self.assertEqual(self.backend.get_by_identifier("ceri@example.org"), other)
+
+    def test_login_form_runs_one_lookup(self):
+        form = EmailOrUsernameLoginForm(
+            {"identifier": "CERI@example.com", "password": "abc12345"}
+        )
+
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.user, self.user)
+
+    def test_login_form_errors(self):
+        missing = EmailOrUsernameLoginForm({"identifier": "nobody", "password": "x"})
+        wrong = EmailOrUsernameLoginForm({"identifier": "ceri", "password": "wrong"})
+
+        self.assertIn("No account found", str(missing.errors))
+        self.assertIn("Incorrect password", str(wrong.errors))
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        inactive = EmailOrUsernameLoginForm({"identifier": "ceri", "password": "abc12345"})
+        self.assertFalse(inactive.is_valid())
+
+    def test_login_view_with_email(self):
+        response = self.client.post(reverse("login"), {
+            "identifier": "Ceri@Example.com",
+            "password": "abc12345",
+        })
+
+        self.assertRedirects(response, reverse("home"))
+        self.assertEqual(int(self.client.session["_auth_user_id"]), self.user.pk)
+
+    def test_authenticate_with_username_or_email(self):
+        self.assertEqual(authenticate(username="CERI", password="abc12345"), self.user)
+        self.assertIsNone(authenticate(username="ceri", password="wrong"))
+
+    def test_sessions_from_model_backend_stay_logged_in(self):
+        # Sessions created before EmailOrUsernameBackend store this path
+        self.client.force_login(self.user, backend="django.contrib.auth.backends.ModelBackend")
+
+        response = self.client.get(reverse("profile"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"], self.user)
+
+
+@override_settings(
+    RATELIMIT_ENABLED=True,
+    RATELIMIT_TRUSTED_PROXIES=0,
+    RATELIMIT_RATES={
+        "login": {"ip": "4/m", "failures": "2/m"},
+        "signup": {"ip": "2/m"},
+        "password_reset": {"ip": "5/m", "identifier": "1/h"},
+    },
+)
+class RateLimitTests(TestCase):
+    """
+    Tests for the account rate limiter (accounts/ratelimit.py):
+    - Attempts beyond the bucket get 429 + Retry-After, before any
+      user lookup or password hashing
+    - The per-identifier bucket applies across client IPs, and at
+      login only failed attempts are charged to it
+    - Buckets refill over time; GETs are never limited
+    - Allowed / rejected counters
+    """
+
+    def setUp(self):
+        cache.clear()
+        ratelimit.reset_stats()
+        User.objects.create_user(username="ceri", password="abc12345")
+
+    def login(self, identifier="ceri", ip="10.0.0.1"):
+        return self.client.post(
+            reverse("login"),
+            {"identifier": identifier, "password": "wrong"},
+            REMOTE_ADDR=ip,
+        )
+
+    def test_identifier_bucket_applies_across_ips(self):
+        self.assertEqual(self.login(ip="10.0.0.1").status_code, 200)
+        self.assertEqual(self.login(ip="10.0.0.2").status_code, 200)
+
+        response = self.login(identifier="CERI", ip="10.0.0.3")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+        # Another account from a fresh address is unaffected
+        self.assertEqual(self.login(identifier="someone", ip="10.0.0.4").status_code, 200)
+
+    def test_successful_logins_are_not_charged_to_the_identifier(self):
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+            response = self.client.post(
+                reverse("login"), {"identifier": "ceri", "password": "abc12345"}, REMOTE_ADDR=ip,
+            )
+            self.assertRedirects(response, reverse("home"))
+
+        # Only the failures empty the bucket
+        self.login(ip="10.0.0.4")
+        self.login(ip="10.0.0.5")
+        self.assertEqual(self.login(ip="10.0.0.6").status_code, 429)
+
+    @override_settings(RATELIMIT_RATES={"login": {"ip": "2/m", "failures": "3/m"}})
+    def test_one_client_cannot_lock_out_an_account(self):
+        self.login(ip="6.6.6.6")
+        self.login(ip="6.6.6.6")
+        self.assertEqual(self.login(ip="6.6.6.6").status_code, 429)
+
+        # The attacker's IP bucket ran out first: the owner can log in
+        response = self.client.post(
+            reverse("login"), {"identifier": "ceri", "password": "abc12345"}, REMOTE_ADDR="10.0.0.1",
+        )
+        self.assertRedirects(response, reverse("home"))
+
+    def test_ip_bucket_applies_across_identifiers(self):
+        for n in range(4):
+            self.assertEqual(self.login(identifier=f"user{n}").status_code, 200)
+        self.assertEqual(self.login(identifier="user9").status_code, 429)
+
+    def test_rejected_attempt_skips_lookup_and_hashing(self):
+        self.login()
+        self.login()
+
+        # No user query at all: the form (and its password check) never runs
+        with self.assertNumQueries(0):
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, "accounts/rate_limited.html")
+
+    def test_get_is_not_limited(self):
+        for _ in range(10):
+            self.assertEqual(
+                self.client.get(reverse("login"), REMOTE_ADDR="10.0.0.1").status_code, 200
+            )
+        self.assertEqual(ratelimit.get_stats(), {})
+
+    def test_signup_and_password_reset_are_limited(self):
+        for _ in range(2):
+            self.client.post(reverse("signup"), {"username": ""})
+        self.assertEqual(self.client.post(reverse("signup"), {}).status_code, 429)
+
+        reset = reverse("password_reset")
+        self.assertEqual(
+            self.client.post(reset, {"email": "a@example.com"}).status_code, 302
+        )
+        self.assertEqual(
+            self.client.post(reset, {"email": "A@example.com"}).status_code, 429
+        )
+
+    def test_bucket_refills(self):
+        key = "ratelimit:test"
+        self.assertEqual(ratelimit.take_token(key, "2/m", now=1000), 0)
+        self.assertEqual(ratelimit.take_token(key, "2/m", now=1000), 0)
+        self.assertAlmostEqual(ratelimit.take_token(key, "2/m", now=1000), 30)
+        self.assertAlmostEqual(ratelimit.take_token(key, "2/m", now=1020), 10)
+        self.assertEqual(ratelimit.take_token(key, "2/m", now=1030), 0)
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=1)
+    def test_client_ip_behind_proxy(self):
+        request = RequestFactory().get(
+            "/", HTTP_X_FORWARDED_FOR="6.6.6.6, 1.2.3.4", REMOTE_ADDR="10.1.1.1"
+        )
+        self.assertEqual(ratelimit.client_ip(request), "1.2.3.4")
+
+    def test_stats(self):
+        self.login()
+        self.login()
+        self.login()
+
+        self.assertEqual(
+            ratelimit.get_stats(), {"login_allowed": 2, "login_rejected": 1}
+        )
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_can_be_disabled(self):
+        for _ in range(5):
+            self.assertEqual(self.login().status_code, 200)
+
+
+class SiteUsersGroupTests(TestCase):
+    """
+    Tests for the "Site Users" membership signal (accounts/signals.py):
+    - New users join the group, which is created with its profile
+    - Once the group id is cached, a signup costs one extra INSERT
+    - Deleting the group clears the cached id
+    - A group deleted by another process is re-created on the next
+      signup
+    """
+
+    def setUp(self):
+        clear_site_users_group_id()
+        self.addCleanup(clear_site_users_group_id)
+
+    def test_new_user_joins_site_users(self):
+        user = User.objects.create_user(username="ceri", password="abc12345")
+
+        group = Group.objects.get(name=SITE_USERS_GROUP)
+        self.assertEqual(list(user.groups.all()), [group])
+        self.assertEqual(group.profile.description, "Normal website users")
+
+    def test_cached_group_id_costs_one_insert(self):
+        # The id is only cached once the group is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username="first", password="abc12345")
+
+        # INSERT user + INSERT membership
+        with self.assertNumQueries(2):
+            user = User(username="second")
+            user.save()
+        self.assertTrue(user.groups.filter(name=SITE_USERS_GROUP).exists())
+
+    def test_deleting_the_group_clears_the_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username="first", password="abc12345")
+        Group.objects.filter(name=SITE_USERS_GROUP).delete()
+
+        user = User.objects.create_user(username="second", password="abc12345")
+        self.assertTrue(user.groups.filter(name=SITE_USERS_GROUP).exists())
+
+    def test_group_deleted_elsewhere_is_resolved_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username="first", password="abc12345")
+        stale_id = signals.site_users_group_id()
+        # Deleted by another process: this one still holds the old id
+        Group.objects.filter(name=SITE_USERS_GROUP).delete()
+        signals._remember_site_users_group(stale_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user(username="second", password="abc12345")
+
+        group = Group.objects.get(name=SITE_USERS_GROUP)
+        self.assertEqual(list(user.groups.all()), [group])
+        self.assertEqual(signals.site_users_group_id(), group.pk)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class BulkImportUsersTests(TestCase):
+    """
+    Tests for the bulk_import_users management command:
+    - Users are created with hashed passwords and group memberships
+    - Invalid, duplicate and existing usernames are skipped
+    - Queries per batch do not grow with the number of users
+    """
+
+    def setUp(self):
+        clear_site_users_group_id()
+        self.addCleanup(clear_site_users_group_id)
+        User.objects.create_user(username="existing", password="abc12345")
+
+    def import_csv(self, text, *args):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as csv_file:
+            csv_file.write(text)
+        self.addCleanup(os.unlink, path)
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            "bulk_import_users", path, "--workers", "1", *args,
+            stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_imports_users_into_site_users(self):
+        out, err = self.import_csv(
+            "username,email,password\n"
+            "alice,alice@example.com,pw-alice\n"
+            "bob,bob@example.com,\n"
+            "existing,x@example.com,pw\n"
+            "alice,again@example.com,pw\n"
+            "bad name!,bad@example.com,pw\n"
+        )
+
+        alice = User.objects.get(username="alice")
+        self.assertTrue(alice.check_password("pw-alice"))
+        self.assertEqual(alice.email, "alice@example.com")
+        self.assertFalse(User.objects.get(username="bob").has_usable_password())
+
+        members = Group.objects.get(name=SITE_USERS_GROUP).user_set
+        self.assertEqual(
+            set(members.values_list("username", flat=True)),
+            {"existing", "alice", "bob"},
+        )
+        self.assertIn("Created 2 users, skipped 3", out)
+        self.assertEqual(err.count("skipped"), 3)
+
+    def test_queries_per_batch_are_constant(self):
+        rows = "".join(f"user{n},user{n}@example.com,pw{n}\n" for n in range(50))
+
+        # Group + profile lookup, then per batch of 20: SELECT existing
+        # usernames, INSERT users, INSERT memberships (+ savepoint pair)
+        with self.assertNumQueries(2 + 3 * 5):
+            self.import_csv("username,email,password\n" + rows, "--batch-size", "20")
+
+        self.assertEqual(User.objects.filter(groups__name=SITE_USERS_GROUP).count(), 51)
+
+    def test_missing_columns(self):
+        with self.assertRaisesMessage(CommandError, "password"):
+            self.import_csv("username,email\nalice,a@example.com\n")
+
+
+class UserAdminChangelistTests(TestCase):
+    """
+    Tests for the user admin changelist:
+    - Shelf counts and groups come from the page query (no per-row
+      COUNT or groups query)
+    """
+
+    def setUp(self):
+        User.objects.create_superuser("boss", "boss@example.com", "pass12345")
+        self.client.login(username="boss", password="pass12345")
+
+    def add_users(self, count):
+        start = User.objects.count()
+        for n in range(count):
+            User.objects.create_user(username=f"viewer{start + n}")
+
+    def queries_for(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        url = reverse("admin:auth_user_changelist")
+        self.add_users(2)
+        few = self.queries_for(url)
+        self.add_users(20)
+
+        self.assertEqual(self.queries_for(url), few)
+
+    def test_movie_counts_and_groups(self):
+        viewer = User.objects.create_user(username="viewer")
+        catalog = CatalogMovie.objects.create(tmdb_id=1, title="Heat")
+        Movie.objects.create(user=viewer, catalog=catalog)
+
+        response = self.client.get(reverse("admin:auth_user_changelist"))
+        row = next(user for user in response.context["cl"].result_list if user == viewer)
+        self.assertEqual(row.movie_count, 1)
+        self.assertContains(response, SITE_USERS_GROUP)
+
+        groups = self.client.get(reverse("admin:auth_group_changelist"))
+        # boss + viewer
+        self.assertEqual(groups.context["cl"].result_list[0].members, 2)
@@ -8,6 +8,7 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
+from .ratelimit import ratelimit
 
 urlpatterns = [
 
@@ -54,8 +55,10 @@ urlpatterns = [
     # ---------------------------------------------------------
     path(
         "password-reset/",
-        auth_views.PasswordResetView.as_view(
-            template_name="accounts/password_reset.html"
+        ratelimit("password_reset", field="email")(
+            auth_views.PasswordResetView.as_view(
+                template_name="accounts/password_reset.html"
+            )
         ),
         name="password_reset",
     ),
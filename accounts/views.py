@@ -3,6 +3,7 @@ from django.contrib.auth import authenticate, login
 from django.shortcuts import render, redirect
 from django.contrib import messages
 
+from .ratelimit import ratelimit, record_failure
 from .forms import (
     SignUpForm,
     EmailOrUsernameLoginForm,
@@ -22,6 +23,7 @@ Includes:
 """
 
 
+@ratelimit("login", field="identifier")
 def login_view(request):
     """
     Handles login using the custom EmailOrUsernameLoginForm.
@@ -40,6 +42,8 @@ def login_view(request):
             return redirect("home")
 
         # If form is NOT valid, errors appear in form.non_field_errors()
+        # and the attempt counts against the identifier's failures bucket
+        record_failure(request, "login", "identifier")
 
     else:
         form = EmailOrUsernameLoginForm()
@@ -47,6 +51,7 @@ def login_view(request):
     return render(request, "accounts/login.html", {"form": form})
 
 
+@ratelimit("signup")
 def signup(request):
     """
     Standard signup flow using custom SignUpForm.
@@ -0,0 +1,13 @@
+# -------------------------------------------------------------
+# GUNICORN CONFIG
+# - Loaded automatically by gunicorn from the project root.
+# - post_worker_init runs once in every worker after Django has
+#   loaded, so per-worker in-memory indexes are warm before the
+#   first request arrives.
+# -------------------------------------------------------------
+
+
+def post_worker_init(worker):
+    from movies.autocomplete import warm_in_background
+
+    warm_in_background()
@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from quickflicks.pagination import EstimatedCountPaginator
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "key", "state", "attempts", "run_at", "locked_by", "finished_at")
+    list_filter = ("state", "name")
+    search_fields = ("=key",)
+    ordering = ("-id",)
+    readonly_fields = (
+        "name", "key", "payload", "attempts", "locked_by", "locked_until",
+        "last_error", "created_at", "finished_at",
+    )
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_now(self, request, queryset):
+        # Not running ones: their worker still holds them
+        retried = queryset.exclude(state="running").update(
+            state="queued", run_at=timezone.now(), attempts=0,
+            locked_by="", locked_until=None, finished_at=None,
+        )
+        self.message_user(request, f"{retried} jobs queued again.")
+
+    actions = [retry_now]
@@ -0,0 +1,13 @@
+# ---------------------------------------------------------------
+# JOBS APP CONFIG
+# - Database-backed background job queue (see jobs/queue.py).
+# - Jobs are run by `python manage.py run_worker` (Procfile
+#   "worker" process), never inside a web request.
+# ---------------------------------------------------------------
+
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
@@ -0,0 +1,38 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs background jobs (jobs/queue.py) until stopped. SIGTERM / "
+        "Ctrl+C stop claiming new jobs and wait for running ones. "
+        "--burst exits once no job is due."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int,
+                            help="Jobs run at once (default: JOBS_CONCURRENCY).")
+        parser.add_argument("--burst", action="store_true")
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=options["concurrency"])
+        # Heroku sends SIGTERM on restart and allows 30s before SIGKILL;
+        # anything not finished by then is taken over after its lock lapses
+        previous = {
+            signum: signal.signal(signum, worker.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+
+        self.stdout.write(f"Worker {worker.name}: {worker.concurrency} threads")
+        try:
+            counts = worker.run(burst=options["burst"])
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(
+            ", ".join(f"{count} {state}" for state, count in sorted(counts.items()))
+            or "No jobs run"
+        )
@@ -0,0 +1,240 @@
+"""
+A small database-backed job queue.
+
+Tasks are plain functions registered by name:
+
+    @task("movies.enrich_catalog")
+    def enrich_catalog(tmdb_id): ...
+
+    enqueue("movies.enrich_catalog", key=f"enrich:{tmdb_id}", tmdb_id=tmdb_id)
+
+and are run by `manage.py run_worker` (jobs/worker.py).
+
+Life cycle of a Job row:
+
+- queued   waiting for run_at
+- running  claimed by one worker with a conditional UPDATE (only one
+           UPDATE can match a given queued row), locked until
+           now + JOBS_VISIBILITY_TIMEOUT; the worker extends the lock
+           while the task runs, so if the worker dies the lock lapses
+           and another worker takes the job over
+- done     the task returned
+- failed   the task raised on its last attempt (or raised
+           PermanentFailure); earlier failures go back to "queued"
+           with exponential backoff
+
+Tasks must therefore be safe to run more than once.
+"""
+
+import logging
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentFailure(Exception):
+    """
+    Raised by a task when retrying cannot help (e.g. the film no
+    longer exists upstream); the job fails without further attempts.
+    """
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: object
+    max_attempts: int | None = None
+    # Run periodically (seconds between runs), see schedule_periodic()
+    every: int | None = None
+
+
+TASKS = {}
+
+
+def task(name, max_attempts=None, every=None):
+    """
+    Registers the decorated function as the task `name`.
+    Tasks are registered on import, so the modules defining them are
+    imported from their app's ready().
+    """
+    def decorator(func):
+        TASKS[name] = Task(name, func, max_attempts, every)
+        return func
+    return decorator
+
+
+# -------------------------------------------------------------
+# PRODUCER SIDE
+# -------------------------------------------------------------
+def enqueue(name, *, key="", run_at=None, **kwargs):
+    """
+    Queues task `name` with JSON-serialisable kwargs and returns the
+    Job, or None if a queued/running job with the same key exists.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name!r}")
+
+    job = Job(
+        name=name,
+        key=key,
+        payload=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=TASKS[name].max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if not key:
+        job.save()
+        return job
+
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None  # unique_active_job_key: already queued
+    return job
+
+
+def schedule_periodic(now=None):
+    """
+    Queues every periodic task that has not been queued within its
+    interval. Called by the workers about once a minute; the job key
+    keeps several workers from queuing the same run twice.
+    """
+    now = now or timezone.now()
+    for registered in TASKS.values():
+        if not registered.every:
+            continue
+        key = f"periodic:{registered.name}"
+        recent = Job.objects.filter(
+            key=key, created_at__gte=now - timedelta(seconds=registered.every)
+        )
+        if not recent.exists():
+            enqueue(registered.name, key=key)
+
+
+# -------------------------------------------------------------
+# WORKER SIDE
+# -------------------------------------------------------------
+def _ready(now):
+    return Q(state="queued", run_at__lte=now) | Q(
+        state="running", locked_until__lt=now, attempts__lt=F("max_attempts")
+    )
+
+
+def claim(worker, limit):
+    """
+    Claims up to `limit` due jobs for `worker` and returns them.
+    Each job is taken with its own conditional UPDATE, so two
+    workers can never claim the same job.
+    """
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(_ready(now))
+        .order_by("run_at")
+        .values_list("pk", flat=True)[: limit * 2]
+    )
+
+    claimed = []
+    for pk in candidates:
+        if len(claimed) == limit:
+            break
+        taken = Job.objects.filter(_ready(now), pk=pk).update(
+            state="running",
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT),
+            attempts=F("attempts") + 1,
+        )
+        if taken:
+            claimed.append(pk)
+
+    return list(Job.objects.filter(pk__in=claimed).order_by("run_at"))
+
+
+def extend_locks(worker, job_ids):
+    """
+    Pushes the lock of jobs `worker` is still running forward by a
+    full visibility timeout.
+    """
+    return Job.objects.filter(pk__in=job_ids, state="running", locked_by=worker).update(
+        locked_until=timezone.now() + timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT)
+    )
+
+
+def retry_delay(attempts):
+    """
+    Seconds before attempt `attempts + 1`: exponential from
+    JOBS_RETRY_BACKOFF, capped at JOBS_RETRY_MAX_WAIT, half of it
+    jittered so failed jobs do not retry in lock-step.
+    """
+    wait = min(settings.JOBS_RETRY_MAX_WAIT, settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1))
+    return wait / 2 + random.uniform(0, wait / 2)
+
+
+def run(job, worker):
+    """
+    Runs a claimed job and records the outcome. Returns the new state
+    ("done", "queued" for a retry, or "failed").
+    """
+    held = Job.objects.filter(pk=job.pk, state="running", locked_by=worker)
+    registered = TASKS.get(job.name)
+
+    try:
+        if registered is None:
+            raise PermanentFailure(f"Unknown task: {job.name!r}")
+        registered.func(**job.payload)
+
+    except Exception as exc:
+        retry = not isinstance(exc, PermanentFailure) and job.attempts < job.max_attempts
+        log_extra = {"job": job.pk, "task": job.name, "attempt": job.attempts}
+        error = f"{type(exc).__name__}: {exc}"
+
+        if retry:
+            delay = retry_delay(job.attempts)
+            logger.warning("Job failed, will retry", extra={**log_extra, "retry_in": round(delay)})
+            held.update(
+                state="queued",
+                run_at=timezone.now() + timedelta(seconds=delay),
+                locked_by="",
+                locked_until=None,
+                last_error=error,
+            )
+            return "queued"
+
+        logger.exception("Job failed", extra=log_extra)
+        held.update(
+            state="failed", finished_at=timezone.now(), locked_until=None, last_error=error
+        )
+        return "failed"
+
+    held.update(state="done", finished_at=timezone.now(), locked_until=None)
+    return "done"
+
+
+def maintenance(now=None):
+    """
+    Housekeeping run alongside schedule_periodic():
+    - jobs whose lock lapsed on their last attempt are failed
+      (otherwise a job that kills its worker would loop forever)
+    - finished jobs older than JOBS_KEEP_FINISHED_DAYS are deleted
+    """
+    now = now or timezone.now()
+    Job.objects.filter(
+        state="running", locked_until__lt=now, attempts__gte=F("max_attempts")
+    ).update(
+        state="failed",
+        finished_at=now,
+        last_error="Lock expired on the last attempt (worker stopped or timed out)",
+    )
+    Job.objects.filter(
+        state__in=["done", "failed"],
+        finished_at__lt=now - timedelta(days=settings.JOBS_KEEP_FINISHED_DAYS),
+    ).delete()
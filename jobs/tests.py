@@ -0,0 +1,223 @@
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+from jobs.worker import Worker, run_due
+
+
+calls = []
+
+
+@queue.task("tests.record")
+def record(value):
+    calls.append(value)
+
+
+@queue.task("tests.flaky", max_attempts=3)
+def flaky():
+    raise ConnectionError("upstream down")
+
+
+@queue.task("tests.permanent")
+def permanent():
+    raise queue.PermanentFailure("not coming back")
+
+
+@override_settings(JOBS_RETRY_BACKOFF=10, JOBS_RETRY_MAX_WAIT=60, JOBS_VISIBILITY_TIMEOUT=30)
+class QueueTests(TestCase):
+    """
+    Tests for the job queue (jobs/queue.py):
+    - Keyed jobs are de-duplicated while queued or running
+    - A job is claimed by one worker only, in run_at order
+    - Failures retry with backoff, then fail; PermanentFailure fails at once
+    - A job whose lock lapsed is taken over; on its last attempt it fails
+    - Periodic tasks are queued once per interval
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_keyed_jobs_are_deduplicated(self):
+        first = queue.enqueue("tests.record", key="k", value=1)
+        self.assertIsNotNone(first)
+        self.assertIsNone(queue.enqueue("tests.record", key="k", value=2))
+
+        run_due()
+        self.assertEqual(calls, [1])
+        # Finished jobs no longer block the key
+        self.assertIsNotNone(queue.enqueue("tests.record", key="k", value=3))
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(ValueError):
+            queue.enqueue("tests.nope")
+
+    def test_claim_is_exclusive_and_ordered(self):
+        now = timezone.now()
+        later = queue.enqueue("tests.record", value="later", run_at=now - timedelta(seconds=1))
+        sooner = queue.enqueue("tests.record", value="sooner", run_at=now - timedelta(seconds=5))
+        queue.enqueue("tests.record", value="future", run_at=now + timedelta(hours=1))
+
+        self.assertEqual(queue.claim("a", 1), [sooner])
+        self.assertEqual(queue.claim("b", 5), [later])
+        self.assertEqual(queue.claim("c", 5), [])
+
+        claimed = Job.objects.get(pk=sooner.pk)
+        self.assertEqual((claimed.state, claimed.locked_by, claimed.attempts), ("running", "a", 1))
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = queue.enqueue("tests.flaky")
+
+        for attempt in (1, 2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            self.assertEqual(run_due(), {"queued": 1})
+            job.refresh_from_db()
+            wait = (job.run_at - timezone.now()).total_seconds()
+            # Half fixed, half jittered: 10 * 2^(attempt - 1) at most
+            self.assertTrue(5 * 2 ** (attempt - 1) - 1 <= wait <= 10 * 2 ** (attempt - 1))
+            self.assertIn("ConnectionError: upstream down", job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs("jobs.queue", "ERROR"):
+            self.assertEqual(run_due(), {"failed": 1})
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), ("failed", 3))
+
+    def test_permanent_failure_is_not_retried(self):
+        queue.enqueue("tests.permanent")
+
+        with self.assertLogs("jobs.queue", "ERROR"):
+            self.assertEqual(run_due(), {"failed": 1})
+
+    def test_lapsed_lock_is_taken_over(self):
+        job = queue.enqueue("tests.record", value="again")
+        queue.claim("dead-worker", 1)
+        self.assertEqual(queue.claim("other", 1), [])  # still locked
+
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_due("other"), {"done": 1})
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.locked_by, job.attempts), ("done", "other", 2))
+
+        # The dead worker cannot overwrite the outcome
+        self.assertEqual(queue.extend_locks("dead-worker", [job.pk]), 0)
+
+    def test_lapsed_lock_on_last_attempt_fails(self):
+        job = queue.enqueue("tests.record", value="x")
+        Job.objects.filter(pk=job.pk).update(
+            state="running", attempts=job.max_attempts,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertEqual(queue.claim("w", 1), [])
+        queue.maintenance()
+        self.assertEqual(Job.objects.get(pk=job.pk).state, "failed")
+
+    def test_maintenance_deletes_old_finished_jobs(self):
+        job = queue.enqueue("tests.record", value=1)
+        run_due()
+        Job.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(days=30))
+
+        queue.maintenance()
+        self.assertFalse(Job.objects.exists())
+
+    def test_periodic_tasks_are_queued_once_per_interval(self):
+        with mock.patch.dict(queue.TASKS, {
+            "tests.tick": queue.Task("tests.tick", record, every=3600),
+        }):
+            queue.schedule_periodic()
+            queue.schedule_periodic()
+            self.assertEqual(Job.objects.filter(name="tests.tick").count(), 1)
+
+            Job.objects.filter(name="tests.tick").update(state="done")
+            queue.schedule_periodic()
+            self.assertEqual(Job.objects.filter(name="tests.tick").count(), 1)
+
+            queue.schedule_periodic(now=timezone.now() + timedelta(hours=2))
+            self.assertEqual(Job.objects.filter(name="tests.tick").count(), 2)
+
+
+class WorkerTests(TestCase):
+    """
+    Tests for the worker loop (jobs/worker.py):
+    - Claimed jobs run concurrently on the thread pool
+    - stop() lets running jobs finish and claims nothing new
+    - Database errors are logged and retried, not fatal
+    """
+
+    def setUp(self):
+        # Job threads use their own database connections, which cannot
+        # see this test's transaction, so the task itself is replaced
+        self.threads = set()
+        self.release = threading.Event()
+
+        def fake_run(job, name):
+            self.threads.add(threading.current_thread().name)
+            self.release.wait(5)
+            return "done"
+
+        patcher = mock.patch("jobs.worker.queue.run", side_effect=fake_run)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Keep periodic tasks (e.g. the catalog refresh) out of the counts
+        patcher = mock.patch("jobs.worker.queue.schedule_periodic")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_jobs_run_concurrently(self):
+        for n in range(4):
+            queue.enqueue("tests.record", value=n)
+
+        threading.Timer(0.3, self.release.set).start()
+        counts = Worker(concurrency=4, poll_interval=0.05, name="w").run(burst=True)
+
+        self.assertEqual(counts, {"done": 4})
+        self.assertEqual(len(self.threads), 4)
+
+    def test_stop_waits_for_running_jobs(self):
+        for n in range(3):
+            queue.enqueue("tests.record", value=n)
+        worker = Worker(concurrency=1, poll_interval=0.05, name="w")
+
+        def stop_then_release():
+            worker.stop()
+            time.sleep(0.1)
+            self.release.set()
+
+        threading.Timer(0.2, stop_then_release).start()
+        self.assertEqual(worker.run(), {"done": 1})
+        self.assertEqual(Job.objects.filter(state="queued").count(), 2)
+
+    def test_database_errors_do_not_stop_the_worker(self):
+        worker = Worker(concurrency=1, poll_interval=0.01, name="w")
+        claims = []
+
+        def flaky_claim(name, limit):
+            claims.append(name)
+            if len(claims) < 3:
+                raise OperationalError("server closed the connection unexpectedly")
+            worker.stop()
+            return []
+
+        with mock.patch("jobs.worker.queue.claim", side_effect=flaky_claim), \
+                self.assertLogs("jobs.worker", "ERROR") as logs:
+            self.assertEqual(worker.run(), {})
+
+        self.assertEqual(len(claims), 3)
+        self.assertEqual([record.retry_in for record in logs.records], [0.02, 0.04])
+
+    def test_command_burst(self):
+        self.release.set()
+        queue.enqueue("tests.record", value=1)
+
+        out = StringIO()
+        call_command("run_worker", "--burst", "--concurrency", "2", stdout=out)
+        self.assertIn("1 done", out.getvalue())
@@ -0,0 +1,144 @@
+"""
+The job worker behind `manage.py run_worker`.
+
+One polling loop claims due jobs and hands them to a thread pool of
+`concurrency` threads (TMDB calls spend their time waiting on the
+network, so threads are enough). While jobs run, the loop extends
+their locks; on stop() it claims nothing new and waits for the
+running jobs to finish.
+
+A database error in the loop (e.g. the database restarting) does not
+stop the worker: the loop reconnects and tries again, backing off up
+to DATABASE_RETRY_MAX_WAIT seconds, while running jobs carry on.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from . import queue
+
+
+logger = logging.getLogger(__name__)
+
+# How often schedule_periodic() / maintenance() run, per worker
+HOUSEKEEPING_SECONDS = 60
+
+# Longest pause between attempts while the database is unreachable
+DATABASE_RETRY_MAX_WAIT = 60
+
+
+def worker_name():
+    # "worker.1:12" on Heroku, "<hostname>:<pid>" elsewhere
+    return f"{os.environ.get('DYNO') or socket.gethostname()}:{os.getpid()}"
+
+
+def _run_job(job, name):
+    # Same connection handling as a web request
+    close_old_connections()
+    try:
+        return queue.run(job, name)
+    except Exception:
+        # Recording the outcome failed (e.g. the database went away);
+        # the job's lock lapses and another attempt picks it up
+        logger.exception("Job outcome not recorded", extra={"job": job.pk})
+        return "error"
+    finally:
+        close_old_connections()
+
+
+class Worker:
+
+    def __init__(self, concurrency=None, poll_interval=None, name=None):
+        self.concurrency = concurrency or settings.JOBS_CONCURRENCY
+        self.poll_interval = (
+            settings.JOBS_POLL_INTERVAL if poll_interval is None else poll_interval
+        )
+        self.name = name or worker_name()
+        self.stopping = threading.Event()
+
+    def stop(self, *args):
+        # Usable as a signal handler
+        self.stopping.set()
+
+    def run(self, burst=False):
+        """
+        Processes jobs until stop() is called, or with burst=True
+        until no job is due. Returns {state: count} for the jobs run.
+        """
+        counts = {}
+        running = {}  # future -> job id
+        housekeeping_at = 0.0
+        database_errors = 0
+        lock_refresh_at = time.monotonic()
+        # Refresh locks well before they could lapse
+        refresh_every = settings.JOBS_VISIBILITY_TIMEOUT / 3
+
+        logger.info("Worker started", extra={"worker": self.name, "concurrency": self.concurrency})
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job") as pool:
+            while True:
+                now = time.monotonic()
+                try:
+                    if now >= housekeeping_at:
+                        queue.schedule_periodic()
+                        queue.maintenance()
+                        housekeeping_at = now + HOUSEKEEPING_SECONDS
+
+                    if running and now >= lock_refresh_at:
+                        queue.extend_locks(self.name, list(running.values()))
+                        lock_refresh_at = now + refresh_every
+
+                    free = self.concurrency - len(running)
+                    if free and not self.stopping.is_set():
+                        for job in queue.claim(self.name, free):
+                            running[pool.submit(_run_job, job, self.name)] = job.pk
+                except DatabaseError:
+                    if burst:
+                        raise
+                    database_errors += 1
+                    delay = min(DATABASE_RETRY_MAX_WAIT, self.poll_interval * 2 ** database_errors)
+                    logger.exception(
+                        "Worker database error",
+                        extra={"worker": self.name, "retry_in": delay},
+                    )
+                    # Drops the broken connection; the next query reconnects
+                    close_old_connections()
+                    if self.stopping.wait(delay) and not running:
+                        break
+                    continue
+                database_errors = 0
+
+                if not running:
+                    if self.stopping.is_set() or burst:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+
+                finished, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+                    state = future.result()
+                    counts[state] = counts.get(state, 0) + 1
+
+        logger.info("Worker stopped", extra={"worker": self.name, **counts})
+        return counts
+
+
+def run_due(name="inline"):
+    """
+    Runs due jobs one at a time in the calling thread until none is
+    due, and returns {state: count}. For tests and the shell, where
+    the jobs must see the caller's transaction.
+    """
+    counts = {}
+    while claimed := queue.claim(name, 1):
+        state = queue.run(claimed[0], name)
+        counts[state] = counts.get(state, 0) + 1
+    return counts
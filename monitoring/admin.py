@@ -0,0 +1,64 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from quickflicks.pagination import EstimatedCountPaginator
+from .models import RequestProfile
+from .profiling import summary
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at", "method", "path", "view_name", "status_code", "duration_ms",
+        "sql_queries", "mode", "trigger", "download_link",
+    )
+    list_filter = ("mode", "trigger", "view_name")
+    search_fields = ("path",)
+    ordering = ("-id",)
+    list_select_related = ("user",)
+    exclude = ("data",)
+    readonly_fields = (
+        "created_at", "method", "path", "view_name", "user", "status_code",
+        "duration_ms", "sql_queries", "sql_ms", "mode", "trigger",
+        "download_link", "profile_summary",
+    )
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_queryset(self, request):
+        # `exclude` only hides the field on the form: without defer()
+        # the changelist would load every row's compressed profile
+        return super().get_queryset(request).defer("data")
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="monitoring_requestprofile_download",
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(profile.content(), content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="{profile.filename}"'
+        return response
+
+    @admin.display(description="Download")
+    def download_link(self, obj):
+        url = reverse("admin:monitoring_requestprofile_download", args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.filename)
+
+    @admin.display(description="Summary")
+    def profile_summary(self, obj):
+        return format_html("<pre>{}</pre>", summary(obj))
@@ -0,0 +1,30 @@
+# ---------------------------------------------------------------
+# MONITORING APP CONFIG
+# - Per-request timings (total, SQL, TMDB, template rendering) as
+#   Server-Timing headers and log lines (monitoring/middleware.py),
+#   aggregated per URL name for the staff-only /metrics endpoint.
+# - Opt-in request profiles, browsable in the admin
+#   (monitoring/profiling.py).
+# - 'ready()' times every SQL query on every database connection,
+#   starts the logging listener thread (monitoring/logs.py) and
+#   loads monitoring.tasks (profile clean-up job).
+# ---------------------------------------------------------------
+
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from .timing import install_sql_timer
+
+        connection_created.connect(install_sql_timer)
+
+        from .logs import start_listeners
+
+        start_listeners()
+
+        import monitoring.tasks
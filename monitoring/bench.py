@@ -0,0 +1,13 @@
+"""
+Helpers shared by the benchmark management commands
+(manage.py bench_search, manage.py bench_login).
+"""
+
+
+def percentile(samples, pct):
+    """
+    Returns the sample at the given percentile (nearest rank).
+    """
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
@@ -0,0 +1,174 @@
+"""
+Logging pipeline pieces used by settings.LOGGING.
+
+- BackgroundQueueHandler: the only handler on the root logger. The
+  calling thread just merges the message and puts the record on a
+  bounded queue; a QueueListener thread (started from
+  MonitoringConfig.ready()) formats and writes it. When the queue is
+  full the record is dropped and counted rather than blocking the
+  request.
+- JSONFormatter / KeyValueFormatter: one JSON object per line, or
+  readable text for the console; both include the structured fields
+  passed with `extra=`.
+- SamplingFilter: lets through at most `per_second` records per
+  second from a high-volume logger (bursts of up to `burst`);
+  warnings and errors always pass. The next record let through
+  carries `sampled_out`, the number dropped before it.
+
+Nothing here imports Django models: it is loaded while settings are
+being configured.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Attributes every LogRecord has; anything else came from `extra=`
+RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message", "asctime",
+}
+
+
+def extra_fields(record):
+    return {
+        key: value for key, value in record.__dict__.items()
+        if key not in RECORD_ATTRIBUTES and not key.startswith("_")
+    }
+
+
+# -------------------------------------------------------------
+# QUEUE HANDLER
+# -------------------------------------------------------------
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def prepare(self, record):
+        # Only the cheap part on the calling thread: merge args into
+        # the message and render any traceback (it cannot cross the
+        # queue), leaving formatting to the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def start_listener(self):
+        """
+        Starts the listener thread (once) and stops it, flushing the
+        queue, at exit.
+        """
+        with self._lock:
+            if self._listening or self.listener is None:
+                return
+            self._listening = True
+        self.listener.start()
+        atexit.register(self.stop_listener)
+
+    def stop_listener(self):
+        """
+        Writes out what is still queued and stops the listener thread.
+        """
+        with self._lock:
+            if not self._listening:
+                return
+            self._listening = False
+        self.listener.stop()
+
+
+def start_listeners():
+    """
+    Starts the listener of every BackgroundQueueHandler configured by
+    settings.LOGGING.
+    """
+    for handler in logging.root.handlers:
+        if isinstance(handler, BackgroundQueueHandler):
+            handler.start_listener()
+
+
+# -------------------------------------------------------------
+# FORMATTERS
+# -------------------------------------------------------------
+class JSONFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **extra_fields(record),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+
+    def __init__(self):
+        super().__init__("{levelname} {name}: {message}", style="{")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = extra_fields(record)
+        if not fields:
+            return line
+        first, newline, rest = line.partition("\n")
+        pairs = " ".join(f"{key}={value}" for key, value in fields.items())
+        return f"{first} [{pairs}]{newline}{rest}"
+
+
+# -------------------------------------------------------------
+# SAMPLING
+# -------------------------------------------------------------
+class SamplingFilter(logging.Filter):
+
+    def __init__(self, per_second, burst=None):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst or per_second
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.sampled_out = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+            self.updated = now
+            if self.tokens < 1:
+                self.sampled_out += 1
+                return False
+            self.tokens -= 1
+            if self.sampled_out:
+                record.sampled_out, self.sampled_out = self.sampled_out, 0
+        return True
@@ -0,0 +1,140 @@
+"""
+Request metrics, aggregated per URL name and exposed in the
+Prometheus text format at /metrics (see monitoring/views.py).
+
+Like the search cache and rate limiter stats, the numbers are kept
+per process. Every series carries a `process` label, so the workers
+behind one scrape target never overwrite each other's counters; a
+scrape is answered by whichever worker takes the request, so
+aggregate with e.g. sum by (view) (rate(...[5m])).
+"""
+
+import os
+import socket
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+
+PREFIX = "quickflicks"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name -> (help, buckets, request timings category, value)
+HISTOGRAMS = {
+    "request_seconds": ("Time to handle the request.", SECONDS_BUCKETS, None, "seconds"),
+    "sql_seconds": ("Time spent in SQL queries, per request.", SECONDS_BUCKETS, "db", "seconds"),
+    "sql_queries": ("SQL queries run, per request.", QUERY_BUCKETS, "db", "counts"),
+    "tmdb_seconds": ("Time spent calling TMDB, per request.", SECONDS_BUCKETS, "tmdb", "seconds"),
+    "render_seconds": ("Time spent rendering templates, per request.", SECONDS_BUCKETS, "render", "seconds"),
+}
+
+PROCESS = f"{os.environ.get('DYNO') or socket.gethostname()}:{os.getpid()}"
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket, plus +Inf; made cumulative on output
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_histograms = {}     # (name, view) -> Histogram
+_requests = Counter()  # (view, status) -> requests
+
+
+def observe_request(view, status, total, timings):
+    """
+    Adds one finished request to the metrics of its URL name.
+    """
+    with _lock:
+        for name, (_, buckets, category, attribute) in HISTOGRAMS.items():
+            if category is None:
+                value = total
+            else:
+                value = getattr(timings, attribute).get(category, 0)
+            histogram = _histograms.get((name, view))
+            if histogram is None:
+                histogram = _histograms[(name, view)] = Histogram(buckets)
+            histogram.observe(value)
+        _requests[(view, status)] += 1
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _requests.clear()
+
+
+# -------------------------------------------------------------
+# TEXT FORMAT
+# -------------------------------------------------------------
+def _labels(**labels):
+    labels = {"process": PROCESS, **labels}
+    escaped = (
+        (key, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def family(name, kind, help_text, samples):
+    """
+    Lines for one metric family: `samples` are (labels dict, value),
+    or (suffix, labels dict, value) for histogram parts.
+    """
+    lines = [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} {kind}"]
+    for sample in samples:
+        suffix, labels, value = sample if len(sample) == 3 else ("", *sample)
+        lines.append(f"{PREFIX}_{name}{suffix}{_labels(**labels)} {_number(value)}")
+    return lines
+
+
+def render(*extra_families):
+    """
+    The request metrics followed by `extra_families` (lists of lines
+    from family()), in the Prometheus text exposition format.
+    """
+    with _lock:
+        histograms = {
+            key: (list(histogram.counts), histogram.sum, histogram.count)
+            for key, histogram in _histograms.items()
+        }
+        requests = dict(_requests)
+
+    lines = family(
+        "requests_total", "counter", "Requests handled, by URL name and status.",
+        [({"view": view, "status": status}, count)
+         for (view, status), count in sorted(requests.items())],
+    )
+
+    for name, (help_text, buckets, _, _) in HISTOGRAMS.items():
+        samples = []
+        for (metric, view), (counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip((*buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", {"view": view, "le": bound}, cumulative))
+            samples.append(("_sum", {"view": view}, total))
+            samples.append(("_count", {"view": view}, count))
+        lines += family(name, "histogram", help_text, samples)
+
+    for extra in extra_families:
+        lines += extra
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,108 @@
+"""
+Request timing middleware: measures each request's total time and
+the time spent in SQL, TMDB calls and template rendering (see
+monitoring/timing.py), then
+
+- adds a Server-Timing header (shown in the browser's dev tools) for
+  staff users, or for everyone with SERVER_TIMING_PUBLIC
+- logs one "Request" line with the numbers as structured fields
+- adds the request to the per-URL-name metrics (/metrics)
+
+Placed after WhiteNoise, so static files are not measured. Sync and
+async capable, so under ASGI the async search view is not forced
+onto the sync thread.
+"""
+
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject, empty
+
+from . import metrics, timing
+
+
+logger = logging.getLogger(__name__)
+
+# Request timings category -> what its Server-Timing entry counts
+SERVER_TIMING = {"db": "queries", "tmdb": "calls", "render": None}
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unresolved>"
+
+
+def server_timing(total, timings):
+    entries = [f"total;dur={total * 1000:.1f}"]
+    for category, unit in SERVER_TIMING.items():
+        if category not in timings.counts:
+            continue
+        entry = f"{category};dur={timings.seconds[category] * 1000:.1f}"
+        if unit:
+            entry += f';desc="{timings.counts[category]} {unit}"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+def _show_server_timing(request):
+    if settings.SERVER_TIMING_PUBLIC:
+        return True
+    user = getattr(request, "user", None)
+    # Only a user the request already loaded: looking one up here
+    # would add session and user queries to views that never needed
+    # them (e.g. the poster proxy)
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return False
+    return user.is_staff
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = timings.elapsed()
+
+        view = view_name(request)
+        metrics.observe_request(view, response.status_code, total, timings)
+
+        if _show_server_timing(request):
+            response["Server-Timing"] = server_timing(total, timings)
+
+        logger.info("Request", extra={
+            "view": view,
+            "method": request.method,
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 1),
+            "db_ms": round(timings.seconds.get("db", 0) * 1000, 1),
+            "db_queries": timings.counts.get("db", 0),
+            "tmdb_ms": round(timings.seconds.get("tmdb", 0) * 1000, 1),
+            "tmdb_calls": timings.counts.get("tmdb", 0),
+            "render_ms": round(timings.seconds.get("render", 0) * 1000, 1),
+        })
+        return response
@@ -0,0 +1,52 @@
+import gzip
+
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    A profile of one request (see monitoring/profiling.py): pstats
+    data for "cprofile", collapsed stacks (flame graph input) for
+    "sampling", stored gzipped.
+    """
+
+    MODE_CHOICES = [
+        ("cprofile", "cProfile"),
+        ("sampling", "Stack sampling"),
+    ]
+    TRIGGER_CHOICES = [
+        ("staff", "Requested by staff"),
+        ("sampled", "Random sample"),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    sql_queries = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0)
+
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    data = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="profile_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+    def content(self):
+        return gzip.decompress(bytes(self.data))
+
+    @property
+    def filename(self):
+        return f"profile-{self.pk}.{'prof' if self.mode == 'cprofile' else 'collapsed.txt'}"
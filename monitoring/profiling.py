@@ -0,0 +1,217 @@
+"""
+Opt-in request profiling, stored as RequestProfile rows (browsable
+and downloadable in the admin).
+
+- Staff users profile one request by adding ?profile=1 (or sending
+  "X-Profile: 1"): the view runs under cProfile, and the response
+  carries X-Profile-Id. ?profile=sampling uses the stack sampler
+  instead.
+- PROFILE_SAMPLE_RATE of all requests (0 by default) are profiled by
+  the stack sampler, for continuous low-overhead profiling in
+  production: a background thread records the request thread's stack
+  every PROFILE_SAMPLING_INTERVAL seconds, which costs little more
+  than the sampling itself, where cProfile slows every call.
+
+Only the request's own thread is profiled: for the async search view
+under WSGI that is mostly the wait for the event loop. Under ASGI the
+event loop thread is profiled while the view is awaited, so other
+requests' coroutines running meanwhile show up too.
+"""
+
+import cProfile
+import gzip
+import io
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from . import timing
+from .middleware import view_name
+from .models import RequestProfile
+
+
+PATH_MAX_LENGTH = RequestProfile._meta.get_field("path").max_length
+
+
+class StackSampler:
+    """
+    Records the stack of one thread every `interval` seconds, as
+    collapsed stacks ("outer;inner;innermost count" lines).
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                module = frame.f_globals.get("__name__", "?")
+                stack.append(f"{module}:{frame.f_code.co_qualname}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _Stats:
+    # pstats.Stats() loads anything with create_stats() and .stats
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def summary(profile, limit=30):
+    """
+    Human-readable top of a stored profile: functions by cumulative
+    time (cProfile) or the most frequent stacks (sampling).
+    """
+    content = profile.content()
+    if profile.mode == "sampling":
+        lines = content.decode().splitlines()
+        total = sum(int(line.rsplit(" ", 1)[1]) for line in lines) or 1
+        return "\n".join(
+            f"{int(count) / total:6.1%}  {stack.replace(';', ' > ')}"
+            for stack, count in (line.rsplit(" ", 1) for line in lines[:limit])
+        )
+
+    out = io.StringIO()
+    stats = pstats.Stats(_Stats(marshal.loads(content)), stream=out)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _asked(request):
+    return request.GET.get("profile") or request.headers.get("X-Profile")
+
+
+def _requested_mode(asked, user):
+    # The user is only looked up when a profile is asked for
+    if asked and user.is_staff:
+        return ("sampling" if asked == "sampling" else "cprofile"), "staff"
+    if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sampling", "sampled"
+    return None, None
+
+
+class ProfiledRun:
+    """
+    Profiles the code run inside `with` (cProfile or the stack
+    sampler), and saves the result as a RequestProfile.
+    """
+
+    def __init__(self, mode, trigger):
+        self.mode = mode
+        self.trigger = trigger
+
+    def __enter__(self):
+        # The SQL figures come from RequestTimingMiddleware's timings
+        self.timings = timing.current()
+        self._token = None
+        if self.timings is None:
+            self.timings, self._token = timing.start()
+
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another request on this thread (ASGI) is already
+                # under cProfile, and only one profiler can be active
+                self.mode = "sampling"
+        if self.mode == "sampling":
+            self._sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLING_INTERVAL)
+            self._sampler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self._started
+        if self.mode == "cprofile":
+            self._profiler.disable()
+            self._profiler.create_stats()
+            self.data = marshal.dumps(self._profiler.stats)
+        else:
+            self._sampler.stop()
+            self.data = self._sampler.collapsed().encode()
+        if self._token is not None:
+            timing.stop(self._token)
+
+    def save(self, request, user, response):
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:PATH_MAX_LENGTH],
+            view_name=view_name(request),
+            user=user if user.is_authenticated else None,
+            status_code=response.status_code,
+            duration_ms=round(self.duration * 1000, 1),
+            sql_queries=self.timings.counts.get("db", 0),
+            sql_ms=round(self.timings.seconds.get("db", 0) * 1000, 1),
+            mode=self.mode,
+            trigger=self.trigger,
+            data=gzip.compress(self.data),
+        )
+        if self.trigger == "staff":
+            response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Placed after AuthenticationMiddleware (the staff check needs
+    request.user). Sync and async capable: under ASGI only the
+    awaited view is profiled, without adapting the chain to sync.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        mode, trigger = _requested_mode(_asked(request), request.user)
+        if mode is None:
+            return self.get_response(request)
+
+        with ProfiledRun(mode, trigger) as run:
+            response = self.get_response(request)
+        return run.save(request, request.user, response)
+
+    async def __acall__(self, request):
+        asked = _asked(request)
+        user = await request.auser() if asked else None
+        mode, trigger = _requested_mode(asked, user)
+        if mode is None:
+            return await self.get_response(request)
+
+        with ProfiledRun(mode, trigger) as run:
+            response = await self.get_response(request)
+        return await sync_to_async(run.save)(request, user or await request.auser(), response)
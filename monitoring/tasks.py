@@ -0,0 +1,22 @@
+"""
+Background tasks for the monitoring app (run by the job worker, see
+jobs/queue.py). Imported from MonitoringConfig.ready().
+
+- monitoring.purge_profiles: hourly, deletes request profiles older
+  than PROFILE_KEEP_DAYS
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.queue import task
+
+from .models import RequestProfile
+
+
+@task("monitoring.purge_profiles", every=60 * 60)
+def purge_profiles():
+    cutoff = timezone.now() - timedelta(days=settings.PROFILE_KEEP_DAYS)
+    RequestProfile.objects.filter(created_at__lt=cutoff).delete()
@@ -0,0 +1,41 @@
+"""
+The Django template backend, timing each render for the request
+timings ("render", see monitoring/timing.py). Set as the TEMPLATES
+BACKEND.
+"""
+
+import contextvars
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .timing import record
+
+
+# Set while a template renders: a template rendered from inside
+# another (e.g. by render_to_string in a tag) is not counted twice
+_rendering = contextvars.ContextVar("template_rendering", default=False)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        if _rendering.get():
+            return super().render(context, request)
+
+        token = _rendering.set(True)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            _rendering.reset(token)
+            record("render", time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,336 @@
+import json
+import logging
+import logging.handlers
+import marshal
+import queue
+import sys
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from monitoring import metrics
+from monitoring.logs import BackgroundQueueHandler, JSONFormatter, SamplingFilter
+from monitoring.middleware import RequestTimingMiddleware, server_timing
+from monitoring.models import RequestProfile
+from monitoring.profiling import StackSampler
+from monitoring.tasks import purge_profiles
+from monitoring.timing import RequestTimings
+
+
+class RequestTimingTests(TestCase):
+    """
+    Tests for the request timing middleware (monitoring/middleware.py):
+    - Staff users get a Server-Timing header, others do not (and
+      no user is looked up just for the header)
+    - SQL queries, TMDB calls (also from worker threads) and template
+      rendering are measured
+    - Each request is logged with its numbers
+    - Async requests are timed without being made sync
+    """
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_server_timing_for_staff_only(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("about")))
+
+        User.objects.create_user("boss", password="pass12345", is_staff=True)
+        self.client.login(username="boss", password="pass12345")
+        header = self.client.get(reverse("about"))["Server-Timing"]
+
+        self.assertRegex(header, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries", render;dur=[\d.]+$')
+
+    def test_no_queries_added_to_views_that_skip_the_user(self):
+        User.objects.create_user("boss", password="pass12345", is_staff=True)
+        self.client.login(username="boss", password="pass12345")
+
+        # The autocomplete view never loads the user (or the session)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("autocomplete"), {"q": "x"})
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(
+        SERVER_TIMING_PUBLIC=True, TMDB_API_KEY="test-key", TMDB_SEARCH_PAGES=2,
+        MOVIE_SEARCH_MODE="tmdb",
+    )
+    def test_tmdb_calls_from_worker_threads_are_counted(self):
+        caches[settings.TMDB_SEARCH_CACHE_ALIAS].clear()
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=200, headers={})
+        session.get.return_value.json.return_value = {"results": [], "total_pages": 2}
+
+        with mock.patch("movies.tmdb.get_session", return_value=session):
+            response = self.client.get(reverse("home"), {"query": "dune"})
+
+        self.assertIn('tmdb;dur=', response["Server-Timing"])
+        self.assertIn('desc="2 calls"', response["Server-Timing"])
+
+    def test_request_is_logged(self):
+        with self.assertLogs("monitoring.middleware", "INFO") as logs:
+            self.client.get(reverse("about"))
+
+        record = logs.records[0]
+        self.assertEqual((record.view, record.status, record.db_queries), ("about", 200, 0))
+        self.assertGreater(record.render_ms, 0)
+
+    async def test_async_requests_stay_async(self):
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(RequestTimingMiddleware(view)))
+
+        with self.assertLogs("monitoring.middleware", "INFO") as logs:
+            response = await self.async_client.get(reverse("about"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((logs.records[0].view, logs.records[0].status), ("about", 200))
+
+    def test_server_timing_format(self):
+        timings = RequestTimings()
+        timings.add("db", 0.004)
+        timings.add("db", 0.001)
+        self.assertEqual(
+            server_timing(0.0123, timings), 'total;dur=12.3, db;dur=5.0;desc="2 queries"'
+        )
+
+
+class MetricsEndpointTests(TestCase):
+    """
+    Tests for /metrics (monitoring/views.py):
+    - Staff users and the configured bearer token only
+    - Per-URL-name histograms in the Prometheus text format, plus
+      search cache, rate limiter and queue figures
+    """
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+        User.objects.create_user("viewer", password="pass12345")
+        self.client.login(username="viewer", password="pass12345")
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_bearer_token(self):
+        wrong = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer nope")
+        self.assertEqual(wrong.status_code, 403)
+        self.assertEqual(
+            self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200
+        )
+
+    def test_histograms_per_url_name(self):
+        User.objects.create_user("boss", password="pass12345", is_staff=True)
+        self.client.login(username="boss", password="pass12345")
+        self.client.get(reverse("about"))
+        self.client.get(reverse("about"))
+
+        body = self.client.get("/metrics").content.decode()
+
+        self.assertIn("# TYPE quickflicks_request_seconds histogram", body)
+        self.assertRegex(body, r'quickflicks_requests_total\{process="[^"]+",view="about",status="200"\} 2\n')
+        self.assertRegex(body, r'quickflicks_sql_queries_bucket\{process="[^"]+",view="about",le="2"\} 2\n')
+        self.assertRegex(body, r'quickflicks_render_seconds_count\{process="[^"]+",view="about"\} 2\n')
+        self.assertRegex(body, r'quickflicks_request_seconds_bucket\{process="[^"]+",view="about",le="\+Inf"\} 2\n')
+        self.assertIn("# TYPE quickflicks_search_cache_total counter", body)
+        self.assertIn("# TYPE quickflicks_jobs gauge", body)
+
+
+class ProfilerTests(TestCase):
+    """
+    Tests for request profiles (monitoring/profiling.py):
+    - Staff can profile a request with cProfile; others cannot
+    - PROFILE_SAMPLE_RATE profiles requests with the stack sampler
+    - Async requests are profiled without adapting the chain to sync
+    - Profiles can be downloaded from the admin, and are purged
+    """
+
+    def setUp(self):
+        self.boss = User.objects.create_superuser("boss", "boss@example.com", "pass12345")
+
+    def test_staff_profile_a_request(self):
+        self.client.login(username="boss", password="pass12345")
+
+        response = self.client.get(reverse("my_shelf"), {"profile": "1"})
+
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual((profile.mode, profile.trigger), ("cprofile", "staff"))
+        self.assertEqual((profile.view_name, profile.user, profile.status_code), ("my_shelf", self.boss, 200))
+        self.assertGreater(profile.sql_queries, 0)
+        functions = {function for _, _, function in marshal.loads(profile.content())}
+        self.assertIn("my_shelf", functions)
+
+    def test_others_cannot_profile(self):
+        User.objects.create_user("viewer", password="pass12345")
+        self.client.login(username="viewer", password="pass12345")
+
+        response = self.client.get(reverse("my_shelf"), {"profile": "1"})
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0)
+    def test_sampled_requests(self):
+        self.client.get(reverse("about"))
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual((profile.mode, profile.trigger, profile.user), ("sampling", "sampled", None))
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0)
+    async def test_async_requests_stay_async(self):
+        response = await self.async_client.get(reverse("about"))
+
+        self.assertEqual(response.status_code, 200)
+        profile = await RequestProfile.objects.aget()
+        self.assertEqual((profile.mode, profile.view_name), ("sampling", "about"))
+
+    @override_settings(DEBUG=True)
+    def test_asgi_middleware_chain_is_not_adapted(self):
+        with self.assertLogs("django.request", "DEBUG") as logs:
+            logging.getLogger("django.request").debug("handler built")
+            ASGIHandler()
+
+        adapted = [line for line in logs.output if "monitoring" in line]
+        self.assertEqual(adapted, [])
+
+    def test_stack_sampler(self):
+        def busy_for_a_while():
+            deadline = time.perf_counter() + 0.1
+            while time.perf_counter() < deadline:
+                pass
+
+        sampler = StackSampler(threading.get_ident(), 0.005)
+        sampler.start()
+        busy_for_a_while()
+        sampler.stop()
+
+        # "module:function;module:function count" per distinct stack
+        top = sampler.collapsed().splitlines()[0]
+        self.assertRegex(top, r"^\S+ \d+$")
+        self.assertTrue(top.split()[0].endswith("monitoring.tests:ProfilerTests.test_stack_sampler.<locals>.busy_for_a_while"))
+
+    def test_admin_list_summary_and_download(self):
+        self.client.login(username="boss", password="pass12345")
+        profile_id = self.client.get(reverse("about"), {"profile": "1"})["X-Profile-Id"]
+
+        changelist = self.client.get(reverse("admin:monitoring_requestprofile_changelist"))
+        self.assertContains(changelist, f"profile-{profile_id}.prof")
+        change = self.client.get(
+            reverse("admin:monitoring_requestprofile_change", args=[profile_id])
+        )
+        self.assertContains(change, "cumulative")
+
+        download = self.client.get(
+            reverse("admin:monitoring_requestprofile_download", args=[profile_id])
+        )
+        self.assertEqual(
+            download["Content-Disposition"], f'attachment; filename="profile-{profile_id}.prof"'
+        )
+        self.assertIsInstance(marshal.loads(download.content), dict)
+
+    def test_changelist_does_not_load_profile_data(self):
+        self.client.login(username="boss", password="pass12345")
+        self.client.get(reverse("about"), {"profile": "1"})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("admin:monitoring_requestprofile_changelist"))
+
+        selects = [q["sql"] for q in queries if "monitoring_requestprofile" in q["sql"]]
+        self.assertTrue(selects)
+        self.assertFalse([sql for sql in selects if '"data"' in sql])
+
+    def test_old_profiles_are_purged(self):
+        self.client.login(username="boss", password="pass12345")
+        self.client.get(reverse("about"), {"profile": "1"})
+        RequestProfile.objects.update(created_at=timezone.now() - timedelta(days=30))
+
+        purge_profiles()
+        self.assertFalse(RequestProfile.objects.exists())
+
+
+class LoggingPipelineTests(TestCase):
+    """
+    Tests for the logging pipeline (monitoring/logs.py):
+    - The root logger only queues records; a listener thread writes them
+    - A full queue drops records instead of blocking the caller
+    - JSON lines carry the `extra=` fields and tracebacks
+    - High-volume loggers are sampled; warnings always pass
+    """
+
+    def make_record(self, level=logging.INFO, msg="Request %s", args=("x",), **extra):
+        record = logging.LogRecord("tests", level, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_root_logger_uses_the_queue(self):
+        handlers = logging.root.handlers
+        self.assertEqual([type(handler) for handler in handlers], [BackgroundQueueHandler])
+        self.assertIsNotNone(handlers[0].listener._thread)  # started in ready()
+
+    def test_slow_output_does_not_block_the_caller(self):
+        written = []
+
+        class SlowHandler(logging.Handler):
+            def emit(self, record):
+                time.sleep(0.05)
+                written.append(record.getMessage())
+
+        handler = BackgroundQueueHandler(queue.Queue(maxsize=3))
+        handler.listener = logging.handlers.QueueListener(handler.queue, SlowHandler())
+        logger = logging.getLogger("tests.slow")
+        logger.addHandler(handler)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+
+        started = time.perf_counter()
+        for n in range(10):
+            logger.info("line %d", n)
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual(handler.dropped, 7)
+
+        handler.listener.start()
+        handler.listener.stop()  # drains the queue
+        self.assertEqual(written, ["line 0", "line 1", "line 2"])
+
+    def test_json_lines(self):
+        handler = BackgroundQueueHandler(queue.Queue())
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            record = self.make_record(view="about", duration_ms=1.5)
+            record.exc_info = sys.exc_info()
+        prepared = handler.prepare(record)
+
+        entry = json.loads(JSONFormatter().format(prepared))
+        self.assertEqual(
+            {key: entry[key] for key in ("level", "logger", "message", "view", "duration_ms")},
+            {"level": "INFO", "logger": "tests", "message": "Request x",
+             "view": "about", "duration_ms": 1.5},
+        )
+        self.assertIn("ValueError: bad", entry["exc"])
+
+    def test_sampling(self):
+        sampler = SamplingFilter(per_second=10, burst=2)
+        with mock.patch("monitoring.logs.time.monotonic", return_value=sampler.updated):
+            passed = [sampler.filter(self.make_record()) for _ in range(5)]
+            self.assertTrue(sampler.filter(self.make_record(level=logging.WARNING)))
+        self.assertEqual(passed, [True, True, False, False, False])
+
+        # 0.1s later one more token: the record reports what was dropped
+        with mock.patch("monitoring.logs.time.monotonic", return_value=sampler.updated + 0.1):
+            record = self.make_record()
+            self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.sampled_out, 3)
@@ -0,0 +1,86 @@
+"""
+Time spent in SQL, TMDB and template rendering while handling the
+current request (see monitoring/middleware.py).
+
+The timings are held in a context variable, so code anywhere below
+the view (including threads started with asyncio.to_thread() or
+sync_to_async(), which copy the context) adds to them without the
+request being passed down. Outside a request record() does nothing.
+
+Categories overlap rather than partition the request: queries run
+while a template renders count towards both "db" and "render", and
+concurrent TMDB calls add up to more than the time they took.
+"""
+
+import contextvars
+import threading
+import time
+
+
+class RequestTimings:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = {}  # category -> total seconds
+        self.counts = {}   # category -> number of operations
+        self._lock = threading.Lock()
+
+    def add(self, category, seconds):
+        with self._lock:
+            self.seconds[category] = self.seconds.get(category, 0.0) + seconds
+            self.counts[category] = self.counts.get(category, 0) + 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def start():
+    """
+    Starts timing a request; returns (timings, token for stop()).
+    """
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    """
+    The current request's timings, or None outside a request.
+    """
+    return _current.get()
+
+
+def record(category, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(category, seconds)
+
+
+# -------------------------------------------------------------
+# SQL
+# -------------------------------------------------------------
+def sql_timer(execute, sql, params, many, context):
+    """
+    Database execute wrapper (see connection.execute_wrapper()).
+    """
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record("db", time.perf_counter() - started)
+
+
+def install_sql_timer(sender, connection, **kwargs):
+    """
+    connection_created receiver: wraps every query on the connection
+    for as long as it lives, rather than per request, so queries the
+    async ORM runs on another thread's connection are counted too.
+    """
+    if sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_timer)
@@ -0,0 +1,82 @@
+import hmac
+import logging
+
+from django.conf import settings
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseForbidden
+
+from accounts import ratelimit
+from jobs.models import Job
+from movies import search_cache
+from outbox.models import OutboxMessage
+
+from . import metrics
+from .logs import BackgroundQueueHandler
+
+
+def _allowed(request):
+    """
+    Staff users, or a scraper sending "Authorization: Bearer
+    <METRICS_TOKEN>" (when METRICS_TOKEN is set).
+    """
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+
+
+def _by_state(model):
+    return model.objects.order_by().values_list("state").annotate(total=Count("pk"))
+
+
+def app_metrics():
+    """
+    Metric families beyond the request timings: search cache, rate
+    limiter and dropped log record counters (this process), queue
+    sizes (database).
+    """
+    ratelimit_samples = []
+    for key, count in sorted(ratelimit.get_stats().items()):
+        scope, outcome = key.rsplit("_", 1)
+        ratelimit_samples.append(({"scope": scope, "outcome": outcome}, count))
+
+    return [
+        metrics.family(
+            "search_cache_total", "counter", "TMDB search cache lookups, by outcome.",
+            [({"outcome": outcome}, count)
+             for outcome, count in sorted(search_cache.get_stats().items())],
+        ),
+        metrics.family(
+            "ratelimit_total", "counter", "Rate limited requests, by scope and outcome.",
+            ratelimit_samples,
+        ),
+        metrics.family(
+            "jobs", "gauge", "Background jobs, by state.",
+            [({"state": state}, total) for state, total in _by_state(Job)],
+        ),
+        metrics.family(
+            "outbox_messages", "gauge", "Outgoing email, by state.",
+            [({"state": state}, total) for state, total in _by_state(OutboxMessage)],
+        ),
+        metrics.family(
+            "log_records_dropped_total", "counter",
+            "Log records dropped because the logging queue was full.",
+            [({}, sum(
+                handler.dropped for handler in logging.root.handlers
+                if isinstance(handler, BackgroundQueueHandler)
+            ))],
+        ),
+    ]
+
+
+def metrics_view(request):
+    """
+    Prometheus metrics for this process (staff only).
+    """
+    if not _allowed(request):
+        return HttpResponseForbidden("Staff only.")
+    return HttpResponse(
+        metrics.render(*app_metrics()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,8 +1,86 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth.models import User
+from django.urls import reverse
 from django.utils.html import format_html
 from django.templatetags.static import static
 
-from .models import Movie
+from quickflicks.pagination import EstimatedCountPaginator
+from . import bulk_updates
+from .models import BulkUpdateTask, CatalogMovie, Movie
+
+
+class UserAutocompleteFilter(admin.ListFilter):
+    """
+    "By user" sidebar filter with a type-ahead user picker.
+
+    Django's default filter for a ForeignKey lists every user in the
+    sidebar; this one renders the admin's autocomplete widget instead
+    (searching through the User admin's search_fields), so it loads
+    at most the selected user.
+    """
+
+    title = "user"
+    parameter_name = "user__id__exact"
+    template = "admin/movies/user_autocomplete_filter.html"
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        self.value = get_last_value_from_parameters(params, self.parameter_name)
+        if self.parameter_name in params:
+            self.used_parameters[self.parameter_name] = self.value
+            params.pop(self.parameter_name)
+
+        self.field = forms.ModelChoiceField(
+            queryset=User.objects.all(),
+            required=False,
+            widget=AutocompleteSelect(
+                model._meta.get_field("user"),
+                model_admin.admin_site,
+                attrs={"class": "user-autocomplete-filter", "style": "width: 100%"},
+            ),
+        )
+
+    @property
+    def widget(self):
+        # Rendered from the template so the (single) user lookup only
+        # runs when the sidebar is drawn
+        return self.field.widget.render(self.parameter_name, self.value)
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.parameter_name]
+
+    def queryset(self, request, queryset):
+        if self.value in (None, ""):
+            return queryset
+        try:
+            return queryset.filter(user_id=int(self.value))
+        except ValueError:
+            raise IncorrectLookupParameters(f"Invalid user id: {self.value!r}")
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value in (None, ""),
+            "query_string": changelist.get_query_string(remove=[self.parameter_name]),
+            "display": "All",
+        }
+
+
+@admin.register(CatalogMovie)
+class CatalogMovieAdmin(admin.ModelAdmin):
+    list_display = ("title", "tmdb_id", "release_date", "vote_average", "updated_at")
+    search_fields = ("title", "=tmdb_id")
+    ordering = ("title",)
+    readonly_fields = ("updated_at",)
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Movie)
@@ -11,7 +89,7 @@ class MovieAdmin(admin.ModelAdmin):
     # -------- LIST VIEW --------
     list_display = (
         "thumbnail",
-        "title",
+        "catalog__title",
         "user",
         "status_badge",
         "rating_display",
@@ -19,27 +97,45 @@ class MovieAdmin(admin.ModelAdmin):
         "created_at",
     )
 
-    list_display_links = ("title",)  # clickable title
+    list_display_links = ("catalog__title",)  # clickable title
 
     list_filter = (
         "status",
         "rating",
-        "user",
+        UserAutocompleteFilter,
         "created_at",
     )
 
     search_fields = (
-        "title__icontains",
-        "tmdb_id",
+        "catalog__title__icontains",
+        "=catalog__tmdb_id",
         "user__username",
     )
 
-    ordering = ("-created_at",)
+    list_select_related = ("catalog", "user")
+    autocomplete_fields = ("catalog", "user")
+
+    # Newest first by primary key: same order as created_at without
+    # sorting the whole table (created_at has no index)
+    ordering = ("-id",)
+
+    # -------- LARGE TABLES (see quickflicks/pagination.py) --------
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        # select2 + the script that applies UserAutocompleteFilter
+        return (
+            super().media
+            + AutocompleteSelect(Movie._meta.get_field("user"), self.admin_site).media
+            + forms.Media(js=["js/admin_user_filter.js"])
+        )
 
     # -------- FIELDSET LAYOUT --------
     fieldsets = (
         ("Movie Information", {
-            "fields": ("title", "tmdb_id", "poster_url")
+            "fields": ("catalog",)
         }),
         ("Shelf & Status", {
             "fields": ("user", "status", "rating")
@@ -54,8 +150,8 @@ class MovieAdmin(admin.ModelAdmin):
     # -------- CUSTOM COLUMNS --------
 
     def release_year(self, obj):
-        if hasattr(obj, "release_date") and obj.release_date:
-            return obj.release_date[:4]
+        if obj.catalog.release_date:
+            return obj.catalog.release_date.year
         return "—"
     release_year.short_description = "Year"
 
@@ -91,9 +187,9 @@ class MovieAdmin(admin.ModelAdmin):
 
     def status_badge(self, obj):
         color_map = {
-            "NEW": "gray",
-            "TO_WATCH": "blue",
-            "WATCHED": "green",
+            "to_put_away": "gray",
+            "to_watch": "blue",
+            "watched": "green",
         }
         color = color_map.get(obj.status, "gray")
         return format_html(
@@ -106,18 +202,62 @@ class MovieAdmin(admin.ModelAdmin):
 
     # -------- ADMIN ACTIONS --------
 
+    # Large selections are applied in the background, in chunks
+    # (see movies/bulk_updates.py)
+    def run_bulk_action(self, request, queryset, action):
+        if bulk_updates.is_large(queryset):
+            task = bulk_updates.queue(action, queryset, user=request.user)
+            url = reverse("admin:movies_bulkupdatetask_change", args=[task.pk])
+            self.message_user(
+                request,
+                format_html('Large selection: queued as <a href="{}">{}</a>.', url, task),
+                messages.INFO,
+            )
+        else:
+            changed = bulk_updates.apply_inline(action, queryset)
+            self.message_user(request, f"{changed} movies updated.", messages.SUCCESS)
+
     @admin.action(description="Mark selected movies as Watched")
     def mark_watched(self, request, queryset):
-        queryset.update(status="WATCHED")
+        self.run_bulk_action(request, queryset, "mark_watched")
 
     @admin.action(description="Reset rating to 'Not rated'")
     def reset_rating(self, request, queryset):
-        queryset.update(rating=0)
+        self.run_bulk_action(request, queryset, "reset_rating")
 
     actions = [mark_watched, reset_rating]
 
     # -------- READ-ONLY WHEN WATCHED --------
     def get_readonly_fields(self, request, obj=None):
-        if obj and obj.status == "WATCHED":
-            return ("title", "tmdb_id", "poster_url", "created_at", "updated_at")
+        if obj and obj.status == "watched":
+            return ("catalog", "created_at", "updated_at")
         return self.readonly_fields
+
+
+@admin.register(BulkUpdateTask)
+class BulkUpdateTaskAdmin(admin.ModelAdmin):
+    """
+    Progress of background bulk actions (read-only).
+    """
+
+    list_display = ("__str__", "state", "progress", "created_by", "created_at", "finished_at")
+    list_filter = ("state", "action")
+    list_select_related = ("created_by",)
+    fields = (
+        "action", "state", "progress", "total", "processed", "last_pk",
+        "chunk_size", "created_by", "created_at", "updated_at", "finished_at", "error",
+    )
+    readonly_fields = fields
+
+    def progress(self, obj):
+        return format_html(
+            '<progress value="{}" max="100"></progress> {}% ({} / {})',
+            obj.percent, obj.percent, obj.processed, obj.total,
+        )
+    progress.short_description = "Progress"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
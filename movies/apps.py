@@ -3,6 +3,8 @@
 # - Registers the 'movies' app with Django’s application registry.
 # - Sets BigAutoField as the default primary key type for models.
 # - Used by Django to identify and configure this app at startup.
+# - 'ready()' loads movies.signals (shelf cache invalidation) and
+#   movies.tasks (registers the background jobs).
 # ---------------------------------------------------------------
 
 from django.apps import AppConfig
@@ -11,3 +13,7 @@ from django.apps import AppConfig
 class MoviesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movies'
+
+    def ready(self):
+        import movies.signals
+        import movies.tasks
@@ -0,0 +1,227 @@
+"""
+In-memory prefix index for search-as-you-type.
+
+Each worker keeps the AUTOCOMPLETE_INDEX_SIZE most popular catalog
+titles in a sorted array of keys, so a prefix lookup is a binary
+search plus a short scan – no database query per keystroke.
+
+- Every word start of a title is indexed, so "kni" finds "The Dark Knight"
+- The index is built in a background thread when a worker starts
+  (see gunicorn.conf.py), or on the first lookup otherwise
+- Rows changed since the last refresh are merged in every
+  AUTOCOMPLETE_REFRESH_SECONDS; a full rebuild happens every
+  AUTOCOMPLETE_REBUILD_SECONDS
+- Updates build a new snapshot and swap it in, so readers never lock
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import connections
+
+from .models import CatalogMovie
+from .search_cache import normalize_query
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on keys examined per lookup (keeps very short
+# prefixes like "th" fast)
+MAX_SCAN = 2000
+
+
+def index_keys(title):
+    """
+    "The Dark Knight" → ["the dark knight", "dark knight", "knight"]
+    """
+    words = normalize_query(title).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    Immutable snapshot: sorted `keys` with a parallel array of TMDB ids,
+    plus a small dict of display data per film.
+    """
+
+    def __init__(self, films, pairs=None):
+        # films: {tmdb_id: (title, year, popularity)}
+        # pairs: already sorted (key, tmdb_id) pairs, if known
+        self.films = films
+        self.popularity = {tmdb_id: film[2] for tmdb_id, film in films.items()}
+        if pairs is None:
+            pairs = _sorted_pairs(films)
+        self.keys = []
+        self.ids = array("I")
+        for key, tmdb_id in pairs:
+            self.keys.append(key)
+            self.ids.append(tmdb_id)
+
+    def __len__(self):
+        return len(self.films)
+
+    def lookup(self, prefix, limit=8):
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+
+        # Both ends of the matching range by binary search; "\uffff"
+        # sorts after any character a title can continue with
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\uffff", lo=start)
+
+        candidates = set(self.ids[start:min(end, start + MAX_SCAN)])
+        best = heapq.nlargest(limit, candidates, key=self.popularity.__getitem__)
+        return [
+            {"id": tmdb_id, "title": self.films[tmdb_id][0], "year": self.films[tmdb_id][1]}
+            for tmdb_id in best
+        ]
+
+    def merged_with(self, changed):
+        """
+        Returns a new snapshot with `changed` films added / replaced.
+        Only the changed titles are sorted; they are then merged with
+        the existing keys in a single linear pass.
+        """
+        films = dict(self.films)
+        films.update(changed)
+        kept = (
+            (key, tmdb_id)
+            for key, tmdb_id in zip(self.keys, self.ids)
+            if tmdb_id not in changed
+        )
+        return PrefixIndex(films, heapq.merge(kept, _sorted_pairs(changed)))
+
+
+def _sorted_pairs(films):
+    return sorted(
+        (key, tmdb_id)
+        for tmdb_id, (title, _, _) in films.items()
+        for key in index_keys(title)
+    )
+
+
+# -------------------------------------------------------------
+# LOADING
+# -------------------------------------------------------------
+def _load_films(queryset):
+    """
+    Returns ({tmdb_id: (title, year, popularity)}, newest updated_at).
+    """
+    rows = queryset.values_list(
+        "tmdb_id", "title", "release_date", "popularity", "updated_at"
+    )
+    films = {}
+    newest = None
+    for tmdb_id, title, release_date, popularity, updated_at in rows.iterator(chunk_size=5000):
+        films[tmdb_id] = (title, release_date.year if release_date else None, popularity)
+        if newest is None or updated_at > newest:
+            newest = updated_at
+    return films, newest
+
+
+class AutocompleteIndex:
+    """
+    Holds the current PrefixIndex snapshot for this worker and keeps
+    it fresh.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self.built_at = 0.0
+        self.refreshed_at = 0.0
+        self.watermark = None
+        self.min_popularity = 0.0
+        self._build_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def build(self, only_if_missing=False):
+        with self._build_lock:
+            if only_if_missing and self.snapshot is not None:
+                return
+
+            started = time.perf_counter()
+            films, newest = _load_films(
+                CatalogMovie.objects
+                .filter(adult=False)
+                .order_by("-popularity")[:settings.AUTOCOMPLETE_INDEX_SIZE]
+            )
+
+            self.snapshot = PrefixIndex(films)
+            self.watermark = newest
+            self.min_popularity = min((film[2] for film in films.values()), default=0.0)
+            self.built_at = self.refreshed_at = time.monotonic()
+
+            logger.info(
+                "Autocomplete index built",
+                extra={
+                    "films": len(films),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                },
+            )
+
+    def refresh(self):
+        """
+        Merges films updated since the last build/refresh. Only one
+        thread refreshes at a time; the others keep using the
+        current snapshot.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self.built_at >= settings.AUTOCOMPLETE_REBUILD_SECONDS:
+                self.build()
+                return
+
+            changed = CatalogMovie.objects.filter(
+                adult=False, popularity__gte=self.min_popularity
+            )
+            if self.watermark is not None:
+                changed = changed.filter(updated_at__gt=self.watermark)
+
+            films, newest = _load_films(changed)
+            if films:
+                self.snapshot = self.snapshot.merged_with(films)
+                self.watermark = newest
+
+            self.refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def get(self):
+        """
+        Returns the current snapshot, building it on first use and
+        scheduling a background refresh when it is due.
+        """
+        if self.snapshot is None:
+            self.build(only_if_missing=True)
+        elif time.monotonic() - self.refreshed_at >= settings.AUTOCOMPLETE_REFRESH_SECONDS:
+            self.refreshed_at = time.monotonic()  # one refresh per interval
+            _in_background(self.refresh)
+        return self.snapshot
+
+
+def _in_background(target):
+    def run():
+        try:
+            target()
+        finally:
+            connections.close_all()  # this thread's connections only
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def warm_in_background():
+    """
+    Called from gunicorn's post_worker_init hook so the index is
+    ready before the first keystroke reaches this worker.
+    """
+    _in_background(autocomplete_index.get)
@@ -0,0 +1,181 @@
+"""
+Batch shelf changes.
+
+A batch is a list of operations, applied together in one transaction
+with a handful of set-based statements (not one query per movie):
+
+    {"id": 12, "action": "status", "value": "watched"}
+    {"id": 12, "action": "rate", "value": "up"}
+    {"id": 12, "action": "remove"}
+    {"action": "add", "tmdb_id": 155, "title": "The Dark Knight",
+     "poster_path": "/qJ2tW6WMUDux911r6m7haRef0WH.jpg"}
+
+- Every statement is filtered by the user, so ids belonging to
+  someone else are silently ignored
+- If a movie appears more than once for the same kind of change,
+  the last operation wins; removals are applied last
+- The whole batch is validated before anything is written
+"""
+
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CatalogMovie, Movie
+from .posters import is_valid_poster_path
+from .shelf import bump_shelf_version
+from .tasks import queue_enrichment
+
+
+MAX_OPERATIONS = 200
+
+STATUSES = {value for value, _ in Movie.STATUS_CHOICES}
+RATINGS = {value for value, _ in Movie.RATING_CHOICES}
+
+# Client-supplied catalog values must fit the columns: anything
+# longer would only fail at INSERT time (DataError on PostgreSQL)
+TITLE_MAX_LENGTH = CatalogMovie._meta.get_field("title").max_length
+POSTER_PATH_MAX_LENGTH = CatalogMovie._meta.get_field("poster_path").max_length
+MAX_TMDB_ID = 2147483647  # PositiveIntegerField on PostgreSQL
+
+
+class BatchError(ValueError):
+    """
+    Raised when a batch is malformed; nothing has been written.
+    """
+
+
+def _movie_id(operation):
+    movie_id = operation.get("id")
+    if not isinstance(movie_id, int) or isinstance(movie_id, bool):
+        raise BatchError(f"Operation needs an integer movie id: {operation!r}")
+    return movie_id
+
+
+def catalog_movie(tmdb_id, title, poster_path):
+    """
+    An unsaved CatalogMovie from values posted by the browser (a
+    search result being saved). Raises BatchError if they are not a
+    TMDB id, a title and an optional TMDB poster path that fit.
+    """
+    tmdb_id = str(tmdb_id)
+    if not re.fullmatch(r"[0-9]{1,10}", tmdb_id) or int(tmdb_id) > MAX_TMDB_ID:
+        raise BatchError(f"Invalid tmdb_id: {tmdb_id!r}")
+    if not isinstance(title, str) or not 0 < len(title) <= TITLE_MAX_LENGTH:
+        raise BatchError(f"Title must be 1 to {TITLE_MAX_LENGTH} characters")
+    if poster_path is None:
+        poster_path = ""
+    if poster_path != "" and not (
+        is_valid_poster_path(poster_path) and len(poster_path) <= POSTER_PATH_MAX_LENGTH
+    ):
+        raise BatchError(f"Invalid poster_path: {poster_path!r}")
+    return CatalogMovie(tmdb_id=int(tmdb_id), title=title, poster_path=poster_path)
+
+
+def _parse(operations):
+    """
+    Validates the operations and groups them by statement:
+    ({status: ids}, {rating: ids}, removed ids, catalog rows to add).
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("Expected a non-empty list of operations")
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f"At most {MAX_OPERATIONS} operations per batch")
+
+    statuses, ratings, removed, added = {}, {}, set(), {}
+
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise BatchError(f"Operation must be an object: {operation!r}")
+
+        action = operation.get("action")
+        value = operation.get("value")
+
+        if action == "status":
+            if value not in STATUSES:
+                raise BatchError(f"Unknown status: {value!r}")
+            statuses[_movie_id(operation)] = value
+
+        elif action == "rate":
+            if value not in RATINGS:
+                raise BatchError(f"Unknown rating: {value!r}")
+            ratings[_movie_id(operation)] = value
+
+        elif action == "remove":
+            removed.add(_movie_id(operation))
+
+        elif action == "add":
+            film = catalog_movie(
+                operation.get("tmdb_id", ""), operation.get("title"), operation.get("poster_path"),
+            )
+            added[film.tmdb_id] = film
+
+        else:
+            raise BatchError(f"Unknown action: {action!r}")
+
+    return _group(statuses), _group(ratings), removed, list(added.values())
+
+
+def _group(changes):
+    # {movie_id: value} → {value: [movie_id, ...]}
+    grouped = defaultdict(list)
+    for movie_id, value in changes.items():
+        grouped[value].append(movie_id)
+    return grouped
+
+
+def apply_batch(user, operations):
+    """
+    Applies a batch for `user` and returns how many shelf rows were
+    changed: {"added": n, "updated": n, "removed": n}. A movie whose
+    status and rating both change counts twice in "updated".
+
+    Raises BatchError (before writing) if any operation is invalid.
+    """
+    statuses, ratings, removed, added = _parse(operations)
+    shelf = Movie.objects.filter(user=user)
+    # update() bypasses auto_now, so the timestamp is set explicitly
+    now = timezone.now()
+    result = {"added": 0, "updated": 0, "removed": 0}
+
+    with transaction.atomic():
+        if added:
+            # Same conflict-free inserts as add_to_shelf
+            CatalogMovie.objects.bulk_create(added, ignore_conflicts=True)
+            already = set(
+                shelf.filter(catalog__in=added).values_list("catalog_id", flat=True)
+            )
+            Movie.objects.bulk_create(
+                [
+                    Movie(user=user, catalog_id=film.tmdb_id, status="to_put_away")
+                    for film in added
+                    if film.tmdb_id not in already
+                ],
+                ignore_conflicts=True,
+            )
+            result["added"] = len(added) - len(already)
+
+        result["updated"] = sum(
+            shelf.filter(id__in=ids).update(status=status, updated_at=now)
+            for status, ids in statuses.items()
+        ) + sum(
+            shelf.filter(id__in=ids).update(rating=rating, updated_at=now)
+            for rating, ids in ratings.items()
+        )
+
+        if removed:
+            result["removed"], _ = shelf.filter(id__in=removed).delete()
+
+    # After commit, so no reader can cache the pre-batch shelf under
+    # the new version
+    bump_shelf_version(user.id)
+
+    if added:
+        # New films get their full TMDB record in the background
+        for tmdb_id in CatalogMovie.objects.filter(
+            pk__in=[film.tmdb_id for film in added], enriched_at__isnull=True
+        ).values_list("pk", flat=True):
+            queue_enrichment(tmdb_id, force=True)  # still deduplicated by job key
+    return result
@@ -0,0 +1,197 @@
+"""
+Admin bulk actions on shelf rows, in chunks.
+
+A small selection is updated inline, as before. A selection larger
+than ADMIN_BULK_INLINE_LIMIT rows becomes a BulkUpdateTask, applied by
+the job worker ("movies.bulk_update", see movies/tasks.py) so the
+admin request returns at once:
+
+- The selection is stored as plain data: the selected primary keys,
+  collapsed into [first, last] runs of consecutive pks (a whole-table
+  selection is a single run). Later rows cannot fall inside a run, so
+  the task updates exactly the rows selected in the admin
+- Rows are walked in primary-key order, ADMIN_BULK_CHUNK_SIZE at a
+  time; each chunk is one UPDATE over its pk ranges in its own short
+  transaction, so no lock is held on the whole selection
+- Progress (rows done, last pk) is saved in the same transaction as
+  the chunk, so the admin shows it live and an interrupted task
+  resumes exactly where it stopped when its job is retried
+- Shelf versions of the affected users are bumped after each chunk
+  commits (see movies/shelf.py)
+"""
+
+import bisect
+import logging
+import operator
+import traceback
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from jobs.queue import enqueue
+
+from .models import BulkUpdateTask, Movie
+from .shelf import bump_shelf_version
+
+
+logger = logging.getLogger(__name__)
+
+# action -> fields written to every selected row
+ACTIONS = {
+    "mark_watched": {"status": "watched"},
+    "reset_rating": {"rating": "none"},
+}
+
+
+def _apply(action, queryset):
+    """
+    Updates `queryset` and returns (rows changed, affected user ids).
+    """
+    user_ids = set(queryset.order_by().values_list("user_id", flat=True).distinct())
+    # update() bypasses auto_now, so the timestamp is set explicitly
+    changed = queryset.update(**ACTIONS[action], updated_at=timezone.now())
+    return changed, user_ids
+
+
+def apply_inline(action, queryset):
+    """
+    Applies `action` to a small selection within the request.
+    """
+    with transaction.atomic():
+        changed, user_ids = _apply(action, queryset)
+    bump_shelf_version(*user_ids)
+    return changed
+
+
+def is_large(queryset):
+    """
+    True if the selection has more than ADMIN_BULK_INLINE_LIMIT rows
+    (counted no further than that).
+    """
+    limit = settings.ADMIN_BULK_INLINE_LIMIT
+    return queryset.order_by()[: limit + 1].count() > limit
+
+
+def queue(action, queryset, user=None):
+    """
+    Stores the selection as a BulkUpdateTask and queues the job that
+    applies it (committed together, so neither exists without the other).
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown bulk action: {action!r}")
+
+    runs = _pk_runs(queryset)
+    with transaction.atomic():
+        task = BulkUpdateTask.objects.create(
+            action=action,
+            selection=runs,
+            total=sum(last - first + 1 for first, last in runs),
+            chunk_size=settings.ADMIN_BULK_CHUNK_SIZE,
+            created_by=user,
+        )
+        enqueue("movies.bulk_update", key=f"bulk-update:{task.pk}", task_id=task.pk)
+    return task
+
+
+def _pk_runs(queryset):
+    """
+    Returns the selected pks as sorted [first, last] runs of
+    consecutive values.
+    """
+    runs = []
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    for pk in pks.iterator(chunk_size=settings.ADMIN_BULK_CHUNK_SIZE):
+        if runs and pk == runs[-1][1] + 1:
+            runs[-1][1] = pk
+        else:
+            runs.append([pk, pk])
+    return runs
+
+
+def _selection(task):
+    """
+    Returns the task's stored pk runs, checked to be well formed.
+    """
+    runs = task.selection
+    if not isinstance(runs, list) or not all(
+        isinstance(run, list) and len(run) == 2
+        and all(isinstance(pk, int) for pk in run) and run[0] <= run[1]
+        for run in runs
+    ):
+        raise ValueError(f"Malformed bulk update selection: {runs!r}")
+    return runs
+
+
+def run_task(task_id):
+    """
+    Applies a pending task chunk by chunk. Returns False if the task
+    was not pending (already taken, finished or unknown).
+    """
+    # Claim it: only one runner moves it from pending to running
+    claimed = BulkUpdateTask.objects.filter(pk=task_id, state="pending").update(
+        state="running", updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    task = BulkUpdateTask.objects.get(pk=task_id)
+    try:
+        runs = _selection(task)
+        while _run_chunk(task, runs):
+            pass
+
+        task.state = "done"
+        task.finished_at = timezone.now()
+        task.save(update_fields=["state", "finished_at", "updated_at"])
+
+    except Exception:
+        logger.exception("Bulk update failed", extra={"task": task.pk})
+        task.state = "failed"
+        task.error = traceback.format_exc()
+        task.finished_at = timezone.now()
+        task.save(update_fields=["state", "error", "finished_at", "updated_at"])
+    return True
+
+
+def _next_chunk(runs, last_pk, size):
+    """
+    Returns the runs covering the next `size` selected pks after
+    `last_pk`.
+    """
+    chunk = []
+    start = bisect.bisect_right(runs, last_pk, key=operator.itemgetter(1))
+    for first, last in runs[start:]:
+        first = max(first, last_pk + 1)
+        last = min(last, first + size - 1)
+        chunk.append((first, last))
+        size -= last - first + 1
+        if not size:
+            break
+    return chunk
+
+
+def _run_chunk(task, runs):
+    """
+    Applies the next chunk after task.last_pk. Returns False when
+    there is nothing left.
+    """
+    chunk = _next_chunk(runs, task.last_pk, task.chunk_size)
+    if not chunk:
+        return False
+
+    # Ranges rather than pk__in: a short statement however large the
+    # chunk, unless the selection is very fragmented
+    rows = Movie.objects.filter(reduce(operator.or_, (
+        Q(pk__gte=first, pk__lte=last) for first, last in chunk
+    )))
+    with transaction.atomic():
+        _, user_ids = _apply(task.action, rows)
+        task.processed += sum(last - first + 1 for first, last in chunk)
+        task.last_pk = chunk[-1][1]
+        task.save(update_fields=["processed", "last_pk", "updated_at"])
+
+    bump_shelf_version(*user_ids)
+    return True
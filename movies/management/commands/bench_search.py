@@ -0,0 +1,67 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from monitoring.bench import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures throughput and latency of the search page in-process. "
+        "Run against the TMDB stand-in (manage.py tmdb_standin) for "
+        "reproducible numbers on a machine with no network."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queries", default="batman,dune,the dark knight",
+            help="Comma separated search terms, used round-robin.",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Clear the search cache before every request.",
+        )
+
+    def handle(self, *args, **options):
+        queries = [q.strip() for q in options["queries"].split(",") if q.strip()]
+        terms = cycle(queries)
+        jobs = [next(terms) for _ in range(options["requests"])]
+        search_cache = caches[settings.TMDB_SEARCH_CACHE_ALIAS]
+        url = reverse("home")
+
+        self.stdout.write(
+            f"Searching {len(jobs)} times with concurrency "
+            f"{options['concurrency']} against {settings.TMDB_BASE_URL}"
+        )
+
+        def run(query):
+            if options["cold"]:
+                search_cache.clear()
+            client = Client(HTTP_HOST="localhost")
+            started = time.perf_counter()
+            response = client.get(url, {"query": query})
+            elapsed = (time.perf_counter() - started) * 1000
+            return elapsed, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(run, jobs))
+        wall = time.perf_counter() - started
+
+        latencies = [elapsed for elapsed, _ in results]
+        errors = sum(1 for _, status in results if status != 200)
+
+        self.stdout.write(f"Requests:    {len(results)} ({errors} non-200)")
+        self.stdout.write(f"Throughput:  {len(results) / wall:.1f} req/s")
+        self.stdout.write(f"Mean:        {statistics.mean(latencies):.1f} ms")
+        for pct in (50, 95, 99):
+            self.stdout.write(f"p{pct}:         {percentile(latencies, pct):.1f} ms")
@@ -0,0 +1,72 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from movies.models import Movie
+from movies.shelf import SECTION_STATUSES, ShelfSection
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints the query plan and median run time of the hot shelf "
+        "queries for one user. Run before and after a schema change "
+        "to compare plans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Username to benchmark (default: the user with the biggest shelf).",
+        )
+        parser.add_argument("--runs", type=int, default=50)
+
+    def handle(self, *args, **options):
+        user = self.pick_user(options["user"])
+        catalog_id = (
+            Movie.objects.filter(user=user).values_list("catalog_id", flat=True).last()
+        )
+        self.stdout.write(
+            f"User {user.username}: {Movie.objects.filter(user=user).count()} shelf rows"
+        )
+
+        hot_queries = {
+            f"shelf section ({status})": ShelfSection(user, status).queryset()[:25]
+            for status in SECTION_STATUSES
+        }
+        hot_queries["already shelved? (user, tmdb_id)"] = Movie.objects.filter(
+            user=user, catalog_id=catalog_id
+        )
+        hot_queries["shelved ids for search results"] = Movie.objects.filter(
+            user=user
+        ).values_list("catalog_id", flat=True)
+
+        for name, queryset in hot_queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            self.stdout.write(queryset.explain())
+            self.stdout.write(f"median: {self.time(queryset, options['runs']):.2f} ms")
+
+    def pick_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {username!r}")
+
+        user = (
+            User.objects.annotate(shelf=Count("movie"))
+            .order_by("-shelf").first()
+        )
+        if user is None:
+            raise CommandError("No users to benchmark")
+        return user
+
+    def time(self, queryset, runs):
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            list(queryset.all())
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
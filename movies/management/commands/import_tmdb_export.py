@@ -0,0 +1,165 @@
+import gzip
+import json
+import os
+import time
+from itertools import batched
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from movies.models import CatalogMovie
+
+
+TITLE_MAX_LENGTH = CatalogMovie._meta.get_field("original_title").max_length
+REPORT_EVERY_SECONDS = 5
+
+
+# -------------------------------------------------------------
+# PIPELINE STAGES (generators → constant memory)
+# -------------------------------------------------------------
+def read_lines(path, skip=0):
+    """
+    Yields (line_number, line) from a gzipped or plain JSON-lines file,
+    skipping the first `skip` lines (already imported).
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if line_number > skip:
+                yield line_number, line
+
+
+def parse_records(lines, include_adult, stats):
+    """
+    Decodes and validates export records, yielding
+    (line_number, CatalogMovie) for every usable line.
+    """
+    for line_number, line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            record = json.loads(line)
+            tmdb_id = int(record["id"])
+            title = str(record.get("original_title") or "").strip()
+            popularity = float(record.get("popularity") or 0)
+            adult = bool(record.get("adult", False))
+        except (ValueError, TypeError, KeyError):
+            stats["invalid"] += 1
+            continue
+
+        if tmdb_id <= 0 or not title:
+            stats["invalid"] += 1
+            continue
+
+        if adult and not include_adult:
+            stats["skipped"] += 1
+            continue
+
+        yield line_number, CatalogMovie(
+            tmdb_id=tmdb_id,
+            title=title[:TITLE_MAX_LENGTH],
+            original_title=title[:TITLE_MAX_LENGTH],
+            popularity=popularity,
+            adult=adult,
+        )
+
+
+# -------------------------------------------------------------
+# CHECKPOINTS
+# -------------------------------------------------------------
+def read_checkpoint(path):
+    try:
+        return int(Path(path).read_text().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, line_number):
+    """
+    Written via a temp file + rename so an interruption can never
+    leave a half-written checkpoint behind.
+    """
+    tmp_path = f"{path}.tmp"
+    Path(tmp_path).write_text(str(line_number))
+    os.replace(tmp_path, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams a TMDB daily ID export (gzipped JSON lines) into the local "
+        "movie catalog using batched upserts. Progress is checkpointed so "
+        "an interrupted import resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to e.g. movie_ids_MM_DD_YYYY.json.gz")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (defaults to <path>.checkpoint).",
+        )
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Ignore any existing checkpoint and start from line 1.",
+        )
+        parser.add_argument(
+            "--include-adult", action="store_true",
+            help="Also import records flagged as adult.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not Path(path).exists():
+            raise CommandError(f"Export file not found: {path}")
+
+        checkpoint = options["checkpoint"] or f"{path}.checkpoint"
+        start_after = 0 if options["restart"] else read_checkpoint(checkpoint)
+        if start_after:
+            self.stdout.write(f"Resuming after line {start_after:,}")
+
+        stats = {"upserted": 0, "invalid": 0, "skipped": 0}
+        records = parse_records(
+            read_lines(path, skip=start_after),
+            include_adult=options["include_adult"],
+            stats=stats,
+        )
+
+        started = last_report = time.perf_counter()
+        for batch in batched(records, options["batch_size"]):
+            # The export can repeat an ID; one upsert statement may
+            # only touch each row once, so keep the last occurrence
+            movies = {movie.tmdb_id: movie for _, movie in batch}
+
+            with transaction.atomic():
+                CatalogMovie.objects.bulk_create(
+                    movies.values(),
+                    update_conflicts=True,
+                    unique_fields=["tmdb_id"],
+                    # title is only set on insert so localised /
+                    # enriched titles are never overwritten
+                    update_fields=["original_title", "popularity", "adult", "updated_at"],
+                )
+
+            write_checkpoint(checkpoint, batch[-1][0])
+            stats["upserted"] += len(movies)
+
+            now = time.perf_counter()
+            if now - last_report >= REPORT_EVERY_SECONDS:
+                last_report = now
+                self.stdout.write(
+                    f"{stats['upserted']:,} rows upserted "
+                    f"({stats['upserted'] / (now - started):,.0f} rows/sec)"
+                )
+
+        elapsed = time.perf_counter() - started
+        Path(checkpoint).unlink(missing_ok=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import finished in {elapsed:.1f}s "
+            f"({stats['upserted'] / max(elapsed, 1e-9):,.0f} rows/sec): "
+            f"{stats['upserted']:,} upserted, "
+            f"{stats['invalid']:,} invalid, {stats['skipped']:,} skipped"
+        ))
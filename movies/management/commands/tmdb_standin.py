@@ -0,0 +1,76 @@
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from movies.tmdb_standin import make_app
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Serves recorded TMDB responses locally so the search page can be "
+        "benchmarked without network access. Point TMDB_BASE_URL at "
+        "http://<host>:<port>/3 to use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument(
+            "--fixtures", default=str(settings.TMDB_FIXTURES_DIR),
+            help="Directory of recorded responses (see TMDB_RECORD_DIR).",
+        )
+        parser.add_argument("--latency-ms", type=float, default=0)
+        parser.add_argument("--jitter-ms", type=float, default=0)
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0,
+            help="Fraction of requests (0-1) answered with --error-status.",
+        )
+        parser.add_argument("--error-status", type=int, default=503)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--verbose-requests", action="store_true",
+            help="Log every request to stderr.",
+        )
+
+    def handle(self, *args, **options):
+        app = make_app(
+            options["fixtures"],
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            seed=options["seed"],
+        )
+
+        server = make_server(
+            options["host"],
+            options["port"],
+            app,
+            server_class=ThreadingWSGIServer,
+            handler_class=(
+                WSGIRequestHandler if options["verbose_requests"] else QuietHandler
+            ),
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"TMDB stand-in serving {options['fixtures']} on "
+            f"http://{options['host']}:{server.server_port}/3"
+        ))
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,34 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Step 1 of 3: the catalog table and a nullable link to it. The data
+# is moved in 0004 and the old columns dropped in 0005, each in its
+# own transaction: PostgreSQL refuses to ALTER a table that still has
+# deferred FK checks pending from the data migration.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_movie_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogMovie',
+            fields=[
+                ('tmdb_id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('poster_path', models.CharField(blank=True, max_length=100)),
+                ('release_date', models.DateField(blank=True, null=True)),
+                ('vote_average', models.FloatField(blank=True, null=True)),
+                ('genres', models.JSONField(blank=True, default=list)),
+                ('overview', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='catalog',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='shelf_entries', to='movies.catalogmovie'),
+        ),
+    ]
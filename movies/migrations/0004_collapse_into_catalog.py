@@ -0,0 +1,96 @@
+import logging
+
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+
+logger = logging.getLogger("movies.migrations")
+
+POSTER_PREFIX = "https://image.tmdb.org/t/p/w300"
+BATCH_SIZE = 1000
+
+
+def collapse_into_catalog(apps, schema_editor):
+    """
+    Creates one CatalogMovie per distinct TMDB ID (using the most
+    recently updated shelf row's title/poster), then points every
+    shelf row at it.
+
+    Rows whose tmdb_id is not a number cannot reference a TMDB film
+    and are removed; each one is logged first, with everything needed
+    to restore it by hand.
+    """
+    Movie = apps.get_model("movies", "Movie")
+    CatalogMovie = apps.get_model("movies", "CatalogMovie")
+
+    unusable = Movie.objects.exclude(tmdb_id__regex=r"^[0-9]+$")
+    removed = 0
+    for row in unusable.values(
+        "pk", "user_id", "tmdb_id", "title", "poster_url", "status", "rating",
+    ).iterator(chunk_size=BATCH_SIZE):
+        logger.warning("Removing shelf row with a non-numeric tmdb_id", extra={"row": row})
+        removed += 1
+    if removed:
+        unusable.delete()
+        logger.warning("Removed %d shelf rows with a non-numeric tmdb_id", removed)
+
+    rows = (
+        Movie.objects
+        .order_by("tmdb_id", "-updated_at")
+        .values_list("tmdb_id", "title", "poster_url")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+    batch = []
+    last_id = None
+    for tmdb_id, title, poster_url in rows:
+        if tmdb_id == last_id:
+            continue
+        last_id = tmdb_id
+
+        poster_url = poster_url or ""
+        poster_path = (
+            poster_url[len(POSTER_PREFIX):]
+            if poster_url.startswith(POSTER_PREFIX) else ""
+        )
+        batch.append(CatalogMovie(
+            tmdb_id=int(tmdb_id), title=title, poster_path=poster_path,
+        ))
+
+        if len(batch) >= BATCH_SIZE:
+            CatalogMovie.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    CatalogMovie.objects.bulk_create(batch, ignore_conflicts=True)
+
+    # One statement links every shelf row to its catalog entry
+    Movie.objects.update(catalog=Cast("tmdb_id", models.PositiveIntegerField()))
+
+
+def expand_from_catalog(apps, schema_editor):
+    """
+    Reverse: copy catalog metadata back onto each shelf row.
+    """
+    Movie = apps.get_model("movies", "Movie")
+
+    for movie in Movie.objects.select_related("catalog").iterator(chunk_size=BATCH_SIZE):
+        movie.tmdb_id = str(movie.catalog_id)
+        movie.title = movie.catalog.title
+        movie.poster_url = (
+            f"{POSTER_PREFIX}{movie.catalog.poster_path}"
+            if movie.catalog.poster_path else ""
+        )
+        movie.save(update_fields=["tmdb_id", "title", "poster_url"])
+
+
+# Step 2 of 3: data only, so the schema changes in 0005 run in a
+# transaction with no deferred FK checks pending.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_catalogmovie_movie_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_into_catalog, expand_from_catalog),
+    ]
@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Step 3 of 3: drop the columns now held by CatalogMovie and make the
+# link required.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_collapse_into_catalog'),
+    ]
+
+    operations = [
+        # Defaults let the reverse migration re-add the columns to
+        # existing rows before expand_from_catalog fills them in
+        migrations.AlterField(
+            model_name='movie',
+            name='title',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='tmdb_id',
+            field=models.CharField(default='', max_length=20),
+        ),
+        migrations.RemoveField(
+            model_name='movie',
+            name='poster_url',
+        ),
+        migrations.RemoveField(
+            model_name='movie',
+            name='title',
+        ),
+        migrations.RemoveField(
+            model_name='movie',
+            name='tmdb_id',
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='catalog',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='shelf_entries', to='movies.catalogmovie'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_remove_movie_copied_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogmovie',
+            name='adult',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='catalogmovie',
+            name='original_title',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='catalogmovie',
+            name='popularity',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,91 @@
+from django.db import migrations
+
+
+# -------------------------------------------------------------
+# POSTGRESQL: expression GIN index (must match movies/search.py)
+# -------------------------------------------------------------
+POSTGRES_CREATE = """
+CREATE INDEX movies_catalogmovie_search_idx
+ON movies_catalogmovie
+USING gin (to_tsvector('english', title || ' ' || overview));
+"""
+
+POSTGRES_DROP = "DROP INDEX IF EXISTS movies_catalogmovie_search_idx;"
+
+
+# -------------------------------------------------------------
+# SQLITE: external-content FTS5 table + sync triggers
+# NOTE: SQLite schema changes that rebuild movies_catalogmovie
+# (e.g. adding a NOT NULL column) drop these triggers, so such a
+# migration must run SQLITE_DROP / SQLITE_CREATE again afterwards.
+# -------------------------------------------------------------
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE movies_catalogmovie_fts USING fts5(
+        title, overview,
+        content='movies_catalogmovie',
+        content_rowid='tmdb_id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+    """,
+    """
+    CREATE TRIGGER movies_catalogmovie_fts_insert
+    AFTER INSERT ON movies_catalogmovie BEGIN
+        INSERT INTO movies_catalogmovie_fts (rowid, title, overview)
+        VALUES (new.tmdb_id, new.title, new.overview);
+    END;
+    """,
+    """
+    CREATE TRIGGER movies_catalogmovie_fts_delete
+    AFTER DELETE ON movies_catalogmovie BEGIN
+        INSERT INTO movies_catalogmovie_fts (movies_catalogmovie_fts, rowid, title, overview)
+        VALUES ('delete', old.tmdb_id, old.title, old.overview);
+    END;
+    """,
+    """
+    CREATE TRIGGER movies_catalogmovie_fts_update
+    AFTER UPDATE OF title, overview ON movies_catalogmovie BEGIN
+        INSERT INTO movies_catalogmovie_fts (movies_catalogmovie_fts, rowid, title, overview)
+        VALUES ('delete', old.tmdb_id, old.title, old.overview);
+        INSERT INTO movies_catalogmovie_fts (rowid, title, overview)
+        VALUES (new.tmdb_id, new.title, new.overview);
+    END;
+    """,
+    "INSERT INTO movies_catalogmovie_fts (movies_catalogmovie_fts) VALUES ('rebuild');",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS movies_catalogmovie_fts_insert;",
+    "DROP TRIGGER IF EXISTS movies_catalogmovie_fts_delete;",
+    "DROP TRIGGER IF EXISTS movies_catalogmovie_fts_update;",
+    "DROP TABLE IF EXISTS movies_catalogmovie_fts;",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(POSTGRES_CREATE)
+    elif vendor == "sqlite":
+        for statement in SQLITE_CREATE:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(POSTGRES_DROP)
+    elif vendor == "sqlite":
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_catalogmovie_export_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
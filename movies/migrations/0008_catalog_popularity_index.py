@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_catalog_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='catalogmovie',
+            index=models.Index(fields=['-popularity'], name='catalog_popularity_idx'),
+        ),
+    ]
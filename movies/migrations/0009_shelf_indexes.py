@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+BATCH_SIZE = 1000
+
+
+def remove_duplicate_shelf_rows(apps, schema_editor):
+    """
+    Before the unique constraint can be added, keep a single shelf
+    row per (user, film): the most recently updated one, as it holds
+    the user's latest status and rating.
+    """
+    Movie = apps.get_model("movies", "Movie")
+
+    duplicated = (
+        Movie.objects
+        .values("user_id", "catalog_id")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+        .values_list("user_id", "catalog_id")
+    )
+
+    extra_ids = []
+    for user_id, catalog_id in duplicated.iterator(chunk_size=BATCH_SIZE):
+        ids = list(
+            Movie.objects
+            .filter(user_id=user_id, catalog_id=catalog_id)
+            .order_by("-updated_at", "-id")
+            .values_list("id", flat=True)
+        )
+        extra_ids.extend(ids[1:])
+
+    for start in range(0, len(extra_ids), BATCH_SIZE):
+        Movie.objects.filter(id__in=extra_ids[start:start + BATCH_SIZE]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_catalog_popularity_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_shelf_rows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['user', 'status', '-updated_at', '-id'], name='movie_shelf_section_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='movie',
+            constraint=models.UniqueConstraint(fields=('user', 'catalog'), name='unique_shelf_movie'),
+        ),
+    ]
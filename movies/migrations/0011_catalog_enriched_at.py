@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_bulk_update_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogmovie',
+            name='enriched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='catalogmovie',
+            index=models.Index(fields=['enriched_at'], name='catalog_enriched_idx'),
+        ),
+    ]
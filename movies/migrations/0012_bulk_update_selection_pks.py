@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_unfinished(apps, schema_editor):
+    """
+    Tasks queued before this migration lost their selection with the
+    old column; mark them failed so the action can be re-run from the
+    admin rather than finishing without touching any rows.
+    """
+    BulkUpdateTask = apps.get_model("movies", "BulkUpdateTask")
+    BulkUpdateTask.objects.filter(state__in=["pending", "running"]).update(
+        state="failed",
+        error="Selection was not kept when the task format changed; "
+              "run the action again.",
+        finished_at=timezone.now(),
+    )
+
+
+# The selection was a pickled Query; it is now the selected pks as
+# plain JSON. A bytea column cannot be cast to jsonb, so the column is
+# replaced rather than altered.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_catalog_enriched_at'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='bulkupdatetask',
+            name='selection',
+        ),
+        migrations.AddField(
+            model_name='bulkupdatetask',
+            name='selection',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(fail_unfinished, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,69 @@ from django.db import models
 from django.contrib.auth.models import User
 
 
+class CatalogMovie(models.Model):
+    """
+    Shared metadata for a single TMDB film.
+    Stored once (keyed by TMDB ID) and referenced by every user's
+    shelf entry, so fixing a title or poster is a one-row update.
+    """
+
+    POSTER_BASE_URL = "https://image.tmdb.org/t/p/w300"
+
+    tmdb_id = models.PositiveIntegerField(primary_key=True)
+
+    title = models.CharField(max_length=255)
+    original_title = models.CharField(max_length=255, blank=True)
+    poster_path = models.CharField(max_length=100, blank=True)
+    release_date = models.DateField(blank=True, null=True)
+    vote_average = models.FloatField(blank=True, null=True)
+    genres = models.JSONField(default=list, blank=True)
+    overview = models.TextField(blank=True)
+    popularity = models.FloatField(default=0)
+    adult = models.BooleanField(default=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+    # When the full TMDB record was last fetched (movies/tasks.py);
+    # null for rows created from search results or the daily export
+    enriched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Autocomplete loads the most popular titles at startup
+            models.Index(fields=["-popularity"], name="catalog_popularity_idx"),
+            # Refresh job: least recently enriched first
+            models.Index(fields=["enriched_at"], name="catalog_enriched_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.tmdb_id})"
+
+    @property
+    def poster_url(self):
+        if not self.poster_path:
+            return ""
+        return f"{self.POSTER_BASE_URL}{self.poster_path}"
+
+    def as_search_result(self):
+        """
+        Same shape as a TMDB search result, so local and TMDB
+        results render through the same template.
+        """
+        return {
+            "id": self.tmdb_id,
+            "title": self.title,
+            "poster_path": self.poster_path or None,
+            "release_date": self.release_date.isoformat() if self.release_date else "",
+            "vote_average": self.vote_average,
+            "overview": self.overview,
+        }
+
+
 class Movie(models.Model):
     """
     Represents a single movie saved by a user on their personal shelf.
-    Stores TMDB ID, title, poster, shelf status, rating, etc.
+    Film metadata lives in CatalogMovie; this row only holds the
+    user's shelf status and rating.
     """
 
     STATUS_CHOICES = [
@@ -21,10 +80,9 @@ class Movie(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-
-    title = models.CharField(max_length=255)
-    tmdb_id = models.CharField(max_length=20)
-    poster_url = models.URLField(blank=True, null=True)
+    catalog = models.ForeignKey(
+        CatalogMovie, on_delete=models.PROTECT, related_name="shelf_entries"
+    )
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="to_watch")
     rating = models.CharField(max_length=10, choices=RATING_CHOICES, default="none")
@@ -32,5 +90,87 @@ class Movie(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)   # ⭐ ADD THIS
 
+    class Meta:
+        indexes = [
+            # Shelf sections: filter by user + status, newest first
+            # (matches the keyset order in movies/shelf.py)
+            models.Index(
+                fields=["user", "status", "-updated_at", "-id"],
+                name="movie_shelf_section_idx",
+            ),
+        ]
+        constraints = [
+            # One shelf entry per user and film; also serves
+            # (user, tmdb_id) lookups
+            models.UniqueConstraint(
+                fields=["user", "catalog"], name="unique_shelf_movie"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.user.username})"
+
+    # ---- Read-only shortcuts to the shared catalog entry ----
+    # (use select_related("catalog") when listing shelf rows)
+    @property
+    def tmdb_id(self):
+        return self.catalog_id
+
+    @property
+    def title(self):
+        return self.catalog.title
+
+    @property
+    def poster_url(self):
+        return self.catalog.poster_url
+
+
+class BulkUpdateTask(models.Model):
+    """
+    An admin bulk action too large to run inside the request.
+    Applied by movies/bulk_updates.py in primary-key ordered chunks,
+    one short transaction each; `last_pk` records how far it got, so
+    an interrupted task resumes where it stopped.
+    """
+
+    ACTION_CHOICES = [
+        ("mark_watched", "Mark as Watched"),
+        ("reset_rating", "Reset rating"),
+    ]
+
+    STATE_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    action = models.CharField(max_length=30, choices=ACTION_CHOICES)
+    # Selected pks as [first, last] runs of consecutive values
+    selection = models.JSONField(default=list)
+    chunk_size = models.PositiveIntegerField(default=1000)
+
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default="pending")
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    last_pk = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.get_action_display()} #{self.pk} ({self.get_state_display()})"
+
+    @property
+    def percent(self):
+        if not self.total:
+            return 100 if self.state == "done" else 0
+        return min(100, round(100 * self.processed / self.total))
@@ -0,0 +1,227 @@
+"""
+Local poster proxy.
+
+Posters are fetched from TMDB once, resized to POSTER_WIDTHS and
+stored as WebP under POSTER_CACHE_DIR; after that they are served
+from local disk, so pages do not depend on TMDB's image CDN.
+
+On disk:
+- <hash[:2]>/<hash>.webp   one file per variant, named by the SHA-256
+                           of its bytes (identical images stored once)
+- index/<poster>.json      {"92": "<hash>", "154": ..., "300": ...}
+
+Files are written to a temp name and renamed into place, so a
+concurrent reader never sees a partial image. TMDB poster paths never
+change content, so every variant URL can be cached as immutable.
+
+Rendering a poster that is not on disk yet (a "cold" render) costs a
+TMDB download and a resize per width, so:
+- Only one request renders a given poster at a time (a lock in the
+  default cache, shared between dynos with Redis); others wait up to
+  POSTER_RENDER_WAIT seconds for its result
+- A poster TMDB could not provide is remembered for
+  POSTER_MISSING_TTL seconds instead of being fetched on every request
+- The view limits cold renders per client (POSTER_COLD_RENDER_RATE)
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, UnidentifiedImageError
+
+from . import tmdb
+
+
+logger = logging.getLogger(__name__)
+
+# TMDB file names: "/kqjL17yufvn9OVLyXYpvtyrFfak.jpg"
+POSTER_FILE_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}\.(jpg|jpeg|png|webp)$")
+
+# Largest TMDB size we need to produce every variant
+SOURCE_SIZE = "w342"
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+WEBP_QUALITY = 80
+
+# Longest a render may hold its lock: the TMDB timeouts plus resizing
+RENDER_LOCK_TIMEOUT = 60
+
+
+class PosterError(Exception):
+    """
+    Raised when a poster cannot be fetched or decoded.
+    """
+
+
+def is_valid_poster_file(poster_file):
+    return bool(POSTER_FILE_RE.match(poster_file or ""))
+
+
+def is_valid_poster_path(poster_path):
+    # As stored on CatalogMovie: "/" followed by the file name
+    return (
+        isinstance(poster_path, str)
+        and poster_path.startswith("/")
+        and is_valid_poster_file(poster_path[1:])
+    )
+
+
+def _root():
+    return Path(settings.POSTER_CACHE_DIR)
+
+
+def _index_path(poster_file):
+    return _root() / "index" / f"{poster_file}.json"
+
+
+def variant_path(digest):
+    return _root() / digest[:2] / f"{digest}.webp"
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+# -------------------------------------------------------------
+# FETCH + RESIZE
+# -------------------------------------------------------------
+def fetch_source(poster_file):
+    url = f"{settings.TMDB_IMAGE_BASE_URL.rstrip('/')}/{SOURCE_SIZE}/{poster_file}"
+    try:
+        response = tmdb.get_session().get(
+            url,
+            headers={"Accept": "image/*"},
+            timeout=(settings.TMDB_CONNECT_TIMEOUT, settings.TMDB_READ_TIMEOUT),
+        )
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        raise PosterError(f"Could not fetch {url}: {exc}") from exc
+
+    if len(response.content) > MAX_SOURCE_BYTES:
+        raise PosterError(f"{url} is larger than {MAX_SOURCE_BYTES} bytes")
+    return response.content
+
+
+def render_variants(source):
+    """
+    Returns {width: WebP bytes} for every width in POSTER_WIDTHS.
+    """
+    try:
+        image = Image.open(io.BytesIO(source))
+        image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise PosterError(f"Not a usable image: {exc}") from exc
+
+    variants = {}
+    for width in settings.POSTER_WIDTHS:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+        variants[width] = buffer.getvalue()
+    return variants
+
+
+def store_variants(poster_file, variants):
+    index = {}
+    for width, data in variants.items():
+        digest = hashlib.sha256(data).hexdigest()
+        path = variant_path(digest)
+        if not path.exists():
+            _write_atomic(path, data)
+        index[str(width)] = digest
+
+    # Index last: once it exists, every file it names exists too
+    _write_atomic(_index_path(poster_file), json.dumps(index).encode())
+    return index
+
+
+# -------------------------------------------------------------
+# LOOKUP
+# -------------------------------------------------------------
+def cached_variant(poster_file, width):
+    """
+    Returns the path of the WebP variant if the poster is on disk,
+    else None. An index written before `width` was added to
+    POSTER_WIDTHS counts as a miss, so the poster is rendered again.
+    """
+    try:
+        index = json.loads(_index_path(poster_file).read_bytes())
+    except FileNotFoundError:
+        return None
+    digest = index.get(str(width))
+    return variant_path(digest) if digest else None
+
+
+def _missing_key(poster_file):
+    return f"poster:missing:{poster_file}"
+
+
+def _wait_for_render(poster_file, width):
+    deadline = time.monotonic() + settings.POSTER_RENDER_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        path = cached_variant(poster_file, width)
+        if path is not None:
+            return path
+        error = cache.get(_missing_key(poster_file))
+        if error:
+            raise PosterError(error)
+    raise PosterError(f"{poster_file} is still being rendered")
+
+
+def get_variant(poster_file, width):
+    """
+    Returns the path of the WebP variant, fetching and resizing the
+    poster first if it is not on disk yet.
+    Raises PosterError if TMDB cannot provide it (now or within the
+    last POSTER_MISSING_TTL seconds).
+    """
+    path = cached_variant(poster_file, width)
+    if path is not None:
+        return path
+
+    error = cache.get(_missing_key(poster_file))
+    if error:
+        raise PosterError(error)
+
+    lock_key = f"poster:render:{poster_file}"
+    if not cache.add(lock_key, True, timeout=RENDER_LOCK_TIMEOUT):
+        return _wait_for_render(poster_file, width)
+
+    try:
+        # It may have been rendered between the checks above and the lock
+        path = cached_variant(poster_file, width)
+        if path is not None:
+            return path
+
+        try:
+            source = fetch_source(poster_file)
+            index = store_variants(poster_file, render_variants(source))
+        except PosterError as exc:
+            cache.set(_missing_key(poster_file), str(exc), timeout=settings.POSTER_MISSING_TTL)
+            raise
+        logger.info(
+            "Poster cached",
+            extra={"poster": poster_file, "source_bytes": len(source)},
+        )
+        return variant_path(index[str(width)])
+    finally:
+        cache.delete(lock_key)
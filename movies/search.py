@@ -0,0 +1,90 @@
+"""
+Full-text search over the local movie catalog.
+
+The index is created by migration 0007_catalog_search_index and
+depends on the database:
+- PostgreSQL: GIN index on to_tsvector('english', title || ' ' || overview)
+- SQLite: FTS5 table (movies_catalogmovie_fts) kept in sync by triggers
+Other databases fall back to a plain title__icontains scan.
+
+Results are ranked by text relevance, then popularity.
+"""
+
+import re
+
+from django.db import connection
+
+from .models import CatalogMovie
+
+
+SEARCH_VECTOR = "to_tsvector('english', title || ' ' || overview)"
+FTS_TABLE = "movies_catalogmovie_fts"
+
+
+def _postgres_query(query, limit):
+    return CatalogMovie.objects.raw(
+        f"""
+        SELECT *
+        FROM movies_catalogmovie
+        WHERE {SEARCH_VECTOR} @@ websearch_to_tsquery('english', %s)
+          AND NOT adult
+        ORDER BY ts_rank({SEARCH_VECTOR}, websearch_to_tsquery('english', %s)) DESC,
+                 popularity DESC
+        LIMIT %s
+        """,
+        [query, query, limit],
+    )
+
+
+def fts5_match_expression(query):
+    """
+    Turns free text into a safe FTS5 MATCH expression: every word is
+    quoted (so user input can't inject FTS syntax) and the last word
+    is a prefix match, so "dark kni" still finds "The Dark Knight".
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _sqlite_query(query, limit):
+    return CatalogMovie.objects.raw(
+        f"""
+        SELECT c.*
+        FROM {FTS_TABLE} f
+        JOIN movies_catalogmovie c ON c.tmdb_id = f.rowid
+        WHERE {FTS_TABLE} MATCH %s
+          AND NOT c.adult
+        ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), c.popularity DESC
+        LIMIT %s
+        """,
+        [fts5_match_expression(query), limit],
+    )
+
+
+def _catalog_query(query, limit):
+    if connection.vendor == "postgresql":
+        return _postgres_query(query, limit)
+    if connection.vendor == "sqlite":
+        if not fts5_match_expression(query):
+            return CatalogMovie.objects.none()
+        return _sqlite_query(query, limit)
+    return (
+        CatalogMovie.objects
+        .filter(title__icontains=query, adult=False)
+        .order_by("-popularity")[:limit]
+    )
+
+
+def search_catalog(query, limit=40):
+    """
+    Returns up to `limit` CatalogMovie rows matching the query.
+    """
+    return list(_catalog_query(query, limit))
+
+
+async def asearch_catalog(query, limit=40):
+    return [movie async for movie in _catalog_query(query, limit)]
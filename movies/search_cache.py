@@ -0,0 +1,93 @@
+"""
+Cache for TMDB search results.
+
+Search results are stored in a dedicated Django cache alias so the
+backend can be swapped per environment:
+- Locally: LocMemCache (per-process, LRU eviction once MAX_ENTRIES is hit)
+- Production: a shared cache (e.g. Redis) configured in settings
+
+Keys are built from the *normalised* query, language and page, so
+"Batman", " batman " and "BATMAN" all share one cache entry.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# -------------------------------------------------------------
+# HIT / MISS COUNTERS (per process)
+# -------------------------------------------------------------
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def get_stats():
+    """
+    Returns a snapshot of this process's hit/miss counters.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+# -------------------------------------------------------------
+# KEY HELPERS
+# -------------------------------------------------------------
+def normalize_query(query):
+    """
+    Lower-cases the query and collapses runs of whitespace so
+    trivially different searches map to the same cache entry.
+    """
+    return " ".join((query or "").split()).casefold()
+
+
+def search_cache_key(query, language, page):
+    """
+    Builds a fixed-length cache key (hashing keeps arbitrary user
+    input from producing keys that memcached/redis would reject).
+    """
+    raw = f"{normalize_query(query)}|{language}|{page}"
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    # v2: entries are {"results", "total_pages"} rather than a list
+    return f"tmdb:search:v2:{digest}"
+
+
+def _cache():
+    return caches[settings.TMDB_SEARCH_CACHE_ALIAS]
+
+
+# -------------------------------------------------------------
+# PUBLIC API
+# -------------------------------------------------------------
+def get_cached_search(query, language, page):
+    """
+    Returns the cached page ({"results": [...], "total_pages": n}),
+    or None on a miss.
+    """
+    cached = _cache().get(search_cache_key(query, language, page))
+    _record("misses" if cached is None else "hits")
+    return cached
+
+
+def cache_search(query, language, page, data):
+    """
+    Stores one page of results for the configured TTL.
+    """
+    _cache().set(
+        search_cache_key(query, language, page),
+        data,
+        timeout=settings.TMDB_SEARCH_CACHE_TTL,
+    )
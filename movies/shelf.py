@@ -0,0 +1,147 @@
+"""
+Shelf section loading with keyset pagination.
+
+Each shelf section (to_put_away / to_watch / watched) is read one page
+at a time, newest first, ordered by (updated_at, id). The next page
+starts strictly after the last row of the previous one, so the cost of
+a page stays the same however large the shelf is (no OFFSET scans).
+
+Rendered sections are cached per user under a shelf version number.
+Any write to the user's shelf bumps the version (movies/signals.py for
+save/delete, bump_shelf_version() after bulk writes), so a cached
+section is never served after the shelf changed.
+"""
+
+import base64
+import binascii
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.middleware.csrf import get_token
+from django.utils.functional import cached_property
+
+from .models import Movie
+
+
+SECTION_STATUSES = ("to_put_away", "to_watch", "watched")
+
+# Only the columns the shelf cards render
+CARD_FIELDS = (
+    "id", "status", "rating", "updated_at",
+    "catalog__title", "catalog__poster_path",
+)
+
+
+# -------------------------------------------------------------
+# SHELF VERSION (fragment cache invalidation)
+# -------------------------------------------------------------
+def _version_key(user_id):
+    return f"shelf:version:{user_id}"
+
+
+def shelf_version(user_id):
+    """
+    Current version of a user's shelf. A missing key starts from the
+    clock rather than 1, so a version evicted from the cache can
+    never come back with a number older fragments were cached under.
+    """
+    key = _version_key(user_id)
+    cache.add(key, time.time_ns(), timeout=None)
+    return cache.get(key)
+
+
+def bump_shelf_version(*user_ids):
+    """
+    Marks the shelves of `user_ids` as changed. Call after writes
+    that do not send model signals (update(), bulk_create()).
+    """
+    for user_id in set(user_ids):
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def fragment_vary(request):
+    """
+    What a cached shelf fragment varies on: the user, their shelf
+    version and their CSRF secret (the cards contain CSRF tokens,
+    which must match the current secret after a new login).
+    """
+    get_token(request)  # makes sure the secret exists
+    return f"{request.user.id}:{shelf_version(request.user.id)}:{request.META['CSRF_COOKIE']}"
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a "load more" cursor cannot be decoded.
+    """
+
+
+def encode_cursor(movie):
+    raw = f"{movie.updated_at.isoformat()}|{movie.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        updated_at, movie_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(updated_at), int(movie_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+class ShelfSection:
+    """
+    One page of a user's shelf section.
+
+    Nothing is queried until `movies` / `has_more` / `next_cursor`
+    is first used, so a section whose HTML is already cached never
+    touches the database.
+    """
+
+    def __init__(self, user, status, after=None, page_size=None):
+        self.user = user
+        self.status = status
+        self.after = decode_cursor(after) if after else None
+        self.page_size = page_size or settings.SHELF_PAGE_SIZE
+
+    def queryset(self):
+        movies = (
+            Movie.objects
+            .filter(user=self.user, status=self.status)
+            .select_related("catalog")
+            .only(*CARD_FIELDS)
+            .order_by("-updated_at", "-id")
+        )
+        if self.after:
+            updated_at, movie_id = self.after
+            movies = movies.filter(
+                Q(updated_at__lt=updated_at)
+                | Q(updated_at=updated_at, id__lt=movie_id)
+            )
+        return movies
+
+    @cached_property
+    def _page(self):
+        # One extra row tells us whether another page exists
+        return list(self.queryset()[:self.page_size + 1])
+
+    @property
+    def movies(self):
+        return self._page[:self.page_size]
+
+    @property
+    def has_more(self):
+        return len(self._page) > self.page_size
+
+    @property
+    def next_cursor(self):
+        if not self.has_more:
+            return ""
+        return encode_cursor(self.movies[-1])
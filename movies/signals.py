@@ -0,0 +1,20 @@
+# ---------------------------------------------------------------
+# MOVIES SIGNALS
+# - Any saved or deleted shelf row bumps its owner's shelf version,
+#   so cached shelf sections are re-rendered on the next visit
+#   (see movies/shelf.py)
+# - Bulk writes (update(), bulk_create()) send no signals and call
+#   bump_shelf_version() themselves
+# ---------------------------------------------------------------
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Movie
+from .shelf import bump_shelf_version
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def shelf_changed(sender, instance, **kwargs):
+    bump_shelf_version(instance.user_id)
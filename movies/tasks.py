@@ -0,0 +1,122 @@
+"""
+Background tasks for the movies app (run by the job worker, see
+jobs/queue.py). Imported from MoviesConfig.ready() so they are
+registered in every process.
+
+- movies.enrich_catalog: fetches a film's full TMDB record into its
+  CatalogMovie row (queued when a film is first shelved)
+- movies.refresh_stale_catalog: hourly, queues enrichment for shelved
+  films never enriched or not refreshed for CATALOG_REFRESH_DAYS
+- movies.bulk_update: applies a large admin bulk action in chunks
+"""
+
+import datetime
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import PermanentFailure, enqueue, task
+
+from . import bulk_updates, tmdb
+from .models import BulkUpdateTask, CatalogMovie, Movie
+
+
+logger = logging.getLogger(__name__)
+
+TITLE_MAX_LENGTH = CatalogMovie._meta.get_field("title").max_length
+POSTER_MAX_LENGTH = CatalogMovie._meta.get_field("poster_path").max_length
+
+
+# -------------------------------------------------------------
+# CATALOG ENRICHMENT
+# -------------------------------------------------------------
+def queue_enrichment(tmdb_id, force=False):
+    """
+    Queues enrichment for one film, unless one is already queued or
+    (without `force`) the film has been enriched before. Returns the
+    Job, or None if nothing was queued.
+    """
+    key = f"enrich:{tmdb_id}"
+    if not force:
+        # One SELECT, so repeat adds of a known film stay cheap
+        active = Job.objects.filter(key=key, state__in=["queued", "running"])
+        if CatalogMovie.objects.filter(pk=tmdb_id).filter(
+            Q(enriched_at__isnull=False) | Exists(active)
+        ).exists():
+            return None
+    return enqueue("movies.enrich_catalog", key=key, tmdb_id=tmdb_id)
+
+
+def _release_date(value):
+    try:
+        return datetime.date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def catalog_fields(record):
+    """
+    Maps a TMDB movie record to CatalogMovie fields.
+    """
+    title = (record.get("title") or record.get("original_title") or "").strip()
+    return {
+        "title": title[:TITLE_MAX_LENGTH],
+        "original_title": (record.get("original_title") or "")[:TITLE_MAX_LENGTH],
+        "poster_path": (record.get("poster_path") or "")[:POSTER_MAX_LENGTH],
+        "release_date": _release_date(record.get("release_date")),
+        "vote_average": record.get("vote_average"),
+        "genres": [genre["name"] for genre in record.get("genres") or [] if "name" in genre],
+        "overview": record.get("overview") or "",
+        "popularity": record.get("popularity") or 0,
+        "adult": bool(record.get("adult")),
+    }
+
+
+@task("movies.enrich_catalog")
+def enrich_catalog(tmdb_id):
+    try:
+        record = tmdb.movie_details(tmdb_id)
+    except tmdb.TMDBError as exc:
+        if exc.status == 404:
+            # Gone from TMDB: keep what we have, stop asking
+            CatalogMovie.objects.filter(pk=tmdb_id).update(enriched_at=timezone.now())
+            raise PermanentFailure(str(exc)) from exc
+        raise  # retried with backoff
+
+    fields = catalog_fields(record)
+    if not fields["title"]:
+        raise PermanentFailure(f"TMDB record {tmdb_id} has no title")
+
+    now = timezone.now()
+    # update() bypasses auto_now, so the timestamp is set explicitly
+    CatalogMovie.objects.filter(pk=tmdb_id).update(**fields, enriched_at=now, updated_at=now)
+
+
+@task("movies.refresh_stale_catalog", every=60 * 60)
+def refresh_stale_catalog():
+    cutoff = timezone.now() - timedelta(days=settings.CATALOG_REFRESH_DAYS)
+    stale = (
+        CatalogMovie.objects
+        .filter(Q(enriched_at__isnull=True) | Q(enriched_at__lt=cutoff))
+        .filter(Exists(Movie.objects.filter(catalog=OuterRef("pk"))))
+        .order_by(F("enriched_at").asc(nulls_first=True))
+        .values_list("pk", flat=True)[: settings.CATALOG_REFRESH_BATCH]
+    )
+
+    queued = sum(1 for tmdb_id in stale if queue_enrichment(tmdb_id, force=True))
+    logger.info("Catalog refresh queued", extra={"queued": queued})
+
+
+# -------------------------------------------------------------
+# ADMIN BULK ACTIONS
+# -------------------------------------------------------------
+@task("movies.bulk_update")
+def bulk_update(task_id):
+    # A task left "running" means an earlier attempt stopped part way
+    # (its job lock lapsed); it continues after the last chunk
+    BulkUpdateTask.objects.filter(pk=task_id, state="running").update(state="pending")
+    bulk_updates.run_task(task_id)
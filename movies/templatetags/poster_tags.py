@@ -0,0 +1,49 @@
+# ---------------------------------------------------------------
+# POSTER TEMPLATE TAGS
+# - {% poster_img movie.poster_path alt="..." %} renders a lazy
+#   <img> whose srcset lists every locally cached WebP width
+#   (see movies/posters.py), so the browser downloads the smallest
+#   poster that is sharp at the card's size
+# ---------------------------------------------------------------
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.html import format_html
+
+from movies.posters import is_valid_poster_file
+
+
+register = template.Library()
+
+# Rendered width of poster images on cards (see shelf.css / main.css)
+DEFAULT_SIZES = "140px"
+
+
+@register.simple_tag
+def poster_img(poster_path, alt="", sizes=DEFAULT_SIZES):
+    fallback = static("images/movie-poster-unavailable.jpg")
+    poster_file = (poster_path or "").lstrip("/")
+
+    if not is_valid_poster_file(poster_file):
+        return format_html(
+            '<img src="{}" alt="{}" loading="lazy" decoding="async">', fallback, alt
+        )
+
+    urls = {
+        width: reverse("poster", args=[width, poster_file])
+        for width in settings.POSTER_WIDTHS
+    }
+    srcset = ", ".join(f"{url} {width}w" for width, url in urls.items())
+    # src for browsers without srcset support: the smallest variant
+    # that still fills the card
+    src = next(
+        (url for width, url in urls.items() if width >= 140), urls[max(urls)]
+    )
+
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" decoding="async" '
+        "onerror=\"this.onerror=null; this.srcset=''; this.src='{}'\">",
+        src, srcset, sizes, alt, fallback,
+    )
@@ -1,7 +1,40 @@
-from django.test import TestCase, Client
+import datetime
+import gzip
+import json
+import logging
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+from wsgiref.simple_server import make_server
+from wsgiref.util import setup_testing_defaults
+
+import requests
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.admin.sites import site as admin_site
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.template import Context, Template
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.urls import reverse
-from movies.models import Movie
+from django.utils import timezone
+from PIL import Image
+from movies import search, search_cache, tmdb
+from movies.autocomplete import autocomplete_index
+from movies.management.commands.tmdb_standin import QuietHandler
+from jobs.models import Job
+from jobs.worker import run_due
+from movies import bulk_updates, posters, tasks
+from movies.models import BulkUpdateTask, CatalogMovie, Movie
+from movies.shelf import bump_shelf_version, shelf_version
+from movies.tmdb_standin import make_app, record_response
+from quickflicks.pagination import EstimatedCountPaginator
 
 
 class MovieTests(TestCase):
@@ -72,6 +105,55 @@ class MovieTests(TestCase):
         self.assertEqual(movie.title, "Test Movie")
         self.assertEqual(movie.user, self.user)
 
+    def test_catalog_entry_is_shared_between_users(self):
+        """
+        Two users saving the same film should share one catalog row.
+        """
+        other = User.objects.create_user(username="other", password="password123")
+        film = {"tmdb_id": "12345", "title": "Test Movie", "poster_path": "/abc.jpg"}
+
+        self.client.login(username="tester", password="password123")
+        self.client.post(reverse("add_to_shelf"), film)
+        self.client.login(username="other", password="password123")
+        self.client.post(reverse("add_to_shelf"), {**film, "title": "Renamed"})
+
+        self.assertEqual(CatalogMovie.objects.count(), 1)
+        self.assertEqual(Movie.objects.count(), 2)
+
+        catalog = CatalogMovie.objects.get()
+        self.assertEqual(catalog.title, "Test Movie")
+        self.assertEqual(
+            Movie.objects.get(user=other).poster_url,
+            "https://image.tmdb.org/t/p/w300/abc.jpg",
+        )
+
+    def test_adding_twice_keeps_one_shelf_row(self):
+        """
+        A double-click on "Add to Shelf" must not create a duplicate,
+        and the second insert must not reset the movie's status.
+        """
+        self.client.login(username="tester", password="password123")
+        film = {"tmdb_id": "12345", "title": "Test Movie", "poster_path": "/abc.jpg"}
+
+        self.client.post(reverse("add_to_shelf"), film)
+        Movie.objects.update(status="watched")
+        # session + user, two inserts, then one SELECT finds the
+        # enrichment job already queued
+        with self.assertNumQueries(2 + 2 + 1):
+            self.client.post(reverse("add_to_shelf"), film)
+
+        self.assertEqual(Movie.objects.get().status, "watched")
+
+    def test_shelf_rows_are_unique_per_user_and_film(self):
+        """
+        The database itself rejects a second row for the same film.
+        """
+        catalog = CatalogMovie.objects.create(tmdb_id=1, title="Test Film")
+        Movie.objects.create(user=self.user, catalog=catalog)
+
+        with self.assertRaises(IntegrityError):
+            Movie.objects.create(user=self.user, catalog=catalog)
+
     def test_change_status(self):
         """
         Test the change_status view.
@@ -81,8 +163,7 @@ class MovieTests(TestCase):
 
         movie = Movie.objects.create(
             user=self.user,
-            tmdb_id="1",
-            title="Test Film",
+            catalog=CatalogMovie.objects.create(tmdb_id=1, title="Test Film"),
             status="to_watch",
         )
 
@@ -93,3 +174,1214 @@ class MovieTests(TestCase):
 
         movie.refresh_from_db()
         self.assertEqual(movie.status, "watched")
+
+
+@override_settings(TMDB_API_KEY="test-key", TMDB_SEARCH_PAGES=1)
+class SearchCacheTests(TestCase):
+    """
+    Tests for the TMDB search-result cache used by the home page:
+    - Repeat searches are served from the cache (one TMDB call)
+    - Queries are normalised before building the cache key
+    - Hit / miss counters are recorded
+    """
+
+    def setUp(self):
+        caches[settings.TMDB_SEARCH_CACHE_ALIAS].clear()
+        search_cache.reset_stats()
+        self.client = Client()
+
+    def fake_tmdb_response(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {
+            "results": [{"id": 268, "title": "Batman", "poster_path": "/b.jpg"}]
+        }
+        return response
+
+    def test_repeat_search_uses_cache(self):
+        """
+        The second identical search should not call TMDB again.
+        """
+        session = mock.Mock()
+        session.get.return_value = self.fake_tmdb_response()
+
+        with mock.patch("movies.tmdb.get_session", return_value=session):
+            first = self.client.get(reverse("home"), {"query": "Batman"})
+            second = self.client.get(reverse("home"), {"query": "  BATMAN "})
+
+        self.assertEqual(session.get.call_count, 1)
+        self.assertContains(first, "Batman")
+        self.assertContains(second, "Batman")
+        self.assertEqual(search_cache.get_stats(), {"hits": 1, "misses": 1})
+
+    def test_cache_key_is_normalised(self):
+        self.assertEqual(
+            search_cache.search_cache_key("The  Dark Knight", "en-US", 1),
+            search_cache.search_cache_key(" the dark knight ", "en-US", 1),
+        )
+        self.assertNotEqual(
+            search_cache.search_cache_key("dune", "en-US", 1),
+            search_cache.search_cache_key("dune", "en-US", 2),
+        )
+
+    def test_failed_search_is_not_cached(self):
+        """
+        TMDB errors should show the error message and not poison the cache.
+        """
+        session = mock.Mock()
+        session.get.side_effect = requests.ConnectionError("down")
+
+        with mock.patch("movies.tmdb.get_session", return_value=session), \
+                mock.patch("movies.tmdb.time.sleep"):
+            response = self.client.get(reverse("home"), {"query": "dune"})
+
+        self.assertEqual(
+            response.context["tmdb_error"], "There was a problem contacting TMDB."
+        )
+        self.assertIsNone(search_cache.get_cached_search("dune", "en-US", 1))
+
+
+@override_settings(TMDB_API_KEY="test-key", TMDB_MAX_RETRIES=2)
+class TMDBClientTests(TestCase):
+    """
+    Tests for the shared TMDB client (movies/tmdb.py):
+    - Rate-limited / 5xx responses are retried, honouring Retry-After
+    - Client errors are not retried
+    - The pooled session is reused between calls
+    """
+
+    def make_response(self, status, headers=None, payload=None):
+        response = mock.Mock(status_code=status, headers=headers or {})
+        response.json.return_value = payload or {}
+        return response
+
+    def test_retries_429_using_retry_after(self):
+        session = mock.Mock()
+        session.get.side_effect = [
+            self.make_response(429, {"Retry-After": "1"}),
+            self.make_response(200, payload={"results": []}),
+        ]
+
+        with mock.patch("movies.tmdb.get_session", return_value=session), \
+                mock.patch("movies.tmdb.time.sleep") as sleep:
+            data = tmdb.request("search/movie", {"query": "dune"})
+
+        self.assertEqual(data, {"results": []})
+        self.assertEqual(session.get.call_count, 2)
+        sleep.assert_called_once_with(1.0)
+
+    def test_retry_after_http_date_without_zone(self):
+        # "-0000" is RFC-legal and parses as a naive datetime
+        retry_at = timezone.now() + datetime.timedelta(seconds=3)
+        header = retry_at.strftime("%a, %d %b %Y %H:%M:%S -0000")
+        session = mock.Mock()
+        session.get.side_effect = [
+            self.make_response(503, {"Retry-After": header}),
+            self.make_response(200, payload={"results": []}),
+        ]
+
+        with mock.patch("movies.tmdb.get_session", return_value=session), \
+                mock.patch("movies.tmdb.time.sleep") as sleep:
+            self.assertEqual(tmdb.request("search/movie"), {"results": []})
+
+        self.assertAlmostEqual(sleep.call_args.args[0], 3, delta=1.5)
+
+    def test_client_error_is_not_retried(self):
+        session = mock.Mock()
+        session.get.return_value = self.make_response(401)
+
+        with mock.patch("movies.tmdb.get_session", return_value=session):
+            with self.assertRaises(tmdb.TMDBError):
+                tmdb.request("search/movie")
+
+        self.assertEqual(session.get.call_count, 1)
+
+    def test_gives_up_after_max_retries(self):
+        session = mock.Mock()
+        session.get.return_value = self.make_response(503)
+
+        with mock.patch("movies.tmdb.get_session", return_value=session), \
+                mock.patch("movies.tmdb.time.sleep"):
+            with self.assertRaises(tmdb.TMDBError):
+                tmdb.request("search/movie")
+
+        self.assertEqual(session.get.call_count, 3)
+
+    def test_session_is_reused(self):
+        self.assertIs(tmdb.get_session(), tmdb.get_session())
+
+
+@override_settings(TMDB_API_KEY="test-key", TMDB_SEARCH_PAGES=3)
+class AsyncSearchTests(TestCase):
+    """
+    Tests for the async search view:
+    - Result pages are fetched together and merged in page order
+    - Pages past TMDB's total_pages are not requested
+    - A failing later page does not break the search
+    - Logged-in users still see which results are already shelved
+    - Under ASGI no middleware forces the view onto the sync thread
+    """
+
+    def setUp(self):
+        caches[settings.TMDB_SEARCH_CACHE_ALIAS].clear()
+
+    @override_settings(DEBUG=True)
+    def test_asgi_chain_stays_async(self):
+        # Django logs each middleware it has to adapt (with DEBUG on)
+        with self.assertLogs("django.request", "DEBUG") as logs:
+            logging.getLogger("django.request").debug("handler built")
+            handler = ASGIHandler()
+
+        self.assertEqual(logs.output, ["DEBUG:django.request:handler built"])
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+
+    def fake_search(self, query, page, language, total_pages=5):
+        if page == 3:
+            raise tmdb.TMDBError("page 3 failed")
+        return [
+            {"id": page * 10, "title": f"Page {page} film"},
+            {"id": 1, "title": "Duplicate film"},
+        ], total_pages
+
+    def test_pages_are_merged_in_order(self):
+        with mock.patch("movies.tmdb.search_page", side_effect=self.fake_search):
+            response = self.client.get(reverse("home"), {"query": "film"})
+
+        titles = [movie["title"] for movie in response.context["movies"]]
+        self.assertEqual(titles, ["Page 1 film", "Duplicate film", "Page 2 film"])
+
+    def test_pages_past_the_last_are_not_fetched(self):
+        def single_page(query, page, language):
+            return self.fake_search(query, page, language, total_pages=1)
+
+        with mock.patch("movies.tmdb.search_page", side_effect=single_page) as search_page:
+            response = self.client.get(reverse("home"), {"query": "film"})
+
+        self.assertEqual(search_page.call_count, 1)
+        self.assertEqual(len(response.context["movies"]), 2)
+
+    def test_first_page_failure_shows_error(self):
+        with mock.patch("movies.tmdb.search_page",
+                        side_effect=tmdb.TMDBError("down")):
+            response = self.client.get(reverse("home"), {"query": "film"})
+
+        self.assertEqual(
+            response.context["tmdb_error"], "There was a problem contacting TMDB."
+        )
+
+    def test_logged_in_user_sees_shelved_results(self):
+        user = User.objects.create_user(username="tester", password="password123")
+        Movie.objects.create(
+            user=user,
+            catalog=CatalogMovie.objects.create(tmdb_id=10, title="Page 1 film"),
+        )
+        self.client.login(username="tester", password="password123")
+
+        with mock.patch("movies.tmdb.search_page", side_effect=self.fake_search):
+            response = self.client.get(reverse("home"), {"query": "film"})
+
+        self.assertContains(response, "Already in Your Shelf", count=1)
+
+    def test_shelf_lookup_does_not_grow_with_shelf(self):
+        """
+        Only the result ids are looked up: same queries, same result,
+        whether the shelf holds 1 film or 500.
+        """
+        user = User.objects.create_user(username="tester", password="password123")
+        Movie.objects.create(
+            user=user,
+            catalog=CatalogMovie.objects.create(tmdb_id=10, title="Page 1 film"),
+            status="watched",
+        )
+        self.client.login(username="tester", password="password123")
+
+        def search_with_queries():
+            caches[settings.TMDB_SEARCH_CACHE_ALIAS].clear()
+            with mock.patch("movies.tmdb.search_page", side_effect=self.fake_search):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse("home"), {"query": "film"})
+            return response, len(queries)
+
+        small, small_queries = search_with_queries()
+
+        catalog = CatalogMovie.objects.bulk_create(
+            CatalogMovie(tmdb_id=tmdb_id, title=f"Film {tmdb_id}")
+            for tmdb_id in range(1000, 1500)
+        )
+        Movie.objects.bulk_create(Movie(user=user, catalog=film) for film in catalog)
+        large, large_queries = search_with_queries()
+
+        self.assertEqual(large_queries, small_queries)
+        self.assertEqual(
+            [(m["id"], m["in_shelf"], m["shelf_status"]) for m in large.context["movies"]],
+            [(m["id"], m["in_shelf"], m["shelf_status"]) for m in small.context["movies"]],
+        )
+        self.assertContains(large, "Already in Your Shelf · Watched", count=1)
+
+    async def test_search_under_asgi(self):
+        """
+        Under ASGI the view must not touch the ORM synchronously
+        (that would raise SynchronousOnlyOperation).
+        """
+        user = await User.objects.acreate_user(
+            username="tester", password="password123"
+        )
+        catalog = await CatalogMovie.objects.acreate(tmdb_id=20, title="Page 2 film")
+        await Movie.objects.acreate(user=user, catalog=catalog)
+        await self.async_client.aforce_login(user)
+
+        with mock.patch("movies.tmdb.search_page", side_effect=self.fake_search):
+            response = await self.async_client.get(reverse("home"), {"query": "film"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Already in Your Shelf", count=1)
+
+
+class TMDBStandInTests(TestCase):
+    """
+    Tests for the local TMDB stand-in (movies/tmdb_standin.py):
+    - The search page works end-to-end against recorded fixtures
+    - Responses recorded by the client are replayed unchanged
+    - Error injection returns the configured status
+    """
+
+    def setUp(self):
+        caches[settings.TMDB_SEARCH_CACHE_ALIAS].clear()
+
+    def start_standin(self, **options):
+        app = make_app(settings.TMDB_FIXTURES_DIR, **options)
+        server = make_server("127.0.0.1", 0, app, handler_class=QuietHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_port}/3"
+
+    def test_search_page_against_standin(self):
+        base_url = self.start_standin()
+
+        with self.settings(TMDB_API_KEY="offline", TMDB_BASE_URL=base_url):
+            response = self.client.get(reverse("home"), {"query": "Dune"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Dune: Part Two")
+
+    def test_unknown_search_returns_no_results(self):
+        base_url = self.start_standin()
+
+        with self.settings(TMDB_API_KEY="offline", TMDB_BASE_URL=base_url):
+            response = self.client.get(reverse("home"), {"query": "zzzz"})
+
+        self.assertContains(response, "No results found.")
+
+    def test_recorded_response_is_replayed(self):
+        payload = {"page": 1, "results": [{"id": 1, "title": "Recorded"}]}
+        params = {"query": "Recorded Film", "page": 1}
+
+        with tempfile.TemporaryDirectory() as root:
+            record_response(root, "search/movie", params, payload)
+            app = make_app(root)
+            environ = {}
+            setup_testing_defaults(environ)
+            environ["PATH_INFO"] = "/3/search/movie"
+            environ["QUERY_STRING"] = "query=recorded+film&page=1&api_key=x"
+            start_response = mock.Mock()
+
+            body = b"".join(app(environ, start_response))
+
+        self.assertEqual(start_response.call_args[0][0], "200 OK")
+        self.assertEqual(json.loads(body), payload)
+
+    def test_error_injection(self):
+        app = make_app(settings.TMDB_FIXTURES_DIR, error_rate=1.0, error_status=429)
+        environ = {}
+        setup_testing_defaults(environ)
+        start_response = mock.Mock()
+
+        app(environ, start_response)
+
+        status, headers = start_response.call_args[0]
+        self.assertTrue(status.startswith("429"))
+        self.assertIn(("Retry-After", "1"), headers)
+
+
+class ImportTMDBExportTests(TestCase):
+    """
+    Tests for the import_tmdb_export management command:
+    - Valid records are upserted, invalid / adult ones are skipped
+    - Existing catalog titles are not overwritten
+    - An interrupted import resumes from its checkpoint
+    """
+
+    def write_export(self, folder, records):
+        path = Path(folder) / "movie_ids.json.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(record if isinstance(record, str) else json.dumps(record))
+                handle.write("\n")
+        return path
+
+    def test_import_upserts_valid_records(self):
+        CatalogMovie.objects.create(tmdb_id=1, title="Localised Title", popularity=1)
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = self.write_export(folder, [
+                {"id": 1, "original_title": "Original", "popularity": 9.5, "adult": False},
+                {"id": 2, "original_title": "Second", "popularity": 3.0, "adult": False},
+                {"id": 2, "original_title": "Second", "popularity": 4.0, "adult": False},
+                {"id": 3, "original_title": "Adult", "popularity": 1.0, "adult": True},
+                {"id": "x", "original_title": "Broken"},
+                "not json",
+            ])
+            call_command("import_tmdb_export", str(path), batch_size=2, stdout=StringIO())
+            self.assertFalse(Path(f"{path}.checkpoint").exists())
+
+        self.assertEqual(
+            list(CatalogMovie.objects.order_by("tmdb_id").values_list(
+                "tmdb_id", "title", "original_title", "popularity"
+            )),
+            [(1, "Localised Title", "Original", 9.5), (2, "Second", "Second", 4.0)],
+        )
+
+    def test_import_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = self.write_export(folder, [
+                {"id": 1, "original_title": "Already imported"},
+                {"id": 2, "original_title": "Still to do"},
+            ])
+            Path(f"{path}.checkpoint").write_text("1")
+
+            call_command("import_tmdb_export", str(path), stdout=StringIO())
+
+        self.assertEqual(
+            list(CatalogMovie.objects.values_list("tmdb_id", flat=True)), [2]
+        )
+
+
+class LocalSearchTests(TestCase):
+    """
+    Tests for full-text search over the local catalog (movies/search.py):
+    - Matches on title and overview, best title matches first
+    - The last word is matched as a prefix
+    - The index follows catalog updates
+    - MOVIE_SEARCH_MODE controls whether TMDB is called
+    """
+
+    def setUp(self):
+        caches[settings.TMDB_SEARCH_CACHE_ALIAS].clear()
+        CatalogMovie.objects.create(
+            tmdb_id=155, title="The Dark Knight", popularity=90,
+            overview="Batman raises the stakes in his war on crime.",
+        )
+        CatalogMovie.objects.create(
+            tmdb_id=268, title="Batman", popularity=40,
+            overview="The Joker seizes control of Gotham.",
+        )
+        CatalogMovie.objects.create(tmdb_id=438631, title="Dune", popularity=100)
+
+    def titles(self, query):
+        return [movie.title for movie in search.search_catalog(query)]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.titles("batman"), ["Batman", "The Dark Knight"])
+
+    def test_last_word_is_prefix_matched(self):
+        self.assertEqual(self.titles("dark kni"), ["The Dark Knight"])
+
+    def test_fts_syntax_in_query_is_ignored(self):
+        self.assertEqual(self.titles('"dune*) ^'), ["Dune"])
+        self.assertEqual(self.titles("!!!"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        CatalogMovie.objects.filter(tmdb_id=438631).update(title="Dune: Part One")
+        self.assertEqual(self.titles("part"), ["Dune: Part One"])
+
+        CatalogMovie.objects.filter(tmdb_id=438631).delete()
+        self.assertEqual(self.titles("dune"), [])
+
+    @override_settings(MOVIE_SEARCH_MODE="local", TMDB_API_KEY="")
+    def test_local_mode_never_calls_tmdb(self):
+        with mock.patch("movies.tmdb.search_page") as search_page:
+            response = self.client.get(reverse("home"), {"query": "dune"})
+
+        search_page.assert_not_called()
+        self.assertEqual([m["id"] for m in response.context["movies"]], [438631])
+
+    @override_settings(MOVIE_SEARCH_MODE="local_first", TMDB_API_KEY="test-key",
+                       TMDB_SEARCH_PAGES=1)
+    def test_local_first_falls_back_to_tmdb(self):
+        remote = [{"id": 999, "title": "Remote Only"}]
+
+        with mock.patch("movies.tmdb.search_page", return_value=(remote, 1)) as search_page:
+            local = self.client.get(reverse("home"), {"query": "dune"})
+            fallback = self.client.get(reverse("home"), {"query": "remote"})
+
+        self.assertEqual(search_page.call_count, 1)
+        self.assertEqual(local.context["movies"][0]["title"], "Dune")
+        self.assertContains(fallback, "Remote Only")
+
+
+class AutocompleteTests(TestCase):
+    """
+    Tests for the search-as-you-type endpoint and its prefix index:
+    - Any word of a title can be prefix matched
+    - Suggestions are ordered by popularity and limited
+    - Catalog changes are merged in by an incremental refresh
+    """
+
+    def setUp(self):
+        CatalogMovie.objects.create(tmdb_id=155, title="The Dark Knight", popularity=90)
+        CatalogMovie.objects.create(tmdb_id=49026, title="The Dark Knight Rises", popularity=95)
+        CatalogMovie.objects.create(
+            tmdb_id=268, title="Batman", popularity=40,
+            release_date=datetime.date(1989, 6, 21),
+        )
+        autocomplete_index.build()
+
+    def test_prefix_matches_any_word(self):
+        response = self.client.get(reverse("autocomplete"), {"q": "Kni"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [movie["title"] for movie in response.json()["results"]],
+            ["The Dark Knight Rises", "The Dark Knight"],
+        )
+
+    def test_payload_is_small(self):
+        response = self.client.get(reverse("autocomplete"), {"q": "bat"})
+
+        self.assertEqual(
+            response.json(), {"results": [{"id": 268, "title": "Batman", "year": 1989}]}
+        )
+
+    def test_short_prefix_returns_nothing(self):
+        response = self.client.get(reverse("autocomplete"), {"q": "t"})
+        self.assertEqual(response.json(), {"results": []})
+
+    def test_lookup_needs_no_queries(self):
+        with self.assertNumQueries(0):
+            self.client.get(reverse("autocomplete"), {"q": "dark"})
+
+    def test_refresh_merges_changed_titles(self):
+        CatalogMovie.objects.filter(tmdb_id=268).update(
+            title="Batman Returns",
+            updated_at=timezone.now() + datetime.timedelta(seconds=1),
+        )
+        CatalogMovie.objects.create(tmdb_id=414906, title="The Batman", popularity=120)
+
+        autocomplete_index.refresh()
+        titles = [m["title"] for m in autocomplete_index.get().lookup("batman")]
+
+        self.assertEqual(titles, ["The Batman", "Batman Returns"])
+        self.assertEqual(autocomplete_index.get().lookup("return")[0]["id"], 268)
+
+
+@override_settings(SHELF_PAGE_SIZE=5)
+class ShelfPaginationTests(TestCase):
+    """
+    Tests for keyset-paginated shelf sections (movies/shelf.py):
+    - The shelf page costs the same number of queries however big it is
+    - "Load more" pages are newest first, without gaps or duplicates
+    - Bad cursors / sections are rejected and users only see their own films
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="shelver", password="pass12345")
+        self.client.login(username="shelver", password="pass12345")
+
+    def shelve(self, count, status="to_watch", user=None, start=1):
+        catalog = CatalogMovie.objects.bulk_create(
+            CatalogMovie(tmdb_id=tmdb_id, title=f"Film {tmdb_id}")
+            for tmdb_id in range(start, start + count)
+        )
+        Movie.objects.bulk_create(
+            Movie(user=user or self.user, catalog=film, status=status)
+            for film in catalog
+        )
+        bump_shelf_version((user or self.user).id)  # as every bulk write must
+
+    def shelf_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("my_shelf"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_flat(self):
+        self.shelve(3)
+        small = self.shelf_queries()
+
+        self.shelve(200, start=100)
+        self.shelve(50, status="watched", start=500)
+
+        self.assertEqual(self.shelf_queries(), small)
+
+    def test_load_more_walks_every_movie_once(self):
+        self.shelve(12)
+        # Identical timestamps: the id tie-breaker must keep pages apart
+        Movie.objects.update(updated_at=timezone.now())
+
+        response = self.client.get(reverse("my_shelf"))
+        seen = [movie.id for movie in response.context["to_watch"].movies]
+        cursor = response.context["to_watch"].next_cursor
+
+        while cursor:
+            page = self.client.get(
+                reverse("shelf_section", args=["to_watch"]), {"after": cursor}
+            )
+            section = page.context["section"]
+            seen += [movie.id for movie in section.movies]
+            cursor = section.next_cursor
+
+        expected = list(
+            Movie.objects.order_by("-updated_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_last_page_has_no_load_more(self):
+        self.shelve(3)
+        response = self.client.get(reverse("my_shelf"))
+        self.assertNotContains(response, "shelf-load-more")
+
+        self.shelve(5, start=10)
+        response = self.client.get(reverse("my_shelf"))
+        self.assertContains(response, "shelf-load-more", count=1)
+
+    def test_bad_cursor_and_section(self):
+        url = reverse("shelf_section", args=["to_watch"])
+        self.assertEqual(self.client.get(url, {"after": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse("shelf_section", args=["bin"])).status_code, 404
+        )
+
+    def test_sections_are_scoped_to_user(self):
+        other = User.objects.create_user(username="other", password="pass12345")
+        self.shelve(3, user=other)
+
+        response = self.client.get(reverse("shelf_section", args=["to_watch"]))
+        self.assertEqual(list(response.context["section"].movies), [])
+
+
+class ShelfBatchTests(TestCase):
+    """
+    Tests for the batch shelf endpoint (movies/batch.py):
+    - Many changes are applied with a fixed number of queries
+    - Only the logged-in user's movies are touched
+    - An invalid batch is rejected without writing anything
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="batcher", password="pass12345")
+        self.client.login(username="batcher", password="pass12345")
+        catalog = CatalogMovie.objects.bulk_create(
+            CatalogMovie(tmdb_id=tmdb_id, title=f"Film {tmdb_id}")
+            for tmdb_id in range(1, 41)
+        )
+        self.movies = Movie.objects.bulk_create(
+            Movie(user=self.user, catalog=film, status="to_put_away")
+            for film in catalog
+        )
+
+    def post(self, operations):
+        return self.client.post(
+            reverse("shelf_batch"),
+            data=json.dumps({"operations": operations}),
+            content_type="application/json",
+        )
+
+    def test_reorganising_forty_films_is_a_few_queries(self):
+        ids = [movie.id for movie in self.movies]
+        operations = (
+            [{"id": i, "action": "status", "value": "watched"} for i in ids[:20]]
+            + [{"id": i, "action": "rate", "value": "up"} for i in ids[:20]]
+            + [{"id": i, "action": "status", "value": "to_watch"} for i in ids[20:35]]
+            + [{"id": i, "action": "remove"} for i in ids[35:]]
+        )
+
+        # session + user, then savepoint, 3 updates, select + delete
+        # (rows are loaded so post_delete can fire), release
+        with self.assertNumQueries(2 + 7):
+            response = self.post(operations)
+
+        self.assertEqual(response.json(), {"added": 0, "updated": 55, "removed": 5})
+        self.assertEqual(Movie.objects.filter(status="watched", rating="up").count(), 20)
+        self.assertEqual(Movie.objects.filter(status="to_watch").count(), 15)
+        self.assertEqual(Movie.objects.count(), 35)
+
+    def test_add_from_search(self):
+        response = self.post([
+            {"action": "add", "tmdb_id": 155, "title": "The Dark Knight"},
+            {"action": "add", "tmdb_id": 1, "title": "Already shelved"},
+        ])
+
+        self.assertEqual(response.json()["added"], 1)
+        self.assertEqual(CatalogMovie.objects.get(tmdb_id=1).title, "Film 1")
+        self.assertTrue(Movie.objects.filter(user=self.user, catalog_id=155).exists())
+
+    def test_other_users_movies_are_ignored(self):
+        other = User.objects.create_user(username="other", password="pass12345")
+        theirs = Movie.objects.create(
+            user=other, catalog=CatalogMovie.objects.get(tmdb_id=1)
+        )
+
+        response = self.post([
+            {"id": theirs.id, "action": "status", "value": "watched"},
+            {"id": theirs.id, "action": "remove"},
+        ])
+
+        self.assertEqual(response.json(), {"added": 0, "updated": 0, "removed": 0})
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.status, "to_watch")
+
+    def test_invalid_batch_writes_nothing(self):
+        response = self.post([
+            {"id": self.movies[0].id, "action": "remove"},
+            {"id": self.movies[1].id, "action": "status", "value": "binned"},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Movie.objects.count(), 40)
+        self.assertEqual(
+            self.client.post(
+                reverse("shelf_batch"), data="{", content_type="application/json"
+            ).status_code,
+            400,
+        )
+
+    def test_add_values_must_fit_the_catalog(self):
+        bad_adds = [
+            {"tmdb_id": 1, "title": "x" * 256},
+            {"tmdb_id": 1, "title": ""},
+            {"tmdb_id": 99999999999, "title": "Too big"},
+            {"tmdb_id": 1, "title": "Dict poster", "poster_path": {}},
+            {"tmdb_id": 1, "title": "Long poster", "poster_path": "/" + "a" * 100 + ".jpg"},
+            {"tmdb_id": 1, "title": "Not a path", "poster_path": "../etc/passwd"},
+        ]
+        for add in bad_adds:
+            with self.subTest(add=add):
+                response = self.post([{"action": "add", **add}])
+                self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(CatalogMovie.objects.count(), 40)
+
+    def test_add_to_shelf_ignores_values_that_do_not_fit(self):
+        for form in (
+            {"tmdb_id": "155", "title": "x" * 256},
+            {"tmdb_id": "155", "title": "Bad poster", "poster_path": "/" + "a" * 100 + ".jpg"},
+            {"tmdb_id": "99999999999", "title": "Too big"},
+        ):
+            self.client.post(reverse("add_to_shelf"), form)
+
+        self.assertFalse(CatalogMovie.objects.filter(pk=155).exists())
+
+        self.client.post(
+            reverse("add_to_shelf"), {"tmdb_id": "155", "title": "Fine", "poster_path": "/ok.jpg"},
+        )
+        self.assertEqual(CatalogMovie.objects.get(pk=155).poster_path, "/ok.jpg")
+
+
+class ShelfFragmentTests(TestCase):
+    """
+    Tests for in-place shelf updates requested by shelf.js:
+    - Actions answer with just the affected card (or 204 on removal)
+    - Plain form posts keep redirecting to the shelf
+    - Other users' movies are not found
+    """
+
+    FETCH = {"HTTP_X_REQUESTED_WITH": "fetch"}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="swapper", password="pass12345")
+        self.client.login(username="swapper", password="pass12345")
+        self.movie = Movie.objects.create(
+            user=self.user,
+            catalog=CatalogMovie.objects.create(tmdb_id=155, title="The Dark Knight"),
+            status="to_watch",
+        )
+
+    def test_status_change_returns_moved_card(self):
+        url = reverse("change_status", args=[self.movie.id, "watched"])
+
+        # session + user, card SELECT, single-column UPDATE
+        with self.assertNumQueries(4):
+            response = self.client.post(url, **self.FETCH)
+
+        self.assertTemplateUsed(response, "movies/partials/shelf_card.html")
+        self.assertTemplateNotUsed(response, "movies/shelf.html")
+        self.assertContains(response, 'data-status="watched"')
+        self.assertContains(response, "thumb-up-solid.svg")
+
+    def test_rating_returns_card(self):
+        Movie.objects.update(status="watched")
+        response = self.client.post(reverse("thumb_up", args=[self.movie.id]), **self.FETCH)
+
+        self.assertContains(response, 'class="rating-btn up active"')
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating, "up")
+
+    def test_remove_returns_no_content(self):
+        response = self.client.post(reverse("remove_movie", args=[self.movie.id]), **self.FETCH)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Movie.objects.exists())
+
+    def test_plain_post_still_redirects(self):
+        response = self.client.post(reverse("thumb_down", args=[self.movie.id]))
+        self.assertRedirects(response, reverse("my_shelf"))
+
+    def test_bad_status_and_other_users(self):
+        bad = self.client.post(
+            reverse("change_status", args=[self.movie.id, "binned"]), **self.FETCH
+        )
+        self.assertEqual(bad.status_code, 400)
+
+        User.objects.create_user(username="other", password="pass12345")
+        self.client.login(username="other", password="pass12345")
+        for name in ("thumb_up", "remove_movie"):
+            response = self.client.post(reverse(name, args=[self.movie.id]), **self.FETCH)
+            self.assertEqual(response.status_code, 404)
+        self.assertTrue(Movie.objects.exists())
+
+
+class ShelfCacheTests(TestCase):
+    """
+    Tests for the versioned shelf fragment cache:
+    - A repeat visit renders the sections from cache, without queries
+    - Every kind of shelf write (save, bulk add, batch, admin action)
+      makes the next visit show fresh data
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cached", password="pass12345")
+        self.client.login(username="cached", password="pass12345")
+        self.movie = Movie.objects.create(
+            user=self.user,
+            catalog=CatalogMovie.objects.create(tmdb_id=155, title="The Dark Knight"),
+            status="to_watch",
+        )
+
+    def shelf(self):
+        return self.client.get(reverse("my_shelf"))
+
+    def test_repeat_visit_is_served_from_cache(self):
+        self.shelf()
+
+        # session + user only: no shelf queries
+        with self.assertNumQueries(2):
+            response = self.shelf()
+        self.assertContains(response, "The Dark Knight")
+
+    def test_status_change_invalidates(self):
+        self.shelf()
+        self.client.post(reverse("change_status", args=[self.movie.id, "watched"]))
+
+        self.assertContains(self.shelf(), 'data-status="watched"')
+
+    def test_bulk_writes_invalidate(self):
+        self.shelf()
+        self.client.post(reverse("add_to_shelf"), {"tmdb_id": "268", "title": "Batman"})
+        self.assertContains(self.shelf(), "Batman")
+
+        self.client.post(
+            reverse("shelf_batch"),
+            data=json.dumps({"operations": [{"id": self.movie.id, "action": "remove"}]}),
+            content_type="application/json",
+        )
+        self.assertNotContains(self.shelf(), "The Dark Knight")
+
+    def test_admin_action_invalidates(self):
+        before = shelf_version(self.user.id)
+        admin_site._registry[Movie].reset_rating(mock.Mock(), Movie.objects.all())
+
+        self.assertNotEqual(shelf_version(self.user.id), before)
+
+    def test_new_login_gets_fresh_csrf_tokens(self):
+        first = self.shelf()
+        self.client.logout()
+        self.client.login(username="cached", password="pass12345")
+        second = self.shelf()
+
+        # Login rotates the CSRF secret, so cached cards are not reused
+        self.assertNotEqual(
+            first.context["shelf_cache_vary"], second.context["shelf_cache_vary"]
+        )
+
+
+class PosterProxyTests(TestCase):
+    """
+    Tests for the local poster proxy (movies/posters.py):
+    - A poster is fetched from TMDB once and served as resized WebP
+    - Variant responses are cacheable forever
+    - TMDB failures fall back to the "unavailable" image, and are
+      remembered for a while
+    - Concurrent requests for a new poster render it once
+    - A width missing from an older index is rendered and added to it
+    - New posters are limited per client; cached ones are not
+    - The template tag emits a lazy srcset
+    """
+
+    def setUp(self):
+        cache.clear()  # missing posters, render locks, rate limit buckets
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        override = override_settings(POSTER_CACHE_DIR=self.cache_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        source = BytesIO()
+        Image.new("RGB", (342, 513), "red").save(source, "PNG")
+        self.tmdb_image = mock.Mock(status_code=200, content=source.getvalue())
+
+    def get_poster(self, width=154, poster_file="abc123.jpg"):
+        return self.client.get(reverse("poster", args=[width, poster_file]))
+
+    def test_poster_is_fetched_once_and_resized(self):
+        with mock.patch("movies.tmdb.get_session") as get_session:
+            get_session.return_value.get.return_value = self.tmdb_image
+            first = self.get_poster(154)
+            second = self.get_poster(92)
+
+        get_session.return_value.get.assert_called_once()
+        self.assertIn("/w342/abc123.jpg", get_session.return_value.get.call_args.args[0])
+
+        self.assertEqual(first["Content-Type"], "image/webp")
+        self.assertIn("immutable", first["Cache-Control"])
+        image = Image.open(BytesIO(b"".join(second.streaming_content)))
+        self.assertEqual((image.format, image.size), ("WEBP", (92, 138)))
+
+    def test_tmdb_failure_falls_back(self):
+        with mock.patch("movies.tmdb.get_session") as get_session:
+            get_session.return_value.get.side_effect = requests.ConnectionError("down")
+            response = self.get_poster()
+
+        self.assertRedirects(
+            response, "/static/images/movie-poster-unavailable.jpg",
+            fetch_redirect_response=False,
+        )
+        self.assertFalse(Path(self.cache_dir.name, "index").exists())
+
+        # Remembered for POSTER_MISSING_TTL: no second TMDB request
+        with mock.patch("movies.tmdb.get_session") as get_session:
+            self.assertEqual(self.get_poster().status_code, 302)
+        get_session.assert_not_called()
+
+    def test_concurrent_requests_render_once(self):
+        fetches = []
+
+        def slow_fetch(poster_file):
+            fetches.append(poster_file)
+            threading.Event().wait(0.2)
+            return self.tmdb_image.content
+
+        paths = []
+        with mock.patch("movies.posters.fetch_source", side_effect=slow_fetch):
+            threads = [
+                threading.Thread(target=lambda: paths.append(posters.get_variant("abc123.jpg", 92)))
+                for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(fetches, ["abc123.jpg"])
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(len(paths), 3)
+
+    def test_width_missing_from_index_is_rendered(self):
+        with mock.patch("movies.tmdb.get_session") as get_session:
+            get_session.return_value.get.return_value = self.tmdb_image
+            with override_settings(POSTER_WIDTHS=[92, 154]):
+                self.get_poster(92)
+            self.assertIsNone(posters.cached_variant("abc123.jpg", 300))
+
+            response = self.get_poster(300)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_session.return_value.get.call_count, 2)
+        self.assertIsNotNone(posters.cached_variant("abc123.jpg", 300))
+
+    @override_settings(POSTER_COLD_RENDER_RATE="1/m")
+    def test_new_posters_are_limited_per_client(self):
+        with mock.patch("movies.tmdb.get_session") as get_session:
+            get_session.return_value.get.return_value = self.tmdb_image
+            self.assertEqual(self.get_poster(154).status_code, 200)
+            self.assertEqual(self.get_poster(154, poster_file="other.jpg").status_code, 302)
+            # Already on disk: always served
+            self.assertEqual(self.get_poster(92).status_code, 200)
+
+        get_session.return_value.get.assert_called_once()
+
+    def test_unknown_width_and_bad_names_are_rejected(self):
+        self.assertEqual(self.get_poster(width=500).status_code, 404)
+        self.assertEqual(self.get_poster(poster_file="..%2Fsecret.jpg").status_code, 404)
+
+    def test_template_tag_emits_srcset(self):
+        html = Template(
+            "{% load poster_tags %}{% poster_img path alt='Dune poster' %}"
+        ).render(Context({"path": "/abc123.jpg"}))
+
+        self.assertIn('loading="lazy"', html)
+        self.assertIn("/posters/w92/abc123.jpg 92w", html)
+        self.assertIn("/posters/w300/abc123.jpg 300w", html)
+        self.assertIn('src="/posters/w154/abc123.jpg"', html)
+
+        missing = Template("{% load poster_tags %}{% poster_img None %}").render(Context())
+        self.assertIn("movie-poster-unavailable.jpg", missing)
+
+
+class MovieAdminChangelistTests(TestCase):
+    """
+    Tests for the shelf admin changelist at scale:
+    - Queries per page do not grow with the number of rows shown
+    - Users are filtered through the autocomplete filter, which never
+      lists every user
+    - Filtered counts are capped (quickflicks/pagination.py)
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("boss", "boss@example.com", "pass12345")
+        self.client.login(username="boss", password="pass12345")
+        self.url = reverse("admin:movies_movie_changelist")
+
+    def shelve(self, count):
+        start = CatalogMovie.objects.count()
+        films = CatalogMovie.objects.bulk_create(
+            CatalogMovie(tmdb_id=start + n + 1, title=f"Film {start + n}")
+            for n in range(count)
+        )
+        users = User.objects.bulk_create(
+            User(username=f"viewer{start + n}") for n in range(count)
+        )
+        Movie.objects.bulk_create(
+            Movie(user=user, catalog=film) for user, film in zip(users, films)
+        )
+        return users
+
+    def queries_for(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.shelve(3)
+        few = self.queries_for(self.url)
+        self.shelve(40)
+
+        self.assertEqual(self.queries_for(self.url), few)
+
+    def test_user_filter_uses_autocomplete(self):
+        users = self.shelve(5)
+
+        response = self.client.get(self.url)
+        self.assertContains(response, "user-autocomplete-filter")
+        self.assertNotContains(response, "viewer3</a>", html=False)
+
+        response = self.client.get(self.url, {"user__id__exact": users[2].id})
+        self.assertEqual(list(response.context["cl"].result_list), [users[2].movie_set.get()])
+        self.assertContains(response, f'<option value="{users[2].id}" selected>viewer2</option>')
+
+        # Not a user id: the admin's "invalid lookup" redirect
+        response = self.client.get(self.url, {"user__id__exact": "x"})
+        self.assertRedirects(response, self.url + "?e=1", fetch_redirect_response=False)
+
+    def test_filtered_count_is_capped(self):
+        self.shelve(12)
+        queryset = Movie.objects.filter(status="to_watch").order_by("id")
+
+        with mock.patch.object(EstimatedCountPaginator, "MAX_COUNT", 10):
+            self.assertEqual(EstimatedCountPaginator(queryset, 5).count, 10)
+            self.assertEqual(EstimatedCountPaginator(Movie.objects.order_by("id"), 5).count, 12)
+
+
+@override_settings(ADMIN_BULK_INLINE_LIMIT=4, ADMIN_BULK_CHUNK_SIZE=3)
+class BulkUpdateTests(TestCase):
+    """
+    Tests for chunked admin bulk actions (movies/bulk_updates.py):
+    - Small selections are applied inline
+    - Large selections are queued as a job and applied in pk-range
+      chunks, with progress saved after every chunk
+    - An interrupted task resumes after its last chunk when its job
+      is taken over
+    - The selection is stored as plain pk runs, and only the rows
+      selected when the action was queued are updated
+    """
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser("boss", "boss@example.com", "pass12345")
+        self.client.login(username="boss", password="pass12345")
+        self.user = User.objects.create_user(username="viewer")
+        CatalogMovie.objects.bulk_create(
+            CatalogMovie(tmdb_id=n, title=f"Film {n}") for n in range(1, 11)
+        )
+        Movie.objects.bulk_create(
+            Movie(user=self.user, catalog_id=n, status="to_watch", rating="up")
+            for n in range(1, 11)
+        )
+
+    def run_action(self, action, ids=None):
+        data = {"action": action, "_selected_action": ids or []}
+        if ids is None:
+            data["select_across"] = "1"
+            data["_selected_action"] = Movie.objects.values_list("pk", flat=True)[:1]
+        return self.client.post(reverse("admin:movies_movie_changelist"), data)
+
+    def test_small_selection_runs_inline(self):
+        ids = list(Movie.objects.values_list("pk", flat=True)[:2])
+        before = shelf_version(self.user.id)
+
+        self.run_action("mark_watched", ids)
+
+        self.assertEqual(Movie.objects.filter(status="watched").count(), 2)
+        self.assertNotEqual(shelf_version(self.user.id), before)
+        self.assertFalse(BulkUpdateTask.objects.exists())
+
+    def test_large_selection_is_queued_and_chunked(self):
+        response = self.run_action("reset_rating")
+        self.assertEqual(Movie.objects.filter(rating="none").count(), 0)
+
+        task = BulkUpdateTask.objects.get()
+        job = Job.objects.get(name="movies.bulk_update")
+        self.assertEqual(job.payload, {"task_id": task.pk})
+        self.assertContains(self.client.get(response.url), "queued as")
+
+        before = shelf_version(self.user.id)
+        self.assertEqual(run_due(), {"done": 1})
+        self.assertFalse(bulk_updates.run_task(task.pk))  # already done
+
+        task.refresh_from_db()
+        self.assertEqual((task.state, task.total, task.processed), ("done", 10, 10))
+        self.assertEqual(task.last_pk, Movie.objects.order_by("pk").last().pk)
+        self.assertEqual(Movie.objects.filter(rating="none").count(), 10)
+        self.assertNotEqual(shelf_version(self.user.id), before)
+
+        progress = self.client.get(reverse("admin:movies_bulkupdatetask_changelist"))
+        self.assertContains(progress, "100% (10 / 10)")
+
+    def test_each_chunk_is_its_own_short_transaction(self):
+        task = bulk_updates.queue("mark_watched", Movie.objects.all())
+
+        with CaptureQueriesContext(connection) as queries:
+            bulk_updates.run_task(task.pk)
+
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE \"movies_movie\"")]
+        self.assertEqual(len(updates), 4)  # 10 rows, 3 per chunk
+        self.assertTrue(all("BETWEEN" not in sql and "IN (" not in sql for sql in updates))
+
+    def test_interrupted_task_resumes(self):
+        pks = list(Movie.objects.order_by("pk").values_list("pk", flat=True))
+        task = bulk_updates.queue("mark_watched", Movie.objects.filter(status="to_watch"))
+        # A worker died after six rows; its job lock has lapsed
+        BulkUpdateTask.objects.filter(pk=task.pk).update(
+            state="running", last_pk=pks[5], processed=6, total=10,
+        )
+        Job.objects.filter(name="movies.bulk_update").update(
+            state="running", attempts=1, locked_by="dead",
+            locked_until=timezone.now() - datetime.timedelta(seconds=1),
+        )
+
+        run_due()
+
+        task.refresh_from_db()
+        self.assertEqual((task.state, task.processed), ("done", 10))
+        # Rows before the cursor were left alone
+        self.assertEqual(
+            list(Movie.objects.filter(status="watched").order_by("pk").values_list("pk", flat=True)),
+            pks[6:],
+        )
+
+    def test_selection_is_stored_as_pk_runs(self):
+        pks = list(Movie.objects.order_by("pk").values_list("pk", flat=True))
+        selected = pks[:3] + pks[5:]
+        task = bulk_updates.queue("mark_watched", Movie.objects.filter(pk__in=selected))
+        self.assertEqual(task.selection, [[pks[0], pks[2]], [pks[5], pks[9]]])
+        self.assertEqual(task.total, 8)
+        # Added after the action was queued, so not part of the selection
+        CatalogMovie.objects.create(tmdb_id=11, title="Film 11")
+        late = Movie.objects.create(user=self.user, catalog_id=11, status="to_watch")
+
+        bulk_updates.run_task(task.pk)
+
+        task.refresh_from_db()
+        self.assertEqual((task.state, task.processed), ("done", 8))
+        self.assertEqual(
+            list(Movie.objects.filter(status="watched").order_by("pk").values_list("pk", flat=True)),
+            selected,
+        )
+        late.refresh_from_db()
+        self.assertEqual(late.status, "to_watch")
+
+    def test_failure_is_recorded(self):
+        task = bulk_updates.queue("mark_watched", Movie.objects.all())
+        BulkUpdateTask.objects.filter(pk=task.pk).update(selection={"not": "runs"})
+
+        bulk_updates.run_task(task.pk)
+
+        task.refresh_from_db()
+        self.assertEqual(task.state, "failed")
+        self.assertIn("Malformed bulk update selection", task.error)
+
+
+class CatalogEnrichmentTests(TestCase):
+    """
+    Tests for catalog enrichment (movies/tasks.py):
+    - Shelving a film queues one enrichment job, which fills in the
+      full TMDB record
+    - A film gone from TMDB is marked and not retried
+    - The periodic refresh queues never-enriched and stale films only
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="password123")
+        self.client.login(username="tester", password="password123")
+
+    def test_adding_a_film_queues_enrichment(self):
+        film = {"tmdb_id": "603", "title": "The Matrix", "poster_path": "/m.jpg"}
+        self.client.post(reverse("add_to_shelf"), film)
+        self.client.post(reverse("add_to_shelf"), film)
+        self.assertEqual(Job.objects.filter(key="enrich:603").count(), 1)
+
+        record = {
+            "title": "The Matrix", "original_title": "The Matrix",
+            "release_date": "1999-03-30", "genres": [{"id": 28, "name": "Action"}],
+            "overview": "A hacker learns the truth.", "vote_average": 8.2,
+        }
+        with mock.patch("movies.tasks.tmdb.movie_details", return_value=record):
+            self.assertEqual(run_due(), {"done": 1})
+
+        catalog = CatalogMovie.objects.get(pk=603)
+        self.assertEqual(catalog.genres, ["Action"])
+        self.assertEqual(catalog.release_date, datetime.date(1999, 3, 30))
+        self.assertIsNotNone(catalog.enriched_at)
+        # Enriched films are not queued again
+        self.assertIsNone(tasks.queue_enrichment(603))
+
+    def test_missing_film_is_not_retried(self):
+        CatalogMovie.objects.create(tmdb_id=1, title="Gone")
+        tasks.queue_enrichment(1)
+
+        with mock.patch("movies.tasks.tmdb.movie_details",
+                        side_effect=tmdb.TMDBError("Not found", status=404)), \
+                self.assertLogs("jobs.queue", "ERROR"):
+            self.assertEqual(run_due(), {"failed": 1})
+
+        self.assertIsNotNone(CatalogMovie.objects.get(pk=1).enriched_at)
+
+    def test_refresh_queues_stale_shelved_films(self):
+        old = timezone.now() - datetime.timedelta(days=settings.CATALOG_REFRESH_DAYS + 1)
+        CatalogMovie.objects.bulk_create([
+            CatalogMovie(tmdb_id=1, title="Never enriched"),
+            CatalogMovie(tmdb_id=2, title="Stale", enriched_at=old),
+            CatalogMovie(tmdb_id=3, title="Fresh", enriched_at=timezone.now()),
+            CatalogMovie(tmdb_id=4, title="Not shelved"),
+        ])
+        Movie.objects.bulk_create(Movie(user=self.user, catalog_id=n) for n in (1, 2, 3))
+
+        tasks.refresh_stale_catalog()
+
+        self.assertEqual(
+            set(Job.objects.values_list("key", flat=True)), {"enrich:1", "enrich:2"}
+        )
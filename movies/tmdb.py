@@ -0,0 +1,271 @@
+"""
+TMDB API client.
+
+All calls to The Movie Database go through this module so that:
+- Each worker process reuses one pooled requests.Session
+  (keep-alive, so no new TCP + TLS handshake per search)
+- Connect and read timeouts are applied separately
+- 429 / 5xx responses are retried with jittered backoff,
+  honouring TMDB's Retry-After header
+- Every request is logged with its status and duration
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from datetime import timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils import timezone
+
+from monitoring import timing
+
+from .search_cache import get_cached_search, cache_search
+from .tmdb_standin import record_response
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TMDBError(Exception):
+    """
+    Raised when TMDB cannot be reached or returns an error response.
+    `status` is the HTTP status of the final response, if there was one.
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------------------------------------------------
+# PER-WORKER SESSION
+# -------------------------------------------------------------
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns this process's pooled session, creating it on first use.
+    The PID check makes sure a forked worker never shares sockets
+    with its parent.
+    """
+    global _session, _session_pid
+
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=2,  # api.themoviedb.org + image.tmdb.org
+                pool_maxsize=settings.TMDB_POOL_SIZE,
+                pool_block=False,
+                max_retries=0,  # retries are handled in request()
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept": "application/json"})
+            _session = session
+            _session_pid = os.getpid()
+
+    return _session
+
+
+# -------------------------------------------------------------
+# RETRY HELPERS
+# -------------------------------------------------------------
+def _retry_after_seconds(response):
+    """
+    Parses a Retry-After header (delta-seconds or HTTP date).
+    Returns None when the header is missing or unreadable.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # "-0000" (UTC, source zone unknown) parses as a naive datetime
+        retry_at = retry_at.replace(tzinfo=dt_timezone.utc)
+    return max(0.0, (retry_at - timezone.now()).total_seconds())
+
+
+def _backoff_seconds(attempt, response=None):
+    """
+    Full-jitter exponential backoff, overridden by Retry-After
+    when TMDB tells us how long to wait. Capped so a single
+    search can never hang a worker for long.
+    """
+    wait = None
+    if response is not None:
+        wait = _retry_after_seconds(response)
+    if wait is None:
+        wait = random.uniform(0, settings.TMDB_RETRY_BACKOFF * (2 ** attempt))
+    return min(wait, settings.TMDB_RETRY_MAX_WAIT)
+
+
+# -------------------------------------------------------------
+# LOW-LEVEL REQUEST
+# -------------------------------------------------------------
+def request(path, params=None):
+    """
+    Performs a GET against the TMDB API and returns the decoded JSON.
+    Raises TMDBError once all retries are used up.
+    """
+    url = f"{settings.TMDB_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+    query = {"api_key": settings.TMDB_API_KEY, **(params or {})}
+    timeout = (settings.TMDB_CONNECT_TIMEOUT, settings.TMDB_READ_TIMEOUT)
+    attempts = settings.TMDB_MAX_RETRIES + 1
+
+    for attempt in range(attempts):
+        started = time.perf_counter()
+        response = None
+
+        try:
+            response = get_session().get(url, params=query, timeout=timeout)
+        except requests.RequestException as exc:
+            error = exc
+        else:
+            error = None
+
+        elapsed = time.perf_counter() - started
+        timing.record("tmdb", elapsed)
+        duration_ms = round(elapsed * 1000, 1)
+        status = getattr(response, "status_code", None)
+        log_extra = {
+            "tmdb_path": path,
+            "status": status,
+            "duration_ms": duration_ms,
+            "attempt": attempt + 1,
+        }
+
+        if error is None and status not in RETRY_STATUSES:
+            if status >= 400:
+                logger.warning("TMDB request failed", extra=log_extra)
+                raise TMDBError(f"TMDB returned HTTP {status} for {path}", status=status)
+            logger.info("TMDB request", extra=log_extra)
+            try:
+                data = response.json()
+            except ValueError as exc:
+                raise TMDBError(f"TMDB returned invalid JSON for {path}") from exc
+
+            # Record mode: keep a copy for the local stand-in
+            if settings.TMDB_RECORD_DIR:
+                record_response(settings.TMDB_RECORD_DIR, path, query, data)
+            return data
+
+        if attempt + 1 == attempts:
+            logger.error("TMDB request gave up", extra=log_extra)
+            raise TMDBError(
+                f"TMDB request to {path} failed after {attempts} attempts",
+                status=status,
+            ) from error
+
+        wait = _backoff_seconds(attempt, response)
+        logger.warning(
+            "TMDB request retrying",
+            extra={**log_extra, "retry_in": round(wait, 2)},
+        )
+        time.sleep(wait)
+
+
+# -------------------------------------------------------------
+# ENDPOINTS
+# -------------------------------------------------------------
+def search_page(query, page=1, language="en-US"):
+    """
+    Returns (results, total_pages) for one page of a TMDB search,
+    served from the search cache where possible.
+    """
+    cached = get_cached_search(query, language, page)
+    if cached is not None:
+        return cached["results"], cached["total_pages"]
+
+    data = request("search/movie", {
+        "query": query,
+        "include_adult": False,
+        "language": language,
+        "page": page,
+    })
+    results = data.get("results", [])
+    total_pages = data.get("total_pages") or 1
+
+    cache_search(query, language, page, {"results": results, "total_pages": total_pages})
+    return results, total_pages
+
+
+def search_movies(query, page=1, language="en-US"):
+    """
+    Returns the list of TMDB search results for a query,
+    served from the search cache where possible.
+    """
+    return search_page(query, page, language)[0]
+
+
+def movie_details(tmdb_id, language="en-US"):
+    """
+    Returns TMDB's full record for one film (genres, overview, ...).
+    """
+    return request(f"movie/{int(tmdb_id)}", {"language": language})
+
+
+async def asearch_movies(query, pages=1, language="en-US"):
+    """
+    Async search over result pages 1..pages, merged in order.
+
+    Page 1 comes first, since its total_pages says how many more
+    exist; the rest (up to `pages`) are then fetched concurrently, so
+    at most two TMDB round trips are made and pages past the end of
+    the results are never requested.
+
+    Each page goes through search_page() in a worker thread, so the
+    pooled session, retries and search cache are all shared with the
+    sync code path. Later pages that fail are logged and skipped;
+    a failure on page 1 is raised.
+    """
+    first, total_pages = await asyncio.to_thread(search_page, query, 1, language)
+    rest = await asyncio.gather(
+        *(
+            asyncio.to_thread(search_movies, query, page, language)
+            for page in range(2, min(pages, total_pages) + 1)
+        ),
+        return_exceptions=True,
+    )
+
+    merged = []
+    seen_ids = set()
+    for page, results in enumerate([first, *rest], start=1):
+        if isinstance(results, BaseException):
+            logger.warning(
+                "TMDB search page skipped",
+                extra={"page": page, "error": str(results)},
+            )
+            continue
+
+        for movie in results:
+            if movie.get("id") in seen_ids:
+                continue
+            seen_ids.add(movie.get("id"))
+            merged.append(movie)
+
+    return merged
@@ -0,0 +1,123 @@
+"""
+Local stand-in for the TMDB API.
+
+A tiny WSGI app that replays recorded TMDB responses from disk so the
+search page can be exercised (and load-tested) without a network
+connection or TMDB API key.
+
+- Fixtures are written by the TMDB client when TMDB_RECORD_DIR is set
+  (record mode) and served back here (replay mode)
+- Latency and error injection make it possible to test slow / failing
+  TMDB behaviour reproducibly
+
+Run it with:  python manage.py tmdb_standin
+and point the app at it with:  TMDB_BASE_URL=http://127.0.0.1:8001/3
+"""
+
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+from django.utils.text import slugify
+
+from .search_cache import normalize_query
+
+
+# Params that never change the response body
+IGNORED_PARAMS = {"api_key"}
+
+EMPTY_SEARCH = {"page": 1, "results": [], "total_pages": 0, "total_results": 0}
+
+
+# -------------------------------------------------------------
+# FIXTURE NAMING (shared by record + replay)
+# -------------------------------------------------------------
+def fixture_path(root, path, params):
+    """
+    Maps an API path + query params to a fixture file, e.g.
+    <root>/search_movie/include_adult-false-language-en-us-...-1a2b3c4d.json
+    """
+    cleaned = {}
+    for key, value in (params or {}).items():
+        if key in IGNORED_PARAMS:
+            continue
+        value = str(value)
+        cleaned[key] = normalize_query(value) if key == "query" else value.lower()
+
+    raw = "&".join(f"{key}={cleaned[key]}" for key in sorted(cleaned))
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8]
+    name = f"{slugify(raw)[:80] or 'default'}-{digest}.json"
+
+    folder = path.strip("/").replace("/", "_")
+    return Path(root) / folder / name
+
+
+def record_response(root, path, params, payload):
+    """
+    Saves a TMDB response so the stand-in can replay it later.
+    """
+    target = fixture_path(root, path, params)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+# -------------------------------------------------------------
+# WSGI APP
+# -------------------------------------------------------------
+def make_app(fixtures_dir, latency_ms=0, jitter_ms=0, error_rate=0.0,
+             error_status=503, seed=None):
+    """
+    Builds the stand-in WSGI application.
+
+    - latency_ms / jitter_ms: artificial delay added to every response
+    - error_rate: fraction of requests answered with error_status
+    """
+    rng = random.Random(seed)
+
+    def respond(start_response, status, payload, headers=()):
+        body = json.dumps(payload).encode("utf-8")
+        start_response(status, [
+            ("Content-Type", "application/json;charset=utf-8"),
+            ("Content-Length", str(len(body))),
+            *headers,
+        ])
+        return [body]
+
+    def app(environ, start_response):
+        delay = latency_ms + (rng.uniform(0, jitter_ms) if jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if error_rate and rng.random() < error_rate:
+            return respond(
+                start_response,
+                f"{error_status} Injected Error",
+                {"status_message": "Injected error from the TMDB stand-in."},
+                headers=[("Retry-After", "1")] if error_status == 429 else (),
+            )
+
+        path = environ.get("PATH_INFO", "")
+        if path.startswith("/3/"):
+            path = path[len("/3/"):]
+        params = dict(parse_qsl(environ.get("QUERY_STRING", "")))
+
+        fixture = fixture_path(fixtures_dir, path, params)
+        if fixture.exists():
+            return respond(
+                start_response, "200 OK",
+                json.loads(fixture.read_text(encoding="utf-8")),
+            )
+
+        # TMDB answers unknown searches with an empty result set
+        if path.strip("/") == "search/movie":
+            return respond(start_response, "200 OK", EMPTY_SEARCH)
+
+        return respond(
+            start_response, "404 Not Found",
+            {"status_message": "No recorded fixture for this request."},
+        )
+
+    return app
@@ -4,8 +4,17 @@ from . import views
 urlpatterns = [
     path("", views.home, name="home"),
 
+    # Search-as-you-type suggestions (JSON)
+    path("autocomplete/", views.autocomplete, name="autocomplete"),
+
+    # Resized WebP posters served from local disk
+    path("posters/w<int:width>/<str:poster_file>", views.poster, name="poster"),
+
     # User shelf
     path("my-shelf/", views.my_shelf, name="my_shelf"),
+    # Several shelf changes at once (JSON); before the section pattern
+    path("my-shelf/batch/", views.shelf_batch, name="shelf_batch"),
+    path("my-shelf/<str:status>/", views.shelf_section, name="shelf_section"),
 
     # Add movie
     path("add/", views.add_to_shelf, name="add_to_shelf"),
@@ -1,23 +1,69 @@
-import requests
+import json
+import logging
+
 from django.conf import settings
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+)
 from django.shortcuts import render, redirect, get_object_or_404
+from django.templatetags.static import static
 from django.contrib.auth.decorators import login_required
-from .models import Movie
+from django.views.decorators.http import require_POST
+from accounts import ratelimit
+from . import batch, posters, search, tasks, tmdb
+from .autocomplete import autocomplete_index
+from .models import CatalogMovie, Movie
+from .shelf import (
+    CARD_FIELDS,
+    SECTION_STATUSES,
+    InvalidCursor,
+    ShelfSection,
+    bump_shelf_version,
+    fragment_vary,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 # -------------------------------------------------------------
 # HOME PAGE – TMDB SEARCH + "Add to Shelf" Support
 # -------------------------------------------------------------
-def home(request):
+async def home(request):
     """
     Displays the search page, calls the TMDB API when the user
     searches, and also checks which movies the user already saved.
+
+    Async so a worker is not tied up while waiting on TMDB under ASGI;
+    up to TMDB_SEARCH_PAGES result pages are shown (see
+    tmdb.asearch_movies).
+    MOVIE_SEARCH_MODE decides whether the local catalog is searched
+    instead of (or before) TMDB.
     """
     query = request.GET.get("query", "")
     movies = []
 
+    # Resolve the user up front with the async auth API so the
+    # template never triggers a sync DB lookup from the event loop
+    request.user = await request.auser()
+
+    mode = settings.MOVIE_SEARCH_MODE
+
+    # Local catalog first (no external call, single-digit ms)
+    if query and mode in ("local", "local_first"):
+        movies = [
+            movie.as_search_result()
+            for movie in await search.asearch_catalog(query)
+        ]
+
+    use_tmdb = mode == "tmdb" or (mode == "local_first" and not movies)
+
     # If no TMDB key → avoid crash
-    if not settings.TMDB_API_KEY:
+    if use_tmdb and not settings.TMDB_API_KEY:
         return render(request, "movies/home.html", {
             "query": query,
             "movies": [],
@@ -25,22 +71,13 @@ def home(request):
         })
 
     # If user typed a query → call TMDB API
-    if query:
-        url = "https://api.themoviedb.org/3/search/movie"
-        params = {
-            "api_key": settings.TMDB_API_KEY,
-            "query": query,
-            "include_adult": False,
-            "language": "en-US",
-            "page": 1,
-        }
-
+    # (popular searches are served from the search cache)
+    if query and use_tmdb:
         try:
-            response = requests.get(url, params=params, timeout=8)
-            data = response.json()
-            movies = data.get("results", [])
-        except Exception as e:
-            print("TMDB ERROR:", e)
+            movies = await tmdb.asearch_movies(
+                query, pages=settings.TMDB_SEARCH_PAGES
+            )
+        except tmdb.TMDBError:
             return render(request, "movies/home.html", {
                 "query": query,
                 "movies": [],
@@ -48,22 +85,68 @@ def home(request):
             })
 
     # ---------------------------------------------------------
-    # If logged in → get IDs of movies already in the shelf
+    # If logged in → mark the results already in the shelf
     # so the template knows when to show "Already in shelf"
     # ---------------------------------------------------------
-    user_movie_ids = []
-    if request.user.is_authenticated:
-        user_movie_ids = list(
-            Movie.objects.filter(user=request.user).values_list("tmdb_id", flat=True)
-        )
+    if request.user.is_authenticated and movies:
+        movies = await _mark_shelved(request.user, movies)
 
     return render(request, "movies/home.html", {
         "query": query,
         "movies": movies,
-        "user_movie_ids": user_movie_ids,
     })
 
 
+async def _mark_shelved(user, movies):
+    """
+    Adds "in_shelf" / "shelf_status" to each result. Only the ids on
+    this results page are looked up (one indexed query), so the cost
+    does not grow with the size of the user's shelf.
+    """
+    result_ids = {movie["id"] for movie in movies}
+    shelved = {
+        tmdb_id: status
+        async for tmdb_id, status in Movie.objects.filter(
+            user=user, catalog_id__in=result_ids
+        ).values_list("catalog_id", "status")
+    }
+    status_labels = dict(Movie.STATUS_CHOICES)
+
+    # New dicts: results may be shared with the search cache
+    return [
+        {
+            **movie,
+            "in_shelf": movie["id"] in shelved,
+            "shelf_status": status_labels.get(shelved.get(movie["id"]), ""),
+        }
+        for movie in movies
+    ]
+
+
+# -------------------------------------------------------------
+# SEARCH-AS-YOU-TYPE SUGGESTIONS
+# -------------------------------------------------------------
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 8
+
+
+def autocomplete(request):
+    """
+    Returns up to 8 title suggestions for a prefix as JSON.
+    Answered from the worker's in-memory prefix index, so there is
+    no database or TMDB call per keystroke.
+    """
+    prefix = request.GET.get("q", "").strip()
+
+    results = []
+    if len(prefix) >= AUTOCOMPLETE_MIN_LENGTH:
+        results = autocomplete_index.get().lookup(prefix, limit=AUTOCOMPLETE_LIMIT)
+
+    response = JsonResponse({"results": results})
+    response["Cache-Control"] = "public, max-age=300"
+    return response
+
+
 # -------------------------------------------------------------
 # ADD MOVIE TO SHELF
 # -------------------------------------------------------------
@@ -74,23 +157,34 @@ def add_to_shelf(request):
     Called from the home page search results.
     """
     if request.method == "POST":
-        tmdb_id = request.POST.get("tmdb_id")
-        title = request.POST.get("title")
-        poster_path = request.POST.get("poster_path")
-
-        # Create movie only if not already saved
-        Movie.objects.get_or_create(
-            user=request.user,
-            tmdb_id=tmdb_id,
-            defaults={
-                "title": title,
-                "poster_url": (
-                    f"https://image.tmdb.org/t/p/w300{poster_path}"
-                    if poster_path else ""
-                ),
-                "status": "to_put_away",
-            }
-        )
+        poster_path = request.POST.get("poster_path") or ""
+        try:
+            film = batch.catalog_movie(
+                request.POST.get("tmdb_id", ""),
+                request.POST.get("title", ""),
+                poster_path if poster_path != "None" else "",
+            )
+        except batch.BatchError:
+            film = None  # malformed form data: nothing is saved
+
+        if film is not None:
+            # Shared catalog entry – created once, never overwritten
+            # from browser-posted data
+            CatalogMovie.objects.bulk_create([film], ignore_conflicts=True)
+
+            # Create movie only if not already saved. A single
+            # INSERT ... ON CONFLICT DO NOTHING against the
+            # (user, catalog) unique constraint, so double-clicks
+            # cannot create duplicates
+            Movie.objects.bulk_create(
+                [Movie(user=request.user, catalog_id=film.tmdb_id, status="to_put_away")],
+                ignore_conflicts=True,
+            )
+            bump_shelf_version(request.user.id)  # bulk_create sends no signals
+
+            # Full TMDB details (genres, overview, ...) are fetched by
+            # the job worker, so this request never waits on TMDB
+            tasks.queue_enrichment(film.tmdb_id)
 
     # Return user to the page they came from
     return redirect(request.META.get("HTTP_REFERER", "home"))
@@ -106,19 +200,72 @@ def my_shelf(request):
       - to_put_away
       - to_watch
       - watched
+    Each section shows its newest SHELF_PAGE_SIZE movies; the rest
+    are fetched on demand by shelf_section ("load more").
+    """
+
+    context = {
+        status: ShelfSection(request.user, status)
+        for status in SECTION_STATUSES
+    }
+    # Sections are only queried when their cached HTML is stale
+    context["shelf_cache_ttl"] = settings.SHELF_CACHE_TTL
+    context["shelf_cache_vary"] = fragment_vary(request)
+
+    return render(request, "movies/shelf.html", context)
+
+
+# -------------------------------------------------------------
+# SHELF SECTION – "LOAD MORE" FRAGMENT
+# -------------------------------------------------------------
+@login_required
+def shelf_section(request, status):
+    """
+    Returns the next page of cards for one shelf section, starting
+    after the `after` cursor from the previous page.
     """
+    if status not in SECTION_STATUSES:
+        raise Http404("Unknown shelf section")
 
-    to_put_away = Movie.objects.filter(user=request.user, status="to_put_away")
-    to_watch = Movie.objects.filter(user=request.user, status="to_watch")
-    watched = Movie.objects.filter(user=request.user, status="watched")
+    try:
+        section = ShelfSection(request.user, status, after=request.GET.get("after"))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
 
-    return render(request, "movies/shelf.html", {
-        "to_put_away": to_put_away,
-        "to_watch": to_watch,
-        "watched": watched,
+    return render(request, "movies/partials/shelf_page.html", {
+        "section": section,
+        "section_cursor": request.GET.get("after", ""),
+        "shelf_cache_ttl": settings.SHELF_CACHE_TTL,
+        "shelf_cache_vary": fragment_vary(request),
     })
 
 
+# -------------------------------------------------------------
+# SHELF ACTIONS – FULL PAGE OR IN-PLACE CARD UPDATES
+# shelf.js posts the card forms with fetch and an
+# "X-Requested-With: fetch" header; it then gets back only the
+# affected card (or 204 for a removal) instead of a redirect and a
+# full shelf render. Plain form posts still redirect.
+# -------------------------------------------------------------
+def _wants_fragment(request):
+    return request.headers.get("X-Requested-With") == "fetch"
+
+
+def _get_card(request, movie_id):
+    return get_object_or_404(
+        # user is loaded too: the post_save receiver needs user_id
+        Movie.objects.select_related("catalog").only(*CARD_FIELDS, "user"),
+        id=movie_id,
+        user=request.user,
+    )
+
+
+def _card_response(request, movie):
+    if _wants_fragment(request):
+        return render(request, "movies/partials/shelf_card.html", {"movie": movie})
+    return redirect("my_shelf")
+
+
 # -------------------------------------------------------------
 # CHANGE MOVIE STATUS
 # -------------------------------------------------------------
@@ -130,15 +277,15 @@ def change_status(request, movie_id, new_status):
       - to_watch
       - watched
     """
-    movie = get_object_or_404(Movie, id=movie_id, user=request.user)
-
-    VALID_STATUSES = ["to_put_away", "to_watch", "watched"]
+    movie = _get_card(request, movie_id)
 
-    if new_status in VALID_STATUSES:
+    if new_status in SECTION_STATUSES:
         movie.status = new_status
-        movie.save()
+        movie.save(update_fields=["status", "updated_at"])
+    elif _wants_fragment(request):
+        return HttpResponseBadRequest("Unknown status")
 
-    return redirect("my_shelf")
+    return _card_response(request, movie)
 
 
 # -------------------------------------------------------------
@@ -146,25 +293,85 @@ def change_status(request, movie_id, new_status):
 # -------------------------------------------------------------
 @login_required
 def remove_movie(request, movie_id):
-    movie = get_object_or_404(Movie, id=movie_id, user=request.user)
-    movie.delete()
+    deleted, _ = Movie.objects.filter(id=movie_id, user=request.user).delete()
+    if not deleted:
+        raise Http404("No such movie on your shelf")
+
+    if _wants_fragment(request):
+        return HttpResponse(status=204)
     return redirect("my_shelf")
 
 
 # -------------------------------------------------------------
 # RATING – THUMBS UP / DOWN
 # -------------------------------------------------------------
+def _rate(request, movie_id, rating):
+    movie = _get_card(request, movie_id)
+    movie.rating = rating
+    movie.save(update_fields=["rating", "updated_at"])
+    return _card_response(request, movie)
+
+
 @login_required
 def thumb_up(request, movie_id):
-    movie = get_object_or_404(Movie, id=movie_id, user=request.user)
-    movie.rating = "up"
-    movie.save()
-    return redirect("my_shelf")
+    return _rate(request, movie_id, "up")
 
 
 @login_required
 def thumb_down(request, movie_id):
-    movie = get_object_or_404(Movie, id=movie_id, user=request.user)
-    movie.rating = "down"
-    movie.save()
-    return redirect("my_shelf")
+    return _rate(request, movie_id, "down")
+
+
+# -------------------------------------------------------------
+# BATCH SHELF CHANGES (JSON)
+# -------------------------------------------------------------
+@login_required
+@require_POST
+def shelf_batch(request):
+    """
+    Applies a list of shelf operations (see movies/batch.py) in one
+    request and one transaction, e.g. when reorganising many films.
+    """
+    try:
+        payload = json.loads(request.body)
+        operations = payload.get("operations") if isinstance(payload, dict) else None
+        result = batch.apply_batch(request.user, operations)
+    except (ValueError, batch.BatchError) as exc:
+        # json.JSONDecodeError and BatchError are both ValueErrors
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse(result)
+
+
+# -------------------------------------------------------------
+# POSTER PROXY – RESIZED WEBP VARIANTS FROM LOCAL DISK
+# -------------------------------------------------------------
+POSTER_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def poster(request, width, poster_file):
+    """
+    Serves one WebP variant of a TMDB poster (see movies/posters.py).
+    If TMDB cannot provide the poster, redirects to the local
+    "poster unavailable" image (briefly cached, so it is retried).
+    """
+    if width not in settings.POSTER_WIDTHS or not posters.is_valid_poster_file(poster_file):
+        raise Http404("Unknown poster")
+
+    try:
+        path = posters.cached_variant(poster_file, width)
+        if path is None:
+            # A cold render downloads from TMDB: limited per client
+            key = f"ratelimit:poster:{ratelimit.client_ip(request)}"
+            if ratelimit.take_token(key, settings.POSTER_COLD_RENDER_RATE):
+                raise posters.PosterError("Too many new posters requested by this client")
+            path = posters.get_variant(poster_file, width)
+    except posters.PosterError as exc:
+        logger.warning("Poster unavailable", extra={"poster": poster_file, "error": str(exc)})
+        response = redirect(static("images/movie-poster-unavailable.jpg"))
+        response["Cache-Control"] = "public, max-age=300"
+        return response
+
+    response = FileResponse(open(path, "rb"), content_type="image/webp")
+    response["Cache-Control"] = POSTER_CACHE_CONTROL
+    return response
@@ -0,0 +1,34 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from quickflicks.pagination import EstimatedCountPaginator
+from .models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("subject", "recipient_list", "state", "attempts", "send_after", "sent_at")
+    list_filter = ("state",)
+    ordering = ("-id",)
+    # The raw message holds password reset links: never shown
+    exclude = ("message",)
+    readonly_fields = (
+        "from_email", "recipients", "subject", "attempts", "claimed_by",
+        "claimed_until", "last_error", "created_at", "sent_at",
+    )
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(description="Recipients")
+    def recipient_list(self, obj):
+        return ", ".join(obj.recipients)
+
+    @admin.action(description="Retry selected messages now")
+    def retry_now(self, request, queryset):
+        retried = queryset.filter(state="failed").update(
+            state="queued", send_after=timezone.now(), attempts=0, last_error=""
+        )
+        self.message_user(request, f"{retried} messages queued again.")
+
+    actions = [retry_now]
@@ -0,0 +1,17 @@
+# ---------------------------------------------------------------
+# OUTBOX APP CONFIG
+# - Outgoing email is stored in the outbox by the request
+#   (outbox.backends.OutboxBackend) and delivered over SMTP by the
+#   job worker (see outbox/sender.py).
+# - 'ready()' loads outbox.tasks, which registers the delivery job.
+# ---------------------------------------------------------------
+
+from django.apps import AppConfig
+
+
+class OutboxConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'outbox'
+
+    def ready(self):
+        import outbox.tasks
@@ -0,0 +1,56 @@
+"""
+Email backend that stores messages in the outbox instead of sending
+them, so a request never waits on (or fails because of) the mail
+server. Set as EMAIL_BACKEND; the job worker delivers the messages
+(outbox/sender.py).
+"""
+
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+from django.db import transaction
+
+from jobs.queue import enqueue
+
+from .models import OutboxMessage
+
+
+SUBJECT_MAX_LENGTH = OutboxMessage._meta.get_field("subject").max_length
+
+
+def wake_sender():
+    # One delivery job at a time; one that is already queued or
+    # running picks the new messages up as well
+    enqueue("outbox.deliver", key="outbox:deliver")
+
+
+class OutboxBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        """
+        Stores the messages with one INSERT and queues delivery once
+        the current transaction commits. Returns the number stored.
+        """
+        rows = []
+        for email in email_messages:
+            recipients = email.recipients()
+            if not recipients:
+                continue
+            # Addresses and bytes exactly as the SMTP backend sends them
+            rows.append(OutboxMessage(
+                from_email=sanitize_address(email.from_email, email.encoding),
+                recipients=[sanitize_address(addr, email.encoding) for addr in recipients],
+                subject=str(email.subject)[:SUBJECT_MAX_LENGTH],
+                message=email.message().as_bytes(linesep="\r\n"),
+            ))
+        if not rows:
+            return 0
+
+        try:
+            OutboxMessage.objects.bulk_create(rows)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+
+        transaction.on_commit(wake_sender)
+        return len(rows)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from outbox import sender
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends all due email in the outbox now, in this process "
+        "(normally the job worker does this)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int,
+                            help="Messages claimed at a time (default: OUTBOX_BATCH_SIZE).")
+
+    def handle(self, *args, **options):
+        counts = sender.deliver(batch_size=options["batch_size"])
+        self.stdout.write(
+            ", ".join(f"{count} {state}" for state, count in sorted(counts.items()))
+            or "Nothing to send"
+        )
@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    One outgoing email, stored exactly as it will go over the wire.
+    See outbox/sender.py for delivery.
+    """
+
+    STATE_CHOICES = [
+        ("queued", "Queued"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    from_email = models.CharField(max_length=254)
+    # Envelope recipients: To, Cc and Bcc together
+    recipients = models.JSONField(default=list)
+    # For the admin only; the real subject is in `message`
+    subject = models.CharField(max_length=255, blank=True)
+    message = models.BinaryField()
+
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    send_after = models.DateTimeField(default=timezone.now)
+
+    # Set while a sender holds the message; a claim that outlives
+    # claimed_until belongs to a sender that died and is released
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claiming: the next due messages in send_after order
+            models.Index(fields=["state", "send_after"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject or '(no subject)'} → {', '.join(self.recipients)}"
@@ -0,0 +1,196 @@
+"""
+Delivers the email outbox over SMTP (the "outbox.deliver" job, see
+outbox/tasks.py, or `manage.py send_outbox`).
+
+deliver() claims due messages OUTBOX_BATCH_SIZE at a time and sends
+every batch over one SMTP connection, so a drain costs one TLS
+handshake and login rather than one per message:
+
+- A batch is claimed with one conditional UPDATE (queued -> sending,
+  tagged with a claim token), so two senders never send the same
+  message. A claim older than JOBS_VISIBILITY_TIMEOUT belongs to a
+  sender that died and is released; that message may go out twice
+  (delivery is at least once)
+- A message the server rejects permanently (5xx) fails at once; a
+  temporary rejection (4xx) is retried with the job queue's backoff,
+  OUTBOX_MAX_ATTEMPTS in all
+- If the connection itself fails, the rest of the batch goes back to
+  the outbox untouched and the error is raised, so the delivery job
+  backs off as a whole
+"""
+
+import contextlib
+import logging
+import smtplib
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.queue import retry_delay
+
+from .models import OutboxMessage
+
+
+logger = logging.getLogger(__name__)
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+
+def release_stale(now=None):
+    """
+    Puts messages whose sender died mid-batch back in the outbox.
+    """
+    now = now or timezone.now()
+    return OutboxMessage.objects.filter(state="sending", claimed_until__lt=now).update(
+        state="queued", claimed_by="", claimed_until=None
+    )
+
+
+def claim(limit):
+    """
+    Claims up to `limit` due messages and returns them, oldest first.
+    """
+    now = timezone.now()
+    candidates = list(
+        OutboxMessage.objects.filter(state="queued", send_after__lte=now)
+        .order_by("send_after", "pk")
+        .values_list("pk", flat=True)[:limit]
+    )
+    if not candidates:
+        return []
+
+    token = uuid.uuid4().hex
+    OutboxMessage.objects.filter(pk__in=candidates, state="queued").update(
+        state="sending",
+        claimed_by=token,
+        claimed_until=now + timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT),
+        attempts=F("attempts") + 1,
+    )
+    return list(
+        OutboxMessage.objects.filter(claimed_by=token, state="sending")
+        .order_by("send_after", "pk")
+    )
+
+
+def _rejection_code(exc):
+    """
+    The SMTP reply code for a message the server refused, or None if
+    the connection failed (nothing more can be sent on it).
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in exc.recipients.values()]
+    elif isinstance(exc, smtplib.SMTPResponseException):
+        codes = [exc.smtp_code]
+    else:
+        return None
+    # 421: the server is closing the connection
+    return None if 421 in codes else min(codes)
+
+
+def _retry_or_fail(message, exc, permanent=False):
+    error = f"{type(exc).__name__}: {exc}"
+    held = OutboxMessage.objects.filter(pk=message.pk, claimed_by=message.claimed_by)
+
+    if permanent or message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error("Email not delivered", extra={"outbox_message": message.pk, "error": error})
+        held.update(state="failed", claimed_by="", claimed_until=None, last_error=error)
+        return "failed"
+
+    held.update(
+        state="queued",
+        send_after=timezone.now() + timedelta(seconds=retry_delay(message.attempts)),
+        claimed_by="",
+        claimed_until=None,
+        last_error=error,
+    )
+    return "queued"
+
+
+def _put_back(messages):
+    # Never tried: the claim does not count as an attempt
+    OutboxMessage.objects.filter(
+        pk__in=[message.pk for message in messages], state="sending"
+    ).update(state="queued", claimed_by="", claimed_until=None, attempts=F("attempts") - 1)
+
+
+def _mark_sent(message_ids):
+    if message_ids:
+        OutboxMessage.objects.filter(pk__in=message_ids).update(
+            state="sent", sent_at=timezone.now(), claimed_by="", claimed_until=None,
+            last_error="",
+        )
+
+
+def deliver(batch_size=None):
+    """
+    Sends every due message, batch by batch, over one SMTP connection.
+    Returns {state: count} for the messages handled. Raises if the
+    connection fails (after putting unsent messages back).
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    counts = {}
+    connection = None
+    release_stale()
+
+    try:
+        while batch := claim(batch_size):
+            tried = 0
+            sent = []
+            try:
+                if connection is None:
+                    # Opened only once there is something to send
+                    connection = get_connection(SMTP_BACKEND, fail_silently=False)
+                    connection.open()
+
+                for message in batch:
+                    tried += 1
+                    try:
+                        refused = connection.connection.sendmail(
+                            message.from_email, message.recipients, bytes(message.message)
+                        )
+                    except Exception as exc:
+                        code = _rejection_code(exc)
+                        state = _retry_or_fail(message, exc, permanent=bool(code and code >= 500))
+                        counts[state] = counts.get(state, 0) + 1
+                        if code is None:
+                            raise  # nothing more can go over this connection
+                        continue
+
+                    if refused:
+                        logger.warning(
+                            "Some recipients refused",
+                            extra={"outbox_message": message.pk, "refused": sorted(refused)},
+                        )
+                    sent.append(message.pk)
+                    counts["sent"] = counts.get("sent", 0) + 1
+
+            except Exception:
+                _put_back(batch[tried:])
+                raise
+            finally:
+                _mark_sent(sent)
+
+    finally:
+        if connection is not None:
+            # The connection may already be broken
+            with contextlib.suppress(OSError):
+                connection.close()
+
+    if counts:
+        logger.info("Outbox delivered", extra=counts)
+    return counts
+
+
+def purge(now=None):
+    """
+    Deletes sent messages older than OUTBOX_KEEP_SENT_DAYS (they hold
+    password reset links, so they are not kept longer than needed).
+    """
+    now = now or timezone.now()
+    return OutboxMessage.objects.filter(
+        state="sent", sent_at__lt=now - timedelta(days=settings.OUTBOX_KEEP_SENT_DAYS)
+    ).delete()[0]
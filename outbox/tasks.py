@@ -0,0 +1,18 @@
+"""
+Background tasks for the outbox app (run by the job worker, see
+jobs/queue.py). Imported from OutboxConfig.ready().
+
+- outbox.deliver: queued when email is stored (outbox/backends.py)
+  and every minute, for retries; sends everything due, then deletes
+  old sent messages
+"""
+
+from jobs.queue import task
+
+from . import sender
+
+
+@task("outbox.deliver", every=60)
+def deliver():
+    sender.deliver()
+    sender.purge()
@@ -0,0 +1,227 @@
+import socketserver
+import threading
+from datetime import timedelta
+from email import message_from_bytes
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue
+from jobs.worker import run_due
+from outbox import sender
+from outbox.models import OutboxMessage
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Minimal local SMTP server: records every message it accepts and
+    the number of connections. Recipients listed in `replies` get
+    that reply code instead of 250.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPSinkHandler)
+        self.messages = []
+        self.connections = 0
+        self.replies = {}
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 sink ready")
+        envelope = {}
+        for line in self.rfile:
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            argument = command.partition(":")[2].strip().strip("<>")
+
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 sink")
+            elif verb == "MAIL":
+                envelope = {"from": argument, "to": []}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                code = self.server.replies.get(argument, 250)
+                if code == 250:
+                    envelope["to"].append(argument)
+                self.reply(f"{code} {argument}")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                lines = []
+                for data in self.rfile:
+                    if data == b".\r\n":
+                        break
+                    lines.append(data)
+                self.server.messages.append({**envelope, "data": b"".join(lines)})
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # RSET, NOOP
+                self.reply("250 OK")
+
+
+@override_settings(EMAIL_BACKEND="outbox.backends.OutboxBackend")
+class OutboxBackendTests(TestCase):
+    """
+    Tests for the outbox email backend (outbox/backends.py):
+    - Sending stores the message and queues one delivery job
+    - A password reset request no longer talks to the mail server
+    """
+
+    def test_messages_are_stored_not_sent(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sent = mail.send_mass_mail([
+                ("One", "Body", None, ["a@example.com"]),
+                ("Two", "Body", None, ["b@example.com"]),
+            ])
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(
+            list(OutboxMessage.objects.order_by("pk").values_list("subject", "recipients")),
+            [("One", ["a@example.com"]), ("Two", ["b@example.com"])],
+        )
+        self.assertEqual(Job.objects.filter(name="outbox.deliver").count(), 1)
+
+    def test_bcc_is_in_the_envelope_only(self):
+        mail.EmailMessage(
+            "Hello", "Body", "from@example.com", ["to@example.com"], bcc=["hidden@example.com"]
+        ).send()
+
+        stored = OutboxMessage.objects.get()
+        self.assertEqual(stored.recipients, ["to@example.com", "hidden@example.com"])
+        self.assertNotIn(b"hidden@example.com", bytes(stored.message))
+
+    def test_password_reset_goes_to_the_outbox(self):
+        cache.clear()  # rate limit buckets
+        User.objects.create_user("ceri", "ceri@example.com", "pass12345")
+
+        response = self.client.post(reverse("password_reset"), {"email": "ceri@example.com"})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(OutboxMessage.objects.get().recipients, ["ceri@example.com"])
+
+
+class SenderTests(TestCase):
+    """
+    Tests for outbox delivery (outbox/sender.py):
+    - Batches are sent over one SMTP connection
+    - 5xx rejections fail, 4xx rejections retry with backoff
+    - A connection failure puts unsent messages back untouched
+    - Claims left by a dead sender are released
+    """
+
+    def setUp(self):
+        self.sink = SMTPSink()
+        threading.Thread(target=self.sink.serve_forever, daemon=True).start()
+        self.addCleanup(self.sink.server_close)
+        self.addCleanup(self.sink.shutdown)
+
+        smtp = override_settings(
+            EMAIL_BACKEND="outbox.backends.OutboxBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.sink.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_TIMEOUT=5,
+            OUTBOX_MAX_ATTEMPTS=2,
+        )
+        smtp.enable()
+        self.addCleanup(smtp.disable)
+
+    def queue_mail(self, *recipients):
+        for recipient in recipients:
+            mail.send_mail(f"To {recipient}", "Body", "from@example.com", [recipient])
+
+    def test_batches_share_one_connection(self):
+        self.queue_mail(*(f"user{n}@example.com" for n in range(5)))
+
+        counts = sender.deliver(batch_size=2)
+
+        self.assertEqual(counts, {"sent": 5})
+        self.assertEqual(self.sink.connections, 1)
+        self.assertEqual(
+            [message["to"] for message in self.sink.messages],
+            [[f"user{n}@example.com"] for n in range(5)],
+        )
+        self.assertEqual(
+            message_from_bytes(self.sink.messages[0]["data"])["Subject"], "To user0@example.com"
+        )
+        self.assertEqual(OutboxMessage.objects.filter(state="sent").count(), 5)
+
+    def test_rejections(self):
+        self.sink.replies = {"gone@example.com": 550, "busy@example.com": 450}
+        self.queue_mail("gone@example.com", "busy@example.com", "ok@example.com")
+
+        with self.assertLogs("outbox.sender", "ERROR"):
+            self.assertEqual(sender.deliver(), {"failed": 1, "queued": 1, "sent": 1})
+
+        busy = OutboxMessage.objects.get(recipients=["busy@example.com"])
+        self.assertEqual((busy.state, busy.attempts), ("queued", 1))
+        self.assertGreater(busy.send_after, timezone.now())
+        self.assertIn("SMTPRecipientsRefused", busy.last_error)
+
+        # Second and last attempt
+        OutboxMessage.objects.filter(pk=busy.pk).update(send_after=timezone.now())
+        with self.assertLogs("outbox.sender", "ERROR"):
+            self.assertEqual(sender.deliver(), {"failed": 1})
+        self.assertEqual(len(self.sink.messages), 1)
+
+    def test_connection_failure_puts_messages_back(self):
+        self.queue_mail("a@example.com", "b@example.com")
+        self.sink.shutdown()
+        self.sink.server_close()
+
+        with self.assertRaises(OSError):
+            sender.deliver()
+
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list("state", "attempts")),
+            [("queued", 0), ("queued", 0)],
+        )
+
+    def test_stale_claims_are_released(self):
+        self.queue_mail("a@example.com")
+        sender.claim(10)  # a sender that died
+        self.assertEqual(sender.deliver(), {})
+
+        OutboxMessage.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(sender.deliver(), {"sent": 1})
+
+    def test_delivery_job_and_command(self):
+        self.queue_mail("a@example.com")
+        job = enqueue("outbox.deliver")
+
+        self.assertEqual(run_due(), {"done": 1})
+        self.assertEqual(len(self.sink.messages), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).state, "done")
+
+        self.queue_mail("b@example.com")
+        out = StringIO()
+        call_command("send_outbox", stdout=out)
+        self.assertIn("1 sent", out.getvalue())
+
+    def test_old_sent_messages_are_purged(self):
+        self.queue_mail("a@example.com", "b@example.com")
+        sender.deliver()
+        OutboxMessage.objects.filter(recipients=["a@example.com"]).update(
+            sent_at=timezone.now() - timedelta(days=30)
+        )
+
+        self.assertEqual(sender.purge(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
@@ -0,0 +1,65 @@
+"""
+Admin pagination for very large tables.
+
+Django's changelist runs an exact COUNT(*) to draw its paginator,
+which means a full scan of auth_user / movies_movie on every page
+view. EstimatedCountPaginator avoids that:
+
+- Unfiltered lists use PostgreSQL's planner estimate (pg_class),
+  falling back to an exact count for small or never-analysed tables
+  and on other databases
+- Filtered / searched lists are counted up to MAX_COUNT rows only,
+  so the count stops early however many rows match; a larger result
+  is shown as MAX_COUNT rows (narrow the filter to reach the rest)
+
+Pair it with `show_full_result_count = False` on the ModelAdmin, or
+the changelist runs a second, unfiltered exact count anyway.
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+
+    # Tables estimated below this are small enough to count exactly
+    EXACT_BELOW = 100_000
+    # Filtered results are counted up to this many rows
+    MAX_COUNT = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query"):
+            return super().count
+
+        if queryset.query.where:
+            return queryset.order_by()[: self.MAX_COUNT].count()
+
+        estimate = self.estimate(queryset)
+        if estimate is not None and estimate >= self.EXACT_BELOW:
+            return estimate
+        return queryset.count()
+
+    @staticmethod
+    def estimate(queryset):
+        """
+        The planner's row estimate for the queryset's table, or None
+        if the database cannot give one.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+
+        # -1 until the table has been VACUUMed / ANALYZEd (PostgreSQL 14+)
+        if row is None or row[0] < 0:
+            return None
+        return row[0]
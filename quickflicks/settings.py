@@ -45,6 +45,9 @@ INSTALLED_APPS = [
     # Local apps
     "accounts.apps.AccountsConfig",
     "movies",
+    "jobs",
+    "outbox",
+    "monitoring",
 ]
 
 
@@ -53,13 +56,16 @@ INSTALLED_APPS = [
 # -------------------------------------------------------------
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise, without forcing the chain to sync under ASGI
+    "quickflicks.static_files.AsyncWhiteNoiseMiddleware",
+    "monitoring.middleware.RequestTimingMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "monitoring.profiling.ProfilerMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -72,7 +78,8 @@ ROOT_URLCONF = "quickflicks.urls"
 # -------------------------------------------------------------
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates, timing each render (see monitoring/timing.py)
+        "BACKEND": "monitoring.template_backend.TimedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -112,6 +119,52 @@ if DATABASE_URL:
     )
 
 
+# -------------------------------------------------------------
+# CACHES
+# - Locally: per-process LocMemCache (evicts least recently used
+#   entries once MAX_ENTRIES is reached)
+# - Production: set REDIS_URL to share caches between dynos
+#   (uses the "redis" package, with "hiredis" as its faster parser;
+#   both are in requirements.txt)
+# -------------------------------------------------------------
+TMDB_SEARCH_CACHE_ALIAS = "tmdb_search"
+TMDB_SEARCH_CACHE_TTL = config("TMDB_SEARCH_CACHE_TTL", default=60 * 60, cast=int)
+TMDB_SEARCH_CACHE_MAX_ENTRIES = config(
+    "TMDB_SEARCH_CACHE_MAX_ENTRIES", default=1000, cast=int
+)
+
+REDIS_URL = config("REDIS_URL", default=None)
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        TMDB_SEARCH_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "quickflicks",
+            "TIMEOUT": TMDB_SEARCH_CACHE_TTL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        TMDB_SEARCH_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tmdb-search",
+            "TIMEOUT": TMDB_SEARCH_CACHE_TTL,
+            "OPTIONS": {
+                "MAX_ENTRIES": TMDB_SEARCH_CACHE_MAX_ENTRIES,
+                "CULL_FREQUENCY": 10,  # evict the oldest 10% when full
+            },
+        },
+    }
+
+
 # -------------------------------------------------------------
 # PASSWORD VALIDATION
 # -------------------------------------------------------------
@@ -126,12 +179,39 @@ AUTH_PASSWORD_VALIDATORS = [
 # -------------------------------------------------------------
 # AUTHENTICATION BACKENDS (Email OR Username login)
 # -------------------------------------------------------------
+# EmailOrUsernameBackend extends ModelBackend (permissions, username
+# logins). ModelBackend stays listed because sessions created before
+# it was added store its path, and Django logs out any session whose
+# backend is no longer listed; it only repeats lookups for failed
+# authenticate() calls (the admin login), not the site's login form
 AUTHENTICATION_BACKENDS = [
     "accounts.auth_backend.EmailOrUsernameBackend",
     "django.contrib.auth.backends.ModelBackend",
 ]
 
 
+# -------------------------------------------------------------
+# ACCOUNT RATE LIMITING (see accounts/ratelimit.py)
+# - Token buckets per client IP and per submitted username/email
+# - "<count>/<period>": bucket size, refilled at count per period
+# - Login only charges the username/email bucket for failed
+#   attempts, at a higher rate than one IP can reach, so a single
+#   client cannot lock someone else out
+# - RATELIMIT_TRUSTED_PROXIES: proxies in front of the app. Defaults
+#   to 1 on Heroku (DYNO is set), where REMOTE_ADDR is always the
+#   router's and the client IP comes from X-Forwarded-For
+# -------------------------------------------------------------
+RATELIMIT_ENABLED = config("RATELIMIT_ENABLED", default=True, cast=bool)
+RATELIMIT_TRUSTED_PROXIES = config(
+    "RATELIMIT_TRUSTED_PROXIES", default=1 if "DYNO" in os.environ else 0, cast=int
+)
+RATELIMIT_RATES = {
+    "login": {"ip": "20/m", "failures": "30/m"},
+    "signup": {"ip": "5/m"},
+    "password_reset": {"ip": "5/m", "identifier": "3/h"},
+}
+
+
 # -------------------------------------------------------------
 # INTERNATIONALIZATION
 # -------------------------------------------------------------
@@ -157,8 +237,20 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # -------------------------------------------------------------
 # MAILTRAP SMTP EMAIL CONFIG
+# - Email is sent over SMTP during the request by default
+# - EMAIL_USE_OUTBOX=True: requests only store outgoing email in
+#   the outbox and the job worker sends it with the settings below
+#   (see outbox/sender.py). Only enable it with a worker dyno
+#   running (heroku ps:scale worker=1), or mail is never sent
 # -------------------------------------------------------------
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_USE_OUTBOX = config("EMAIL_USE_OUTBOX", default=False, cast=bool)
+EMAIL_BACKEND = config(
+    "EMAIL_BACKEND",
+    default=(
+        "outbox.backends.OutboxBackend" if EMAIL_USE_OUTBOX
+        else "django.core.mail.backends.smtp.EmailBackend"
+    ),
+)
 
 EMAIL_HOST = config("EMAIL_HOST", default="sandbox.smtp.mailtrap.io")
 EMAIL_PORT = config("EMAIL_PORT", default=2525, cast=int)
@@ -167,6 +259,7 @@ EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")
 
 EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=True, cast=bool)
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=20, cast=int)
 
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="noreply@quickflicks.com")
 
@@ -174,21 +267,94 @@ EMAIL_FAIL_SILENTLY = False
 
 
 # -------------------------------------------------------------
-# LOGGING
+# LOGGING (see monitoring/logs.py)
+# - Records are put on a queue by the logging thread; a listener
+#   thread formats and writes them, so requests never wait on log
+#   output (records are dropped, and counted, if LOG_QUEUE_SIZE
+#   are already waiting)
+# - LOG_FORMAT: "json" (one object per line, including `extra=`
+#   fields) or "text"; JSON by default when DEBUG is off
+# - LOG_LEVEL is the root level; the per-logger presets below can
+#   be overridden, e.g. LOG_LEVELS="movies.tmdb=WARNING,jobs=DEBUG"
+# - High-volume loggers are sampled: at most LOG_SAMPLE_RATES
+#   records per second each; warnings and errors always pass
 # -------------------------------------------------------------
+LOG_FORMAT = config("LOG_FORMAT", default="text" if DEBUG else "json")
+LOG_LEVEL = config("LOG_LEVEL", default="DEBUG" if DEBUG else "INFO")
+LOG_QUEUE_SIZE = config("LOG_QUEUE_SIZE", default=10000, cast=int)
+
+LOG_LEVELS = {
+    "django": "INFO",
+    # Every SQL statement, logged by Django only when DEBUG is on
+    "django.db.backends": "DEBUG" if DEBUG else "WARNING",
+    "django.template": "INFO",
+    "asyncio": "WARNING",
+    "urllib3": "WARNING",
+    **dict(
+        item.strip().split("=", 1)
+        for item in config("LOG_LEVELS", default="").split(",")
+        if "=" in item
+    ),
+}
+
+LOG_SAMPLE_RATES = {
+    "django.db.backends": 20,
+    "movies.tmdb": 10,
+}
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "monitoring.logs.JSONFormatter"},
+        "text": {"()": "monitoring.logs.KeyValueFormatter"},
+    },
+    "filters": {
+        f"sample:{name}": {"()": "monitoring.logs.SamplingFilter", "per_second": rate}
+        for name, rate in LOG_SAMPLE_RATES.items()
+    },
     "handlers": {
-        "console": {"class": "logging.StreamHandler"},
+        "console": {"class": "logging.StreamHandler", "formatter": LOG_FORMAT},
+        "queue": {
+            "class": "monitoring.logs.BackgroundQueueHandler",
+            "queue": {"()": "queue.Queue", "maxsize": LOG_QUEUE_SIZE},
+            "handlers": ["console"],
+        },
+    },
+    "loggers": {
+        name: {
+            "level": LOG_LEVELS.get(name, "NOTSET"),
+            "filters": [f"sample:{name}"] if name in LOG_SAMPLE_RATES else [],
+        }
+        for name in {**LOG_LEVELS, **LOG_SAMPLE_RATES}
     },
     "root": {
-        "handlers": ["console"],
-        "level": "DEBUG",
+        "handlers": ["queue"],
+        "level": LOG_LEVEL,
     },
 }
 
 
+# -------------------------------------------------------------
+# MONITORING (see monitoring/middleware.py)
+# - Every request is timed (total, SQL, TMDB, template rendering)
+#   and logged; Server-Timing headers are sent to staff users, or
+#   to everyone with SERVER_TIMING_PUBLIC
+# - /metrics serves Prometheus metrics to staff users, or to a
+#   scraper sending "Authorization: Bearer <METRICS_TOKEN>"
+# -------------------------------------------------------------
+SERVER_TIMING_PUBLIC = config("SERVER_TIMING_PUBLIC", default=False, cast=bool)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Request profiles (see monitoring/profiling.py): staff add ?profile=1
+# to profile a request with cProfile; PROFILE_SAMPLE_RATE (0 - 1) of
+# all requests are profiled by sampling the stack every
+# PROFILE_SAMPLING_INTERVAL seconds. Kept PROFILE_KEEP_DAYS.
+PROFILE_SAMPLE_RATE = config("PROFILE_SAMPLE_RATE", default=0.0, cast=float)
+PROFILE_SAMPLING_INTERVAL = config("PROFILE_SAMPLING_INTERVAL", default=0.005, cast=float)
+PROFILE_KEEP_DAYS = config("PROFILE_KEEP_DAYS", default=7, cast=int)
+
+
 # -------------------------------------------------------------
 # API KEYS
 # -------------------------------------------------------------
@@ -198,3 +364,97 @@ if not TMDB_API_KEY:
     import logging
     logger = logging.getLogger(__name__)
     logger.warning("TMDB_API_KEY is not set – TMDB features will be disabled.")
+
+
+# -------------------------------------------------------------
+# TMDB CLIENT (see movies/tmdb.py)
+# -------------------------------------------------------------
+# Point TMDB_BASE_URL at the local stand-in (manage.py tmdb_standin)
+# to run the search page offline. Setting TMDB_RECORD_DIR saves every
+# successful response there so the stand-in can replay it later.
+TMDB_BASE_URL = config("TMDB_BASE_URL", default="https://api.themoviedb.org/3")
+TMDB_RECORD_DIR = config("TMDB_RECORD_DIR", default="")
+TMDB_FIXTURES_DIR = BASE_DIR / "movies" / "tmdb_fixtures"
+TMDB_POOL_SIZE = config("TMDB_POOL_SIZE", default=10, cast=int)
+TMDB_CONNECT_TIMEOUT = config("TMDB_CONNECT_TIMEOUT", default=3.05, cast=float)
+TMDB_READ_TIMEOUT = config("TMDB_READ_TIMEOUT", default=8.0, cast=float)
+TMDB_MAX_RETRIES = config("TMDB_MAX_RETRIES", default=2, cast=int)
+TMDB_RETRY_BACKOFF = config("TMDB_RETRY_BACKOFF", default=0.5, cast=float)
+TMDB_RETRY_MAX_WAIT = config("TMDB_RETRY_MAX_WAIT", default=5.0, cast=float)
+
+# Poster proxy (see movies/posters.py): TMDB images are fetched once
+# and served from POSTER_CACHE_DIR as resized WebP variants
+TMDB_IMAGE_BASE_URL = config("TMDB_IMAGE_BASE_URL", default="https://image.tmdb.org/t/p")
+POSTER_CACHE_DIR = config("POSTER_CACHE_DIR", default=str(BASE_DIR / "poster_cache"))
+POSTER_WIDTHS = (92, 154, 300)
+# Posters TMDB could not provide are not fetched again for this long
+POSTER_MISSING_TTL = config("POSTER_MISSING_TTL", default=5 * 60, cast=int)
+# Seconds a request waits for a poster another request is rendering
+POSTER_RENDER_WAIT = config("POSTER_RENDER_WAIT", default=5.0, cast=float)
+# Posters not on disk yet that one client may have rendered
+# ("<count>/<period>", see accounts/ratelimit.py); a page of search
+# results needs up to 40
+POSTER_COLD_RENDER_RATE = config("POSTER_COLD_RENDER_RATE", default="120/m")
+
+# Maximum number of result pages (20 films each) the search page
+# shows. Pages after the first are only fetched when TMDB reports
+# them (fetched together, one extra round trip)
+TMDB_SEARCH_PAGES = config("TMDB_SEARCH_PAGES", default=1, cast=int)
+
+# Where the search page gets its results (see movies/search.py):
+# - "tmdb": TMDB API only
+# - "local": local catalog full-text index only (no TMDB calls)
+# - "local_first": local catalog, falling back to TMDB on no results
+MOVIE_SEARCH_MODE = config("MOVIE_SEARCH_MODE", default="tmdb")
+
+# Search-as-you-type index (see movies/autocomplete.py)
+AUTOCOMPLETE_INDEX_SIZE = config("AUTOCOMPLETE_INDEX_SIZE", default=50000, cast=int)
+AUTOCOMPLETE_REFRESH_SECONDS = config("AUTOCOMPLETE_REFRESH_SECONDS", default=300, cast=int)
+AUTOCOMPLETE_REBUILD_SECONDS = config("AUTOCOMPLETE_REBUILD_SECONDS", default=6 * 60 * 60, cast=int)
+
+# Movies per shelf section page (see movies/shelf.py)
+SHELF_PAGE_SIZE = config("SHELF_PAGE_SIZE", default=24, cast=int)
+
+# Rendered shelf sections are cached in the "default" cache and
+# invalidated by a per-user version. Versions in LocMem are per
+# process, so with several workers this needs the shared Redis cache;
+# without REDIS_URL it is only on for local development (DEBUG).
+# The TTL bounds how long catalog changes (titles, posters) can lag.
+SHELF_CACHE_TTL = config(
+    "SHELF_CACHE_TTL", default=60 * 60 if (REDIS_URL or DEBUG) else 0, cast=int
+)
+
+# Admin bulk actions on shelf rows (see movies/bulk_updates.py):
+# selections larger than ADMIN_BULK_INLINE_LIMIT run as a background
+# job, ADMIN_BULK_CHUNK_SIZE rows per transaction
+ADMIN_BULK_INLINE_LIMIT = config("ADMIN_BULK_INLINE_LIMIT", default=1000, cast=int)
+ADMIN_BULK_CHUNK_SIZE = config("ADMIN_BULK_CHUNK_SIZE", default=1000, cast=int)
+
+# -------------------------------------------------------------
+# BACKGROUND JOBS (see jobs/queue.py)
+# - Run by the Procfile "worker" process: manage.py run_worker
+# - A job whose worker stops responding is taken over once its
+#   lock (JOBS_VISIBILITY_TIMEOUT seconds) lapses
+# - Failures retry with exponential backoff, JOBS_MAX_ATTEMPTS in all
+# -------------------------------------------------------------
+JOBS_CONCURRENCY = config("JOBS_CONCURRENCY", default=4, cast=int)
+JOBS_POLL_INTERVAL = config("JOBS_POLL_INTERVAL", default=2.0, cast=float)
+JOBS_VISIBILITY_TIMEOUT = config("JOBS_VISIBILITY_TIMEOUT", default=300, cast=int)
+JOBS_MAX_ATTEMPTS = config("JOBS_MAX_ATTEMPTS", default=5, cast=int)
+JOBS_RETRY_BACKOFF = config("JOBS_RETRY_BACKOFF", default=30, cast=int)
+JOBS_RETRY_MAX_WAIT = config("JOBS_RETRY_MAX_WAIT", default=60 * 60, cast=int)
+JOBS_KEEP_FINISHED_DAYS = config("JOBS_KEEP_FINISHED_DAYS", default=7, cast=int)
+
+# Catalog enrichment (see movies/tasks.py): shelved films get their
+# full TMDB record in the background; records older than
+# CATALOG_REFRESH_DAYS are refreshed, CATALOG_REFRESH_BATCH per hour
+CATALOG_REFRESH_DAYS = config("CATALOG_REFRESH_DAYS", default=30, cast=int)
+CATALOG_REFRESH_BATCH = config("CATALOG_REFRESH_BATCH", default=500, cast=int)
+
+# Email outbox: OUTBOX_BATCH_SIZE messages claimed at a time, all sent
+# over one SMTP connection; a temporary rejection is retried with the
+# job backoff, OUTBOX_MAX_ATTEMPTS in all; sent messages are deleted
+# after OUTBOX_KEEP_SENT_DAYS
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=50, cast=int)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+OUTBOX_KEEP_SENT_DAYS = config("OUTBOX_KEEP_SENT_DAYS", default=7, cast=int)
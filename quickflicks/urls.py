@@ -13,6 +13,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import render
 
+from monitoring.views import metrics_view
+
 
 def home(request):
     return render(request, "movies/home.html")
@@ -27,4 +29,5 @@ urlpatterns = [
     path("", include("movies.urls")),                  # home + search
     path("accounts/", include("accounts.urls")),       # login, signup, profile
     path("about/", about_page, name="about"),          # About page
+    path("metrics", metrics_view, name="metrics"),     # Prometheus (staff only)
 ]
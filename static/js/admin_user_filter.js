@@ -0,0 +1,29 @@
+/*jslint
+    browser: true
+*/
+
+/*global django, URLSearchParams */
+
+/* ============================================================
+   ADMIN: USER AUTOCOMPLETE FILTER (movies/admin.py)
+   - select2 reports changes through jQuery, so listen there
+   - Reload the changelist filtered by the chosen user,
+     back on the first page
+============================================================ */
+
+django.jQuery(function ($) {
+    "use strict";
+
+    $(document).on("change", "select.user-autocomplete-filter", function () {
+        var params = new URLSearchParams(window.location.search);
+
+        if (this.value) {
+            params.set(this.name, this.value);
+        } else {
+            params.delete(this.name);
+        }
+        params.delete("p");
+
+        window.location.search = params.toString();
+    });
+});
@@ -0,0 +1,90 @@
+/*jslint
+    browser: true,
+    long: true
+*/
+
+/*global document, fetch, AbortController, URL, window */
+
+/* ============================================================
+   SEARCH-AS-YOU-TYPE SUGGESTIONS
+   Fills the search box's <datalist> from /autocomplete/ while
+   the user types. Requests are debounced and stale ones are
+   cancelled, so only the latest prefix is ever rendered.
+============================================================ */
+
+document.addEventListener("DOMContentLoaded", function () {
+
+    /* Declare all variables at top (for JSLint compliance) */
+    var input = document.querySelector("[data-autocomplete-url]");
+    var datalist;
+    var timer;
+    var controller;
+    var DEBOUNCE_MS = 150;
+    var MIN_LENGTH = 2;
+
+    if (!input) {
+        return;
+    }
+
+    datalist = document.getElementById(input.getAttribute("list"));
+
+    /* ============================================================
+       RENDER SUGGESTIONS
+    ============================================================ */
+    function render(results) {
+        datalist.replaceChildren();
+
+        results.forEach(function (movie) {
+            var option = document.createElement("option");
+
+            option.value = movie.title;
+
+            if (movie.year) {
+                option.label = movie.title + " (" + movie.year + ")";
+            }
+
+            datalist.appendChild(option);
+        });
+    }
+
+    /* ============================================================
+       FETCH SUGGESTIONS (latest request wins)
+    ============================================================ */
+    function suggest(prefix) {
+        var url = new URL(input.dataset.autocompleteUrl, window.location.origin);
+
+        if (controller) {
+            controller.abort();
+        }
+
+        controller = new AbortController();
+        url.searchParams.set("q", prefix);
+
+        fetch(url, {signal: controller.signal}).then(function (response) {
+            return response.json();
+        }).then(function (data) {
+            render(data.results);
+        }).catch(function () {
+            /* Aborted or offline: keep the current suggestions */
+            return;
+        });
+    }
+
+    /* ============================================================
+       DEBOUNCED INPUT HANDLER
+    ============================================================ */
+    input.addEventListener("input", function () {
+        var prefix = input.value.trim();
+
+        window.clearTimeout(timer);
+
+        if (prefix.length < MIN_LENGTH) {
+            render([]);
+            return;
+        }
+
+        timer = window.setTimeout(function () {
+            suggest(prefix);
+        }, DEBOUNCE_MS);
+    });
+});
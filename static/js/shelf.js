@@ -3,7 +3,7 @@
     long: true
 */
 
-/*global document, localStorage, JSON */
+/*global document, localStorage, JSON, fetch, FormData */
 
 /* ============================================================
    SHELF PAGE UI STATE + ACCESSIBILITY LOGIC
@@ -87,13 +87,89 @@ document.addEventListener("DOMContentLoaded", function () {
     }
 
     /* ============================================================
-       SAVE STATE BEFORE FORM SUBMISSION
+       IN-PLACE CARD UPDATES
+       Card forms are posted with fetch; the server answers with
+       just the updated card (or 204 when it was removed), which
+       is swapped in without reloading the shelf.
     ============================================================ */
-    document.querySelectorAll(
-        ".shelf-actions form"
-    ).forEach(function (form) {
-        form.addEventListener("submit", function () {
+    function placeCard(oldCard, html) {
+        var holder = document.createElement("template");
+        var card;
+        var row;
+
+        holder.innerHTML = html.trim();
+        card = holder.content.firstElementChild;
+
+        if (card.dataset.status === oldCard.dataset.status) {
+            oldCard.replaceWith(card);
+            return;
+        }
+
+        /* Status changed: newest first in the target section */
+        oldCard.remove();
+        row = document.querySelector(
+            ".shelf-row[data-section=\"" + card.dataset.status + "\"]"
+        );
+        row.prepend(card);
+    }
+
+    /* Delegated, so cards added by "load more" are covered too */
+    document.addEventListener("submit", function (event) {
+        var form = event.target;
+        var card = form.closest(".shelf-card");
+
+        if (!card) {
+            return;
+        }
+
+        event.preventDefault();
+
+        fetch(form.action, {
+            body: new FormData(form),
+            credentials: "same-origin",
+            headers: {"X-Requested-With": "fetch"},
+            method: "POST"
+        }).then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            if (response.status === 204) {
+                card.remove();
+                return;
+            }
+            return response.text().then(function (html) {
+                placeCard(card, html);
+            });
+        }).catch(function () {
+            /* Fall back to a normal post + full page reload */
             saveState();
+            form.submit();
+        });
+    });
+
+    /* ============================================================
+       LOAD MORE (next page of a shelf section)
+    ============================================================ */
+    document.addEventListener("click", function (event) {
+        var button = event.target.closest(".shelf-load-more");
+
+        if (!button) {
+            return;
+        }
+
+        button.disabled = true;
+
+        fetch(button.dataset.url, {credentials: "same-origin"}).then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.text();
+        }).then(function (html) {
+            /* The fragment brings its own "load more" button */
+            button.insertAdjacentHTML("beforebegin", html);
+            button.remove();
+        }).catch(function () {
+            button.disabled = false;
         });
     });
 